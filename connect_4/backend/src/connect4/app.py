@@ -7,9 +7,10 @@ from fastapi.openapi.docs import get_swagger_ui_html
 from fastapi.responses import HTMLResponse
 from fastapi.middleware.cors import CORSMiddleware
 
-from .routes import router
+from .lifecycle import lifespan
+from .routes import NEXT_CURSOR_HEADER, router
 
-app = FastAPI(title="Connect 4 Backend", version="0.1.0")
+app = FastAPI(title="Connect 4 Backend", version="0.1.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -17,6 +18,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
 )
 
 app.include_router(router)
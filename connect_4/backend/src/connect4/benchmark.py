@@ -0,0 +1,129 @@
+"""Micro-benchmarks for the bitboard hot paths over a fixed position corpus.
+
+Times the operations the search spends its life in — ``drop`` followed by
+``undo_last_move``, ``has_connect_four`` and ``playable_columns`` — plus a
+fixed-depth search, on every position of :data:`CORPUS`. Run it before and
+after touching :mod:`connect4.datamodel`::
+
+    python -m connect4.benchmark
+    python -m connect4.benchmark --width 9 --height 7
+
+Numbers are the best of ``--repeat`` runs, in nanoseconds per operation
+(microseconds per search node for the search).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from typing import Callable, Sequence
+
+from .datamodel import BitboardState, BoardGeometry, STANDARD, has_connect_four
+from .game import SearchStats, minimax_move
+
+# Positions reached by random play, from the opening to a crowded board, in
+# 1-based move-string notation. Valid on any board at least 7 wide.
+CORPUS: tuple[str, ...] = (
+    "4265",
+    "32647673",
+    "526764345652",
+    "4677625274173644",
+    "51376572243223457623",
+    "172124623212732756456575",
+    "2572337671565466611215272651",
+    "76234526336572715245332654632651",
+)
+
+SEARCH_DEPTH = 5
+
+
+def _best_of(repeat: int, run: Callable[[], float]) -> float:
+    return min(run() for _ in range(repeat))
+
+
+def bench_drop_undo(states: Sequence[BitboardState], loops: int) -> float:
+    started = time.perf_counter()
+    operations = 0
+    for state in states:
+        columns = tuple(state.playable_columns())
+        drop = state.drop
+        undo = state.undo_last_move
+        for _ in range(loops):
+            for column in columns:
+                drop(column)
+                undo()
+        operations += loops * len(columns)
+    return (time.perf_counter() - started) / operations * 1e9
+
+
+def bench_has_connect_four(
+    states: Sequence[BitboardState], loops: int, geometry: BoardGeometry
+) -> float:
+    boards = [state.board(color) for state in states for color in (0, 1)]
+    started = time.perf_counter()
+    for _ in range(loops):
+        for board in boards:
+            has_connect_four(board, geometry)
+    return (time.perf_counter() - started) / (loops * len(boards)) * 1e9
+
+
+def bench_playable_columns(states: Sequence[BitboardState], loops: int) -> float:
+    started = time.perf_counter()
+    for _ in range(loops):
+        for state in states:
+            for _column in state.playable_columns():
+                pass
+    return (time.perf_counter() - started) / (loops * len(states)) * 1e9
+
+
+def bench_search(states: Sequence[BitboardState], depth: int) -> float:
+    stats = SearchStats()
+    started = time.perf_counter()
+    for state in states:
+        minimax_move(state.copy(), depth, stats)
+    return (time.perf_counter() - started) / max(stats.nodes, 1) * 1e6
+
+
+def run(
+    geometry: BoardGeometry = STANDARD,
+    *,
+    loops: int = 2_000,
+    repeat: int = 5,
+    depth: int = SEARCH_DEPTH,
+) -> dict[str, float]:
+    states = [BitboardState.from_moves(moves, geometry=geometry) for moves in CORPUS]
+    return {
+        "drop_undo_ns": _best_of(repeat, lambda: bench_drop_undo(states, loops)),
+        "has_connect_four_ns": _best_of(
+            repeat, lambda: bench_has_connect_four(states, loops, geometry)
+        ),
+        "playable_columns_ns": _best_of(
+            repeat, lambda: bench_playable_columns(states, loops)
+        ),
+        "search_us_per_node": _best_of(repeat, lambda: bench_search(states, depth)),
+    }
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--width", type=int, default=STANDARD.width)
+    parser.add_argument("--height", type=int, default=STANDARD.height)
+    parser.add_argument("--loops", type=int, default=2_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--depth", type=int, default=SEARCH_DEPTH)
+    parser.add_argument("--json", action="store_true", help="Print JSON results.")
+    args = parser.parse_args(argv)
+
+    geometry = BoardGeometry.of(args.width, args.height)
+    results = run(geometry, loops=args.loops, repeat=args.repeat, depth=args.depth)
+    if args.json:
+        print(json.dumps({"geometry": f"{geometry.width}x{geometry.height}", **results}))
+        return
+    print(f"board {geometry.width}x{geometry.height}")
+    for name, value in results.items():
+        print(f"  {name:<22}{value:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""Measure strength and CPU cost of difficulty presets against fixed depths.
+
+Every preset plays ``--games`` games against a plain fixed-depth search for
+each opponent depth, alternating colors. A few random opening plies keep the
+deterministic opponents from replaying the same game. Run it with::
+
+    python -m connect4.calibration --games 10 --opponents 3,5,7
+
+The report lists, per pairing, the preset's wins/draws/losses and its move
+latency and nodes per move next to the opponent's, so budgets can be tuned
+until each preset sits where it should on both axes.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import statistics
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Sequence
+
+from .datamodel import RED, YELLOW, BitboardState
+from .evaluation import install_evaluator, load_default_evaluator
+from .game import calculate_next_move
+from .metrics import AI_NODES_SEARCHED
+from .sessions import DIFFICULTY_DEPTH, DIFFICULTY_PRESETS, DifficultyLevel
+
+MovePicker = Callable[[BitboardState], int]
+
+
+@dataclass(slots=True)
+class MoveCost:
+    """Latency and nodes searched for the moves of one side."""
+
+    seconds: list[float] = field(default_factory=list)
+    nodes: list[float] = field(default_factory=list)
+
+    def record(self, seconds: float, nodes: float) -> None:
+        self.seconds.append(seconds)
+        self.nodes.append(nodes)
+
+    def summary(self) -> dict[str, float]:
+        if not self.seconds:
+            return {"moves": 0}
+        ordered = sorted(self.seconds)
+        return {
+            "moves": len(ordered),
+            "meanMs": statistics.fmean(ordered) * 1000,
+            "p95Ms": ordered[int(0.95 * (len(ordered) - 1))] * 1000,
+            "maxMs": ordered[-1] * 1000,
+            "meanNodes": statistics.fmean(self.nodes),
+        }
+
+
+@dataclass(slots=True)
+class PairingResult:
+    """Outcome of a preset playing a fixed-depth opponent."""
+
+    preset: str
+    opponent_depth: int
+    wins: int = 0
+    draws: int = 0
+    losses: int = 0
+    preset_cost: MoveCost = field(default_factory=MoveCost)
+    opponent_cost: MoveCost = field(default_factory=MoveCost)
+
+    @property
+    def score(self) -> float:
+        games = self.wins + self.draws + self.losses
+        return (self.wins + 0.5 * self.draws) / games if games else 0.0
+
+    def to_dict(self) -> dict[str, object]:
+        data = asdict(self)
+        data["score"] = self.score
+        data["preset_cost"] = self.preset_cost.summary()
+        data["opponent_cost"] = self.opponent_cost.summary()
+        return data
+
+
+def preset_picker(level: DifficultyLevel, rng: random.Random) -> MovePicker:
+    preset = DIFFICULTY_PRESETS[level]
+    return lambda state: calculate_next_move(state, preset=preset, rng=rng)
+
+
+def depth_picker(depth: int) -> MovePicker:
+    return lambda state: calculate_next_move(state, depth=depth)
+
+
+def play_game(
+    yellow: MovePicker,
+    red: MovePicker,
+    *,
+    rng: random.Random,
+    opening_plies: int = 2,
+    costs: dict[int, MoveCost] | None = None,
+) -> int | None:
+    """Play one game and return the winning color, or ``None`` for a draw."""
+
+    state = BitboardState()
+    for _ in range(opening_plies):
+        state.drop(rng.choice(list(state.playable_columns())))
+
+    pickers = {YELLOW: yellow, RED: red}
+    while True:
+        last = state.last_result
+        if last is not None and (last.winner is not None or last.draw):
+            return last.winner
+        player = state.to_play
+        nodes_before = AI_NODES_SEARCHED.value()
+        started = time.perf_counter()
+        column = pickers[player](state.copy())
+        elapsed = time.perf_counter() - started
+        if costs is not None:
+            costs[player].record(elapsed, AI_NODES_SEARCHED.value() - nodes_before)
+        state.drop(column)
+
+
+def calibrate(
+    levels: Sequence[DifficultyLevel],
+    opponent_depths: Sequence[int],
+    *,
+    games: int,
+    opening_plies: int,
+    seed: int,
+) -> list[PairingResult]:
+    rng = random.Random(seed)
+    results = []
+    for level in levels:
+        for depth in opponent_depths:
+            result = PairingResult(level.value, depth)
+            for game in range(games):
+                preset_color = YELLOW if game % 2 == 0 else RED
+                preset_side = preset_picker(level, rng)
+                opponent_side = depth_picker(depth)
+                if preset_color == YELLOW:
+                    yellow, red = preset_side, opponent_side
+                    costs = {YELLOW: result.preset_cost, RED: result.opponent_cost}
+                else:
+                    yellow, red = opponent_side, preset_side
+                    costs = {YELLOW: result.opponent_cost, RED: result.preset_cost}
+                winner = play_game(
+                    yellow, red, rng=rng, opening_plies=opening_plies, costs=costs
+                )
+                if winner is None:
+                    result.draws += 1
+                elif winner == preset_color:
+                    result.wins += 1
+                else:
+                    result.losses += 1
+            results.append(result)
+    return results
+
+
+def _format_table(results: Sequence[PairingResult]) -> str:
+    header = (
+        f"{'preset':<11}{'vs depth':>9}{'W/D/L':>10}{'score':>7}"
+        f"{'mean ms':>9}{'p95 ms':>9}{'max ms':>9}{'nodes':>10}"
+        f"{'opp mean ms':>13}{'opp nodes':>11}"
+    )
+    lines = [header, "-" * len(header)]
+    for result in results:
+        mine = result.preset_cost.summary()
+        theirs = result.opponent_cost.summary()
+        lines.append(
+            f"{result.preset:<11}{result.opponent_depth:>9}"
+            f"{f'{result.wins}/{result.draws}/{result.losses}':>10}"
+            f"{result.score:>7.2f}"
+            f"{mine.get('meanMs', 0):>9.1f}{mine.get('p95Ms', 0):>9.1f}"
+            f"{mine.get('maxMs', 0):>9.1f}{mine.get('meanNodes', 0):>10.0f}"
+            f"{theirs.get('meanMs', 0):>13.1f}{theirs.get('meanNodes', 0):>11.0f}"
+        )
+    return "\n".join(lines)
+
+
+def _parse_levels(value: str) -> list[DifficultyLevel]:
+    return [DifficultyLevel(name.strip()) for name in value.split(",") if name.strip()]
+
+
+def _parse_depths(value: str) -> list[int]:
+    return [int(depth) for depth in value.split(",") if depth.strip()]
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--presets",
+        type=_parse_levels,
+        default=list(DifficultyLevel),
+        help="Comma-separated difficulty levels to calibrate (default: all).",
+    )
+    parser.add_argument(
+        "--opponents",
+        type=_parse_depths,
+        default=sorted(set(DIFFICULTY_DEPTH.values())),
+        help="Comma-separated fixed search depths to play against "
+        "(default: the depths of the existing levels; depth 9 is slow).",
+    )
+    parser.add_argument("--games", type=int, default=4, help="Games per pairing.")
+    parser.add_argument(
+        "--opening-plies",
+        type=int,
+        default=2,
+        help="Random moves played before the engines take over.",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--no-eval",
+        action="store_true",
+        help="Calibrate the presets without the learned evaluator.",
+    )
+    parser.add_argument("--json", action="store_true", help="Print JSON results.")
+    args = parser.parse_args(argv)
+
+    if args.no_eval:
+        install_evaluator(None)
+    else:
+        load_default_evaluator()
+
+    results = calibrate(
+        args.presets,
+        args.opponents,
+        games=args.games,
+        opening_plies=args.opening_plies,
+        seed=args.seed,
+    )
+    if args.json:
+        print(json.dumps([result.to_dict() for result in results], indent=2))
+    else:
+        print(_format_table(results))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,13 +3,8 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import Iterator, List, Sequence
-
-BOARD_WIDTH = 7
-BOARD_HEIGHT = 6
-BOARD_STRIDE = BOARD_HEIGHT + 1
-
-BOARD_CAPACITY = BOARD_WIDTH * BOARD_HEIGHT
+from functools import cache
+from typing import Iterable, Iterator, List, Sequence
 
 Color = int
 YELLOW: Color = 0
@@ -17,19 +12,84 @@ RED: Color = 1
 
 COLOR_NAMES: Sequence[str] = ("yellow", "red")
 
-COLUMN_BOTTOM_MASK = tuple(
-    1 << (column * BOARD_STRIDE) for column in range(BOARD_WIDTH)
-)
-COLUMN_TOP_MASK = tuple(
-    1 << (column * BOARD_STRIDE + BOARD_HEIGHT) for column in range(BOARD_WIDTH)
-)
-COLUMN_TOP_SLOT_MASK = tuple(
-    1 << (column * BOARD_STRIDE + BOARD_HEIGHT - 1) for column in range(BOARD_WIDTH)
-)
-COLUMN_MASK = tuple(
-    ((1 << BOARD_STRIDE) - 1) << (column * BOARD_STRIDE)
-    for column in range(BOARD_WIDTH)
-)
+# Move strings use one digit per move, which caps the width; four in a row
+# needs at least four cells either way.
+MIN_BOARD_SIZE = 4
+MAX_BOARD_WIDTH = 9
+MAX_BOARD_HEIGHT = 16
+
+
+@dataclass(frozen=True, slots=True)
+class BoardGeometry:
+    """Board dimensions and every bit mask derived from them.
+
+    Columns are laid out one after another, each ``height`` cells tall plus a
+    sentinel bit on top (``stride = height + 1``) so shifted bitboards never
+    bleed from one column into the next. Instances are shared per size via
+    :meth:`of`, so states of the same size point at one set of tables.
+    """
+
+    width: int
+    height: int
+    stride: int
+    capacity: int
+    column_bottom: tuple[int, ...]
+    column_top: tuple[int, ...]
+    column_top_slot: tuple[int, ...]
+    column_mask: tuple[int, ...]
+    bottom_mask: int
+    board_mask: int
+    directions: tuple[int, ...]
+    columns: tuple[int, ...]
+
+    @classmethod
+    @cache
+    def of(cls, width: int, height: int) -> "BoardGeometry":
+        if not MIN_BOARD_SIZE <= width <= MAX_BOARD_WIDTH:
+            raise ValueError(
+                f"Board width must be in [{MIN_BOARD_SIZE}, {MAX_BOARD_WIDTH}],"
+                f" got {width}"
+            )
+        if not MIN_BOARD_SIZE <= height <= MAX_BOARD_HEIGHT:
+            raise ValueError(
+                f"Board height must be in [{MIN_BOARD_SIZE}, {MAX_BOARD_HEIGHT}],"
+                f" got {height}"
+            )
+        stride = height + 1
+        column_bottom = tuple(1 << (column * stride) for column in range(width))
+        column_mask = tuple(
+            ((1 << stride) - 1) << (column * stride) for column in range(width)
+        )
+        column_top = tuple(bottom << height for bottom in column_bottom)
+        return cls(
+            width=width,
+            height=height,
+            stride=stride,
+            capacity=width * height,
+            column_bottom=column_bottom,
+            column_top=column_top,
+            column_top_slot=tuple(top >> 1 for top in column_top),
+            column_mask=column_mask,
+            bottom_mask=sum(column_bottom),
+            board_mask=sum(column_mask) & ~sum(column_top),
+            # Vertical, horizontal and both diagonals.
+            directions=(1, stride, stride - 1, stride + 1),
+            columns=tuple(range(width)),
+        )
+
+
+STANDARD = BoardGeometry.of(7, 6)
+
+BOARD_WIDTH = STANDARD.width
+BOARD_HEIGHT = STANDARD.height
+BOARD_STRIDE = STANDARD.stride
+
+BOARD_CAPACITY = STANDARD.capacity
+
+COLUMN_BOTTOM_MASK = STANDARD.column_bottom
+COLUMN_TOP_MASK = STANDARD.column_top
+COLUMN_TOP_SLOT_MASK = STANDARD.column_top_slot
+COLUMN_MASK = STANDARD.column_mask
 
 
 class IllegalMoveError(ValueError):
@@ -61,46 +121,196 @@ class MoveResult:
 
 @dataclass(slots=True)
 class BitboardState:
-    """Mutable bitboard state for a Connect 4 match."""
+    """Mutable bitboard state for a Connect 4 match.
+
+    Every move is also recorded as one byte (its column) in a history stack,
+    which backs multi-level undo/redo, move-string serialisation and
+    reconstruction of earlier plies. ``geometry`` holds the board size and its
+    masks; it defaults to the standard 7x6 board.
+    """
 
     to_play: Color = YELLOW
     _boards: list[int] = field(default_factory=lambda: [0, 0])
     mask: int = 0
     move_count: int = 0
     _last_result: MoveResult | None = None
+    _history: bytearray = field(default_factory=bytearray)
+    _redo: bytearray = field(default_factory=bytearray)
+    version: int = 0
+    geometry: BoardGeometry = STANDARD
+
+    @classmethod
+    def from_moves(
+        cls,
+        moves: str | bytes | Iterable[int],
+        *,
+        starting_color: Color = YELLOW,
+        geometry: BoardGeometry = STANDARD,
+    ) -> "BitboardState":
+        """Replay ``moves`` (a move string or column sequence) from an empty board."""
+
+        state = cls(to_play=starting_color, geometry=geometry)
+        columns = (
+            parse_move_string(moves, geometry) if isinstance(moves, str) else moves
+        )
+        for column in columns:
+            state.drop(column)
+        return state
 
     def board(self, color: Color) -> int:
         return self._boards[color]
 
     @property
     def last_result(self) -> MoveResult | None:
+        # Undo leaves this unset so the search's undo stays cheap; rebuild the
+        # result of the move now on top of the history on demand.
+        if self._last_result is None and self._history:
+            column = self._history[-1]
+            mover = other_color(self.to_play)
+            geometry = self.geometry
+            winner = (
+                mover if has_connect_four(self._boards[mover], geometry) else None
+            )
+            self._last_result = MoveResult(
+                column=column,
+                bit=self._top_bit(column),
+                winner=winner,
+                draw=winner is None and self.move_count >= geometry.capacity,
+            )
         return self._last_result
 
+    @property
+    def starting_color(self) -> Color:
+        return self.to_play if self.move_count % 2 == 0 else other_color(self.to_play)
+
+    def copy(self) -> "BitboardState":
+        """Return an independent copy, e.g. for searching off the live board."""
+
+        return BitboardState(
+            to_play=self.to_play,
+            _boards=list(self._boards),
+            mask=self.mask,
+            move_count=self.move_count,
+            _last_result=self._last_result,
+            _history=bytearray(self._history),
+            _redo=bytearray(self._redo),
+            version=self.version,
+            geometry=self.geometry,
+        )
+
+    def reset(self, to_play: Color = YELLOW) -> None:
+        """Clear the board in place for a new match."""
+
+        self._boards[YELLOW] = 0
+        self._boards[RED] = 0
+        self.mask = 0
+        self.move_count = 0
+        self._last_result = None
+        self._history.clear()
+        self._redo.clear()
+        self.to_play = to_play
+        self.version += 1
+
+    def moves(self, since: int = 0) -> bytes:
+        """Return the columns played after the first ``since`` moves."""
+
+        return bytes(self._history[since:])
+
+    def move_string(self) -> str:
+        """Serialise the history in the conventional 1-based column notation."""
+
+        return format_move_string(self._history)
+
+    def at_ply(self, ply: int) -> "BitboardState":
+        """Return a new state holding the position after the first ``ply`` moves."""
+
+        if not 0 <= ply <= self.move_count:
+            raise ValueError(f"Ply must be in [0, {self.move_count}], got {ply}")
+        geometry = self.geometry
+        state = BitboardState(to_play=self.starting_color, geometry=geometry)
+        boards = state._boards
+        mask = 0
+        color = state.to_play
+        column_bottom = geometry.column_bottom
+        column_mask = geometry.column_mask
+        # Stones only ever stack, so replaying needs no win checks; the last
+        # result is derived lazily if anyone asks for it.
+        for column in self._history[:ply]:
+            move_bit = (mask + column_bottom[column]) & column_mask[column]
+            boards[color] |= move_bit
+            mask |= move_bit
+            color = other_color(color)
+        state.mask = mask
+        state.move_count = ply
+        state.to_play = color
+        state._history[:] = self._history[:ply]
+        return state
+
+    def undo(self, count: int = 1) -> bytes:
+        """Take back ``count`` moves, keeping them available to :meth:`redo`."""
+
+        if count > len(self._history):
+            raise RuntimeError(
+                f"Cannot undo {count} moves; only {len(self._history)} played"
+            )
+        undone = self._history[len(self._history) - count :]
+        for _ in range(count):
+            self.undo_last_move()
+        self._redo.extend(reversed(undone))
+        return bytes(undone)
+
+    def redo(self, count: int = 1) -> list[MoveResult]:
+        """Replay ``count`` moves previously taken back with :meth:`undo`."""
+
+        if count > len(self._redo):
+            raise RuntimeError(
+                f"Cannot redo {count} moves; only {len(self._redo)} undone"
+            )
+        pending = self._redo[len(self._redo) - count :]
+        del self._redo[len(self._redo) - count :]
+        # ``drop`` discards the redo stack, so stash what remains around it.
+        remaining = bytes(self._redo)
+        self._redo.clear()
+        results = [self.drop(column) for column in reversed(pending)]
+        self._redo[:] = remaining
+        return results
+
     def playable_columns(self) -> Iterator[int]:
-        for column in range(BOARD_WIDTH):
-            if not self.mask & COLUMN_TOP_SLOT_MASK[column]:
+        mask = self.mask
+        top_slot = self.geometry.column_top_slot
+        for column in self.geometry.columns:
+            if not mask & top_slot[column]:
                 yield column
 
     def is_column_playable(self, column: int) -> bool:
         self._validate_column(column)
-        return not self.mask & COLUMN_TOP_SLOT_MASK[column]
+        return not self.mask & self.geometry.column_top_slot[column]
 
     def drop(self, column: int) -> MoveResult:
-        self._validate_column(column)
-        if self.mask & COLUMN_TOP_SLOT_MASK[column]:
+        geometry = self.geometry
+        if not 0 <= column < geometry.width:
+            self._validate_column(column)
+        if self.mask & geometry.column_top_slot[column]:
             raise ColumnFullError(f"Column {column} is full")
 
-        move_bit = (self.mask + COLUMN_BOTTOM_MASK[column]) & COLUMN_MASK[column]
-        if move_bit == 0 or move_bit & COLUMN_TOP_MASK[column]:
+        column_mask = geometry.column_mask[column]
+        move_bit = (self.mask + geometry.column_bottom[column]) & column_mask
+        if move_bit == 0 or move_bit & geometry.column_top[column]:
             raise ColumnFullError(f"Column {column} is full")
 
         current_board = self._boards[self.to_play] | move_bit
         self._boards[self.to_play] = current_board
         self.mask |= move_bit
         self.move_count += 1
+        self._history.append(column)
+        if self._redo:
+            self._redo.clear()
+        self.version += 1
 
-        winner: Color | None = self.to_play if has_connect_four(current_board) else None
-        draw = winner is None and self.move_count >= BOARD_CAPACITY
+        winner: Color | None = (
+            self.to_play if has_connect_four(current_board, geometry) else None
+        )
+        draw = winner is None and self.move_count >= geometry.capacity
 
         result = MoveResult(column=column, bit=move_bit, winner=winner, draw=draw)
         self._last_result = result
@@ -109,31 +319,37 @@ class BitboardState:
         return result
 
     def undo_last_move(self) -> None:
-        last = self._last_result
-        if last is None:
+        if not self._history:
             raise RuntimeError("No moves to undo")
 
+        bit = self._top_bit(self._history.pop())
         self.to_play = other_color(self.to_play)
-        self._boards[self.to_play] &= ~last.bit
-        self.mask &= ~last.bit
+        self._boards[self.to_play] &= ~bit
+        self.mask &= ~bit
         self.move_count -= 1
+        self.version += 1
         self._last_result = None
 
+    def _top_bit(self, column: int) -> int:
+        geometry = self.geometry
+        stones = self.mask & geometry.column_mask[column]
+        return (stones + geometry.column_bottom[column]) >> 1
+
     def _validate_column(self, column: int) -> None:
-        if not 0 <= column < BOARD_WIDTH:
-            raise IllegalMoveError(
-                f"Column must be in [0, {BOARD_WIDTH - 1}], got {column}"
-            )
+        width = self.geometry.width
+        if not 0 <= column < width:
+            raise IllegalMoveError(f"Column must be in [0, {width - 1}], got {column}")
 
     def board_schetch(self) -> List[List[str]]:
         """Return a 2D list representation of the board for display purposes."""
 
+        geometry = self.geometry
         grid: List[List[str]] = [
-            ["." for _ in range(BOARD_WIDTH)] for _ in range(BOARD_HEIGHT)
+            ["." for _ in range(geometry.width)] for _ in range(geometry.height)
         ]
-        for column in range(BOARD_WIDTH):
-            for row in range(BOARD_HEIGHT):
-                bit = 1 << (column * BOARD_STRIDE + row)
+        for column in range(geometry.width):
+            for row in range(geometry.height):
+                bit = 1 << (column * geometry.stride + row)
                 if self._boards[YELLOW] & bit:
                     grid[row][column] = "Y"
                 elif self._boards[RED] & bit:
@@ -141,10 +357,27 @@ class BitboardState:
         return grid
 
 
-def has_connect_four(bitboard: int) -> bool:
+def format_move_string(columns: Iterable[int]) -> str:
+    """Render columns as a move string of 1-based column digits."""
+
+    return "".join(str(column + 1) for column in columns)
+
+
+def parse_move_string(moves: str, geometry: BoardGeometry = STANDARD) -> bytes:
+    """Parse a move string of 1-based column digits into 0-based columns."""
+
+    columns = bytearray()
+    for char in moves:
+        if not char.isdigit() or not 1 <= int(char) <= geometry.width:
+            raise IllegalMoveError(f"Invalid move {char!r} in move string")
+        columns.append(int(char) - 1)
+    return bytes(columns)
+
+
+def has_connect_four(bitboard: int, geometry: BoardGeometry = STANDARD) -> bool:
     """Return True when the supplied bitboard contains a four-in-a-row."""
 
-    for shift in (1, BOARD_STRIDE, BOARD_STRIDE - 1, BOARD_STRIDE + 1):
+    for shift in geometry.directions:
         sequence = bitboard & (bitboard >> shift)
         if sequence & (sequence >> (2 * shift)):
             return True
@@ -157,6 +390,7 @@ __all__ = [
     "BOARD_HEIGHT",
     "BOARD_STRIDE",
     "BOARD_WIDTH",
+    "BoardGeometry",
     "COLUMN_MASK",
     "COLUMN_TOP_MASK",
     "COLUMN_TOP_SLOT_MASK",
@@ -166,7 +400,10 @@ __all__ = [
     "IllegalMoveError",
     "MoveResult",
     "RED",
+    "STANDARD",
     "YELLOW",
+    "format_move_string",
     "has_connect_four",
     "other_color",
+    "parse_move_string",
 ]
@@ -0,0 +1,349 @@
+"""Per-session worker task that owns a game's state transitions."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict
+
+from .datamodel import COLOR_NAMES, ColumnFullError, IllegalMoveError
+from .game import Connect4Game, TurnOutcome, calculate_next_move
+from .search_trace import start_search_trace
+from .sessions import GameMode, GameSession, SessionRegistryEntry, reset_session
+
+logger = logging.getLogger(__name__)
+
+ENGINE_PLAYER_ID = "__engine__"
+
+
+@dataclass(slots=True)
+class PlayerMove:
+    """A move received from a player's websocket."""
+
+    player_id: str
+    column: int
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass(slots=True)
+class AiTurn:
+    """Request for the engine to play the AI's move."""
+
+
+@dataclass(slots=True)
+class Rematch:
+    """Reset the board for a new match."""
+
+    initiator: str | None
+    done: asyncio.Future[None]
+
+
+EngineCommand = PlayerMove | AiTurn | Rematch
+
+
+class EngineStoppedError(Exception):
+    """Raised for commands the engine stopped before processing."""
+
+    def __init__(self, game_id: str) -> None:
+        super().__init__(f"Game {game_id!r} is closing")
+        self.game_id = game_id
+
+
+class SessionEngine:
+    """Serialises every state transition of one game through an inbox queue.
+
+    Websocket receive loops only enqueue commands, so they keep draining frames
+    while the engine task is busy. AI searches run on a copy of the board in a
+    worker thread, leaving the event loop free for other sessions.
+    """
+
+    def __init__(self, game_id: str, entry: SessionRegistryEntry) -> None:
+        self.game_id = game_id
+        self.entry = entry
+        self.session: GameSession = entry.session
+        self.game = Connect4Game(mode=entry.mode, state=entry.board_state)
+        # Sessions restored from a snapshot start with moves already played.
+        self.game.turn_index = entry.board_state.move_count
+        self._inbox: asyncio.Queue[EngineCommand] = asyncio.Queue()
+        self._task: asyncio.Task[None] | None = None
+        self._ai_pending = False
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if not self.running:
+            self._task = asyncio.create_task(
+                self._run(), name=f"connect4-engine-{self.game_id}"
+            )
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is None:
+            return
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+        # Commands still queued will never run; fail any rematch waiting on
+        # one so its caller does not hang.
+        while not self._inbox.empty():
+            command = self._inbox.get_nowait()
+            if isinstance(command, Rematch) and not command.done.done():
+                command.done.set_exception(EngineStoppedError(self.game_id))
+
+    def submit_move(
+        self, player_id: str, column: int, extra: Dict[str, Any] | None = None
+    ) -> None:
+        self._inbox.put_nowait(PlayerMove(player_id, column, extra or {}))
+
+    def schedule_ai_turn(self) -> None:
+        """Queue an AI turn unless one is already pending or not needed."""
+
+        if self._ai_pending or not self._ai_to_move():
+            return
+        self._ai_pending = True
+        self._inbox.put_nowait(AiTurn())
+
+    async def rematch(self, initiator: str | None = None) -> None:
+        done: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        command = Rematch(initiator, done)
+        if not self.running:
+            # Nobody is connected, so nothing else is changing the board and
+            # a task started now would have no socket to stop it later.
+            await self._rematch(command)
+            return
+        self._inbox.put_nowait(command)
+        await done
+
+    async def _run(self) -> None:
+        while True:
+            command = await self._inbox.get()
+            try:
+                if isinstance(command, PlayerMove):
+                    await self._play_move(command)
+                elif isinstance(command, AiTurn):
+                    self._ai_pending = False
+                    await self._play_ai_turn()
+                else:
+                    await self._rematch(command)
+            except asyncio.CancelledError:
+                if isinstance(command, Rematch) and not command.done.done():
+                    command.done.set_exception(EngineStoppedError(self.game_id))
+                raise
+            except Exception as exc:
+                logger.exception(
+                    "Engine failed to process %s in game %s", command, self.game_id
+                )
+                if isinstance(command, Rematch) and not command.done.done():
+                    command.done.set_exception(exc)
+
+    async def _play_move(self, move: PlayerMove) -> None:
+        player_color = await self.session.color_for(move.player_id)
+        if player_color is not None and player_color != self.game.state.to_play:
+            await self._send_error(move.player_id, "Not your turn")
+            return
+
+        try:
+            outcome = self.game.play_turn(move.column)
+        except (IllegalMoveError, ColumnFullError) as exc:
+            await self._send_error(move.player_id, str(exc))
+            return
+
+        extra = dict(move.extra)
+        message_type = extra.pop("type", "move")
+        payload = build_move_payload(
+            game_id=self.game_id,
+            player_id=move.player_id,
+            message_type=message_type,
+            outcome=outcome,
+            turn_index=self.game.state.move_count,
+            extra=extra,
+        )
+        await self.session.broadcast(
+            payload, sender_id=move.player_id, include_sender=True
+        )
+        self.schedule_ai_turn()
+
+    async def _play_ai_turn(self) -> None:
+        if not self._ai_to_move():
+            return
+
+        state = self.game.state
+        playable = list(state.playable_columns())
+        logger.debug(
+            "AI evaluating turn: game=%s to_play=%s depth=%d playable=%s",
+            self.game_id,
+            COLOR_NAMES[state.to_play],
+            self.entry.ai_depth,
+            playable,
+        )
+
+        try:
+            preferred = await asyncio.to_thread(
+                calculate_next_move,
+                state.copy(),
+                preset=self.entry.preset,
+                trace=start_search_trace(self.game_id),
+            )
+        except ColumnFullError:
+            preferred = None
+
+        if preferred in playable:
+            playable.remove(preferred)
+            playable.insert(0, preferred)
+        elif preferred is not None:
+            logger.warning(
+                "AI suggested non-playable column %s in game %s",
+                preferred,
+                self.game_id,
+            )
+
+        outcome: TurnOutcome | None = None
+        for column in playable:
+            try:
+                outcome = self.game.play_turn(column)
+            except ColumnFullError:
+                logger.warning(
+                    "AI caught column %s as full in game %s; retrying",
+                    column,
+                    self.game_id,
+                )
+                continue
+            break
+
+        if outcome is None:
+            return
+
+        payload = build_move_payload(
+            game_id=self.game_id,
+            player_id=ENGINE_PLAYER_ID,
+            message_type="ai_move",
+            outcome=outcome,
+            turn_index=state.move_count,
+        )
+        await self.session.broadcast(payload, sender_id=None, include_sender=True)
+
+    async def _rematch(self, command: Rematch) -> None:
+        await reset_session(self.game_id)
+        self.game.turn_index = 0
+
+        rematch_payload: Dict[str, Any] = {
+            "type": "rematch",
+            "gameId": self.game_id,
+            "startingColor": COLOR_NAMES[self.game.state.to_play],
+        }
+        if command.initiator:
+            rematch_payload["initiatedBy"] = command.initiator
+
+        await self.session.broadcast(
+            rematch_payload, sender_id=None, include_sender=True
+        )
+        await broadcast_session_state(self.game_id, self.session, self.game)
+        if not command.done.done():
+            command.done.set_result(None)
+        self.schedule_ai_turn()
+
+    def _ai_to_move(self) -> bool:
+        game = self.game
+        return (
+            self.entry.mode is GameMode.SOLO
+            and not game.is_over()
+            and game.ai_color is not None
+            and game.state.to_play == game.ai_color
+        )
+
+    async def _send_error(self, player_id: str, detail: str) -> None:
+        await self.session.send_to(
+            player_id,
+            {
+                "type": "error",
+                "gameId": self.game_id,
+                "playerId": player_id,
+                "detail": detail,
+            },
+        )
+
+
+def session_engine(game_id: str, entry: SessionRegistryEntry) -> SessionEngine:
+    """Return the engine for ``entry`` without starting its task."""
+
+    engine = entry.engine
+    if engine is None:
+        engine = SessionEngine(game_id, entry)
+        entry.engine = engine
+    return engine
+
+
+def ensure_engine(game_id: str, entry: SessionRegistryEntry) -> SessionEngine:
+    """Return the running engine for ``entry``, starting it on first use."""
+
+    engine = session_engine(game_id, entry)
+    engine.start()
+    return engine
+
+
+def build_move_payload(
+    *,
+    game_id: str,
+    player_id: str,
+    message_type: str,
+    outcome: TurnOutcome,
+    turn_index: int | None = None,
+    extra: Dict[str, Any] | None = None,
+) -> Dict[str, Any]:
+    payload: Dict[str, Any] = {
+        "type": message_type,
+        "gameId": game_id,
+        "playerId": player_id,
+        "column": outcome.result.column,
+        "color": outcome.player,
+        "colorName": outcome.player_name,
+        "turnIndex": turn_index if turn_index is not None else outcome.turn_index,
+        "bit": outcome.result.bit,
+        "winner": outcome.result.winner,
+        "draw": outcome.result.draw,
+    }
+
+    if outcome.result.winner is not None:
+        payload["winnerName"] = COLOR_NAMES[outcome.result.winner]
+
+    if extra:
+        payload.update(extra)
+
+    return payload
+
+
+async def broadcast_session_state(
+    game_id: str, session: GameSession, game: Connect4Game
+) -> None:
+    payload = await build_session_state_payload(game_id, session, game)
+    await session.broadcast(payload, sender_id=None, include_sender=True)
+
+
+async def build_session_state_payload(
+    game_id: str, session: GameSession, game: Connect4Game
+) -> Dict[str, Any]:
+    players = await session.player_ids()
+    player_colors = await session.players_with_colors()
+    return {
+        "type": "session_state",
+        "gameId": game_id,
+        "players": players,
+        "colors": {pid: COLOR_NAMES[color] for pid, color in player_colors.items()},
+        "currentTurn": COLOR_NAMES[game.state.to_play],
+    }
+
+
+__all__ = [
+    "ENGINE_PLAYER_ID",
+    "EngineStoppedError",
+    "SessionEngine",
+    "broadcast_session_state",
+    "build_move_payload",
+    "build_session_state_payload",
+    "ensure_engine",
+    "session_engine",
+]
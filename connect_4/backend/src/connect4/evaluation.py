@@ -0,0 +1,247 @@
+"""Learned static evaluation for positions cut off by the search depth.
+
+The evaluator is linear over a handful of pattern features, all computed with
+bitboard arithmetic rather than by scanning cells, for any board geometry:
+
+* open windows (four aligned cells holding no opposing stone) containing one,
+  two or three of a player's stones;
+* threat cells (empty cells that would complete four), split by row parity
+  since odd-row threats favour the first player and even-row threats the
+  second;
+* threats that are playable right now;
+* stones in the centre column;
+* whose turn it is.
+
+Every feature is taken as yellow's count minus red's, so a positive score
+favours yellow like the rest of the search. Weights come from
+``python -m connect4.training`` and are stored as a small ``.npz`` file. The
+search scores one position at a time, where an eight-term dot product in
+plain Python beats the per-call overhead of NumPy; :meth:`LinearEvaluator.evaluate_batch`
+is the vectorised form used for training.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import os
+from pathlib import Path
+
+import numpy as np
+
+from .datamodel import RED, STANDARD, YELLOW, BitboardState, BoardGeometry
+
+logger = logging.getLogger(__name__)
+
+FEATURE_NAMES: tuple[str, ...] = (
+    "open_one",
+    "open_two",
+    "open_three",
+    "odd_threats",
+    "even_threats",
+    "playable_threats",
+    "centre",
+    "tempo",
+)
+
+# Scores stay strictly inside the (-1, 1) range used for decided games, so a
+# forced win found by the search always beats a good-looking evaluation.
+SCORE_SCALE = 0.9
+
+DEFAULT_WEIGHTS_PATH = Path(__file__).with_name("eval_weights.npz")
+
+
+class _PatternTables:
+    """Masks the feature extraction needs for one board geometry."""
+
+    __slots__ = ("window_steps", "threat_steps", "bottom", "board", "centre", "odd_rows")
+
+    def __init__(self, geometry: BoardGeometry) -> None:
+        stride = geometry.stride
+        self.bottom = geometry.bottom_mask
+        self.board = geometry.board_mask
+        self.centre = geometry.column_mask[geometry.width // 2] & self.board
+        # Rows 1, 3, 5, ... counted from the bottom (0-based rows 0, 2, 4, ...).
+        self.odd_rows = sum(self.bottom << row for row in range(0, geometry.height, 2))
+        # Horizontal, vertical and both diagonals, each with the cells a
+        # window of four may start from.
+        self.window_steps = tuple(
+            (step, self._window_starts(geometry, step))
+            for step in (stride, 1, stride + 1, stride - 1)
+        )
+        self.threat_steps = (stride, stride + 1, stride - 1)
+
+    def _window_starts(self, geometry: BoardGeometry, step: int) -> int:
+        starts = 0
+        for column in range(geometry.width):
+            for row in range(geometry.height):
+                start = column * geometry.stride + row
+                cells = [start + offset * step for offset in range(4)]
+                if all(self.board >> cell & 1 for cell in cells):
+                    starts |= 1 << start
+        return starts
+
+
+_STANDARD_TABLES = _PatternTables(STANDARD)
+_tables: dict[BoardGeometry, _PatternTables] = {STANDARD: _STANDARD_TABLES}
+
+
+def _tables_for(geometry: BoardGeometry) -> _PatternTables:
+    tables = _tables.get(geometry)
+    if tables is None:
+        tables = _tables[geometry] = _PatternTables(geometry)
+    return tables
+
+
+def _open_window_counts(
+    own: int, other: int, tables: _PatternTables = _STANDARD_TABLES
+) -> tuple[int, int, int]:
+    """Open windows holding exactly one, two and three of ``own``'s stones."""
+
+    one = two = three = 0
+    for step, starts in tables.window_steps:
+        step2 = step + step
+        step3 = step2 + step
+        open_starts = starts & ~(
+            other | other >> step | other >> step2 | other >> step3
+        )
+        if not open_starts:
+            continue
+        # Bit-sliced sum of the four cells of every window at once.
+        a, b, c, d = own, own >> step, own >> step2, own >> step3
+        ab_sum, ab_carry = a ^ b, a & b
+        cd_sum, cd_carry = c ^ d, c & d
+        ones = ab_sum ^ cd_sum
+        carry = ab_sum & cd_sum
+        twos = ab_carry ^ cd_carry ^ carry
+        fours = (ab_carry & cd_carry) | (carry & (ab_carry ^ cd_carry))
+        not_four = open_starts & ~fours
+        one += (not_four & ones & ~twos).bit_count()
+        two += (not_four & twos & ~ones).bit_count()
+        three += (not_four & ones & twos).bit_count()
+    return one, two, three
+
+
+def _threat_cells(
+    own: int, mask: int, tables: _PatternTables = _STANDARD_TABLES
+) -> int:
+    """Empty cells that would complete four for ``own``."""
+
+    cells = (own << 1) & (own << 2) & (own << 3)
+    for step in tables.threat_steps:
+        pair = (own << step) & (own << 2 * step)
+        cells |= pair & (own << 3 * step)
+        cells |= pair & (own >> step)
+        pair = (own >> step) & (own >> 2 * step)
+        cells |= pair & (own << step)
+        cells |= pair & (own >> 3 * step)
+    return cells & (tables.board ^ mask)
+
+
+def pattern_features(state: BitboardState) -> tuple[int, ...]:
+    """Feature vector of ``state`` in :data:`FEATURE_NAMES` order."""
+
+    geometry = state.geometry
+    tables = _STANDARD_TABLES if geometry is STANDARD else _tables_for(geometry)
+    yellow = state.board(YELLOW)
+    red = state.board(RED)
+    mask = state.mask
+    playable = (mask + tables.bottom) & tables.board
+    odd_rows = tables.odd_rows
+    centre = tables.centre
+
+    y_one, y_two, y_three = _open_window_counts(yellow, red, tables)
+    r_one, r_two, r_three = _open_window_counts(red, yellow, tables)
+    y_threats = _threat_cells(yellow, mask, tables)
+    r_threats = _threat_cells(red, mask, tables)
+    return (
+        y_one - r_one,
+        y_two - r_two,
+        y_three - r_three,
+        (y_threats & odd_rows).bit_count() - (r_threats & odd_rows).bit_count(),
+        (y_threats & ~odd_rows).bit_count() - (r_threats & ~odd_rows).bit_count(),
+        (y_threats & playable).bit_count() - (r_threats & playable).bit_count(),
+        (yellow & centre).bit_count() - (red & centre).bit_count(),
+        1 if state.to_play == YELLOW else -1,
+    )
+
+
+class LinearEvaluator:
+    """``SCORE_SCALE * tanh(weights · features)`` from yellow's point of view."""
+
+    __slots__ = ("weights", "_weights")
+
+    def __init__(self, weights: np.ndarray) -> None:
+        weights = np.asarray(weights, dtype=np.float64)
+        if weights.shape != (len(FEATURE_NAMES),):
+            raise ValueError(
+                f"Expected {len(FEATURE_NAMES)} weights, got shape {weights.shape}"
+            )
+        self.weights = weights
+        self._weights = tuple(float(weight) for weight in weights)
+
+    def __call__(self, state: BitboardState) -> float:
+        total = 0.0
+        for weight, feature in zip(self._weights, pattern_features(state)):
+            total += weight * feature
+        return SCORE_SCALE * math.tanh(total)
+
+    def evaluate_batch(self, features: np.ndarray) -> np.ndarray:
+        """Scores for a ``(positions, features)`` matrix."""
+
+        return SCORE_SCALE * np.tanh(features @ self.weights)
+
+    @classmethod
+    def load(cls, path: Path) -> "LinearEvaluator":
+        with np.load(path) as data:
+            names = tuple(str(name) for name in data["features"])
+            if names != FEATURE_NAMES:
+                raise ValueError(f"Weights in {path} are for features {names}")
+            return cls(data["weights"])
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("wb") as handle:
+            np.savez(handle, weights=self.weights, features=np.array(FEATURE_NAMES))
+
+
+_active: LinearEvaluator | None = None
+
+
+def active_evaluator() -> LinearEvaluator | None:
+    """The evaluator used by difficulty presets, if weights were loaded."""
+
+    return _active
+
+
+def install_evaluator(evaluator: LinearEvaluator | None) -> None:
+    global _active
+    _active = evaluator
+
+
+def load_default_evaluator() -> LinearEvaluator | None:
+    """Load weights from ``CONNECT4_EVAL_WEIGHTS`` or the bundled file.
+
+    Without readable weights the search falls back to scoring cut-off
+    positions as even.
+    """
+
+    path = Path(os.getenv("CONNECT4_EVAL_WEIGHTS", DEFAULT_WEIGHTS_PATH))
+    try:
+        evaluator = LinearEvaluator.load(path)
+    except (OSError, KeyError, ValueError) as exc:
+        logger.warning("No evaluation weights loaded from %s: %s", path, exc)
+        evaluator = None
+    install_evaluator(evaluator)
+    return evaluator
+
+
+__all__ = [
+    "DEFAULT_WEIGHTS_PATH",
+    "FEATURE_NAMES",
+    "LinearEvaluator",
+    "active_evaluator",
+    "install_evaluator",
+    "load_default_evaluator",
+    "pattern_features",
+]
@@ -3,9 +3,12 @@
 from __future__ import annotations
 
 import logging
-from dataclasses import dataclass
+import random
+import sys
+import time
+from dataclasses import dataclass, field
 from enum import Enum
-from typing import Iterator, Optional
+from typing import Callable, Iterator, Optional
 
 from .datamodel import (
     RED,
@@ -17,7 +20,21 @@ from .datamodel import (
     MoveResult,
     other_color,
 )
-from .sessions import GameMode
+from .evaluation import active_evaluator
+from .metrics import (
+    AI_MOVE_SECONDS,
+    AI_MOVES,
+    AI_NODES_SEARCHED,
+    AI_SEARCH_BUDGET_EXHAUSTED,
+)
+from .search_trace import SearchTrace
+from .sessions import DifficultyPreset, GameMode
+
+# Nodes between deadline checks; reading the clock on every node is too slow.
+_CLOCK_CHECK_INTERVAL = 1024
+_LEAF_LIMIT = 0.99
+
+Evaluator = Callable[[BitboardState], float]
 
 
 logger = logging.getLogger(__name__)
@@ -46,6 +63,52 @@ class TurnOutcome:
         return COLOR_NAMES[self.player]
 
 
+class SearchBudgetExceeded(Exception):
+    """Raised inside the search once its node or time budget is spent."""
+
+
+@dataclass(slots=True)
+class SearchStats:
+    """Counters and limits for searching a move.
+
+    The search compares ``nodes`` against ``next_check`` once per node; only
+    when that threshold is crossed does :meth:`check_budget` look at the node
+    limit and the clock.
+    """
+
+    nodes: int = 0
+    node_limit: int = sys.maxsize
+    deadline: float | None = None
+    eval_noise: float = 0.0
+    evaluator: Evaluator | None = None
+    rng: random.Random = field(default_factory=random.Random)
+    next_check: int = sys.maxsize
+
+    def __post_init__(self) -> None:
+        self._schedule_check()
+
+    def check_budget(self) -> None:
+        if self.nodes >= self.node_limit:
+            raise SearchBudgetExceeded()
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            raise SearchBudgetExceeded()
+        self._schedule_check()
+
+    def leaf_score(self, state: BitboardState) -> float:
+        """Score of a non-terminal position at the depth limit."""
+        score = self.evaluator(state) if self.evaluator is not None else 0.0
+        if self.eval_noise:
+            score += self.rng.uniform(-self.eval_noise, self.eval_noise)
+        # Never let a heuristic score look like a decided game.
+        return max(-_LEAF_LIMIT, min(_LEAF_LIMIT, score))
+
+    def _schedule_check(self) -> None:
+        if self.deadline is not None:
+            self.next_check = min(self.node_limit, self.nodes + _CLOCK_CHECK_INTERVAL)
+        else:
+            self.next_check = self.node_limit
+
+
 class Connect4Game:
     """Minimal turn-based loop built on top of ``BitboardState``."""
 
@@ -76,25 +139,21 @@ class Connect4Game:
 
     def play_turn(self, column: int) -> TurnOutcome:
         player = self.state.to_play
-        logger.debug(
-            "Turn %d: %s attempting column %d",
-            self.turn_index + 1,
-            COLOR_NAMES[player],
-            column,
-        )
         result = self.state.drop(column)
         self.turn_index += 1
-        board_snapshot = _format_board(self.state)
-        logger.debug(
-            "Turn %d result: column=%d winner=%s draw=%s next=%s move_count=%d board=%s",
-            self.turn_index,
-            column,
-            COLOR_NAMES[result.winner] if result.winner is not None else None,
-            result.draw,
-            COLOR_NAMES[self.state.to_play],
-            self.state.move_count,
-            board_snapshot,
-        )
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Turn %d: %s played column=%d winner=%s draw=%s next=%s"
+                " move_count=%d board=%s",
+                self.turn_index,
+                COLOR_NAMES[player],
+                column,
+                COLOR_NAMES[result.winner] if result.winner is not None else None,
+                result.draw,
+                COLOR_NAMES[self.state.to_play],
+                self.state.move_count,
+                _format_board(self.state),
+            )
         return TurnOutcome(
             player=player,
             result=result,
@@ -125,17 +184,17 @@ class Connect4Game:
         return TurnRole.AI
 
 
-def minimax_move(state: BitboardState, depth: int) -> tuple[Optional[int], float]:
+def minimax_move(
+    state: BitboardState,
+    depth: int,
+    stats: SearchStats | None = None,
+    trace: SearchTrace | None = None,
+) -> tuple[Optional[int], float]:
     """Evaluate the board state using a minimax algorithm with alpha/beta pruning to a given depth."""
+    if stats is None:
+        stats = SearchStats()
     playable = tuple(state.playable_columns())
-    logger.debug(
-        "minimax_move entry: depth=%d to_play=%s playable=%s",
-        depth,
-        COLOR_NAMES[state.to_play],
-        playable,
-    )
     if not playable:
-        logger.debug("minimax_move: board full -> draw")
         return None, 0.0
 
     maximizing = state.to_play == YELLOW
@@ -146,119 +205,198 @@ def minimax_move(state: BitboardState, depth: int) -> tuple[Optional[int], float
 
     for column in playable:
         result = state.drop(column)
-        score = _terminal_score(result)
-        if score is None:
-            if depth <= 1:
-                score = 0.0
-            else:
-                score = _minimax_score(state, depth - 1, alpha, beta)
-        logger.debug(
-            "minimax_move: depth=%d column=%d result=(winner=%s draw=%s) score=%.3f",
-            depth,
-            column,
-            COLOR_NAMES[result.winner] if result.winner is not None else None,
-            result.draw,
-            score,
-        )
-        state._last_result = result  # restore for undo
-        state.undo_last_move()
+        stats.nodes += 1
+        if trace is not None:
+            trace.enter(column, depth)
+        try:
+            if stats.nodes >= stats.next_check:
+                stats.check_budget()
+            score = _terminal_score(result)
+            if score is None:
+                if depth <= 1:
+                    score = stats.leaf_score(state)
+                else:
+                    score = _minimax_score(
+                        state, depth - 1, alpha, beta, stats, trace
+                    )
+        except SearchBudgetExceeded:
+            if trace is not None:
+                trace.cut_off()
+            raise
+        finally:
+            state.undo_last_move()
 
-        updated = False
         if maximizing:
             if score > best_score or best_move is None:
                 best_score = score
                 best_move = column
-                updated = True
             alpha = max(alpha, best_score)
         else:
             if score < best_score or best_move is None:
                 best_score = score
                 best_move = column
-                updated = True
             beta = min(beta, best_score)
 
-        if updated:
-            logger.debug(
-                "minimax_move: new best column=%d score=%.3f alpha=%.3f beta=%.3f",
-                best_move,
-                best_score,
-                alpha,
-                beta,
-            )
-
+        if trace is not None:
+            trace.exit(score, alpha, beta)
         if beta <= alpha:
-            logger.debug(
-                "minimax_move: prune at column=%d depth=%d alpha=%.3f beta=%.3f",
-                column,
-                depth,
-                alpha,
-                beta,
-            )
             break
 
-    logger.debug(
-        "minimax_move: selected column=%s score=%.3f",
-        best_move,
-        best_score,
-    )
     return best_move, best_score
 
 
-def calculate_next_move(state: BitboardState, *, depth: int = 6) -> int:
-    """Determine best move for the current player given the board state."""
+def calculate_next_move(
+    state: BitboardState,
+    *,
+    depth: int = 6,
+    preset: DifficultyPreset | None = None,
+    trace: SearchTrace | None = None,
+    rng: random.Random | None = None,
+    evaluator: Evaluator | None = None,
+) -> int:
+    """Determine best move for the current player given the board state.
+
+    Without a ``preset`` this is a plain search to ``depth``. With one, the
+    search deepens one ply at a time up to ``preset.max_depth`` and returns the
+    move from the deepest iteration that finished within the preset's node and
+    time budgets, scoring cut-off positions with ``evaluator`` (by default the
+    learned evaluator loaded at startup, see :mod:`connect4.evaluation`).
+    Pass a ``trace`` (see :mod:`connect4.search_trace`) to record
+    the search tree.
+    """
     playable = tuple(state.playable_columns())
     if not playable:
         raise ColumnFullError("Board is full")
 
+    if preset is not None:
+        depth = preset.max_depth
+
+    AI_MOVES.inc()
+    if trace is not None:
+        trace.begin(
+            depth=depth,
+            toPlay=COLOR_NAMES[state.to_play],
+            moveCount=state.move_count,
+            playable=list(playable),
+        )
+
     if state.move_count == 0:
-        logger.debug("calculate_next_move: opening move -> center column")
-        return 3  # Always play center column if first move
+        centre = state.geometry.width // 2
+        if trace is not None:
+            trace.finish(bestMove=centre, score=None, nodes=0)
+        return centre  # Always play center column if first move
 
-    best_move, score = minimax_move(state, depth)
+    stats = SearchStats(rng=rng or random.Random())
+    best_move: Optional[int] = None
+    score = 0.0
+    completed_depth = 0
+    started = time.perf_counter()
+    try:
+        with AI_MOVE_SECONDS.time():
+            if preset is None:
+                best_move, score = minimax_move(state, depth, stats, trace)
+                completed_depth = depth
+            else:
+                stats.eval_noise = preset.eval_noise
+                stats.evaluator = evaluator or active_evaluator()
+                best_move, score, completed_depth = _deepen(
+                    state, preset, stats, trace, started
+                )
+    finally:
+        AI_NODES_SEARCHED.inc(stats.nodes)
+
+    if trace is not None:
+        trace.finish(
+            bestMove=best_move,
+            score=score,
+            nodes=stats.nodes,
+            completedDepth=completed_depth,
+        )
     logger.debug(
-        "calculate_next_move: depth=%d best_move=%s score=%.3f playable=%s",
+        "calculate_next_move: depth=%d/%d best_move=%s score=%.3f nodes=%d",
+        completed_depth,
         depth,
         best_move,
         score,
-        playable,
+        stats.nodes,
     )
     if best_move is not None:
         return best_move
-    logger.debug(
-        "calculate_next_move: fallback to first playable column=%d",
-        playable[0],
-    )
     return playable[0]  # Fallback to first available column
 
 
-__all__ = ["Connect4Game", "TurnOutcome", "TurnRole"]
+def _deepen(
+    state: BitboardState,
+    preset: DifficultyPreset,
+    stats: SearchStats,
+    trace: SearchTrace | None,
+    started: float,
+) -> tuple[Optional[int], float, int]:
+    # The first ply always completes so there is a move to fall back on; the
+    # budgets apply from the second iteration onwards.
+    best_move, score = minimax_move(state, 1, stats, trace)
+    completed = 1
+    stats.node_limit = max(preset.node_budget, stats.nodes + 1)
+    stats.deadline = started + preset.time_budget
+    stats._schedule_check()
+    for depth in range(2, preset.max_depth + 1):
+        if abs(score) >= 1.0:
+            break  # a forced result is already in sight
+        try:
+            move, depth_score = minimax_move(state, depth, stats, trace)
+        except SearchBudgetExceeded:
+            AI_SEARCH_BUDGET_EXHAUSTED.inc()
+            break
+        if move is not None:
+            best_move, score = move, depth_score
+        completed = depth
+    return best_move, score, completed
+
+
+__all__ = [
+    "Connect4Game",
+    "SearchBudgetExceeded",
+    "SearchStats",
+    "TurnOutcome",
+    "TurnRole",
+]
 
 
 def _minimax_score(
-    state: BitboardState, depth: int, alpha: float, beta: float
+    state: BitboardState,
+    depth: int,
+    alpha: float,
+    beta: float,
+    stats: SearchStats,
+    trace: SearchTrace | None,
 ) -> float:
     playable = tuple(state.playable_columns())
     maximizing = state.to_play == YELLOW
 
     if not playable:
-        logger.debug("_minimax_score: depth=%d no playable columns -> draw", depth)
         return 0.0
     if depth == 0:
-        logger.debug(
-            "_minimax_score: depth=0 heuristic fallback for player=%s",
-            COLOR_NAMES[state.to_play],
-        )
-        return 0.0
+        return stats.leaf_score(state)
 
     best_score = float("-inf") if maximizing else float("inf")
 
     for column in playable:
         result = state.drop(column)
-        score = _terminal_score(result)
-        if score is None:
-            score = _minimax_score(state, depth - 1, alpha, beta)
-        state._last_result = result  # restore for undo
-        state.undo_last_move()
+        stats.nodes += 1
+        if trace is not None:
+            trace.enter(column, depth)
+        try:
+            if stats.nodes >= stats.next_check:
+                stats.check_budget()
+            score = _terminal_score(result)
+            if score is None:
+                score = _minimax_score(state, depth - 1, alpha, beta, stats, trace)
+        except SearchBudgetExceeded:
+            if trace is not None:
+                trace.cut_off()
+            raise
+        finally:
+            state.undo_last_move()
 
         if maximizing:
             best_score = max(best_score, score)
@@ -267,23 +405,9 @@ def _minimax_score(
             best_score = min(best_score, score)
             beta = min(beta, best_score)
 
-        logger.debug(
-            "_minimax_score: depth=%d column=%d score=%.3f alpha=%.3f beta=%.3f",
-            depth,
-            column,
-            score,
-            alpha,
-            beta,
-        )
-
+        if trace is not None:
+            trace.exit(score, alpha, beta)
         if beta <= alpha:
-            logger.debug(
-                "_minimax_score: prune at depth=%d column=%d alpha=%.3f beta=%.3f",
-                depth,
-                column,
-                alpha,
-                beta,
-            )
             break
 
     return best_score
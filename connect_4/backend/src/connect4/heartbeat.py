@@ -0,0 +1,65 @@
+"""Websocket heartbeat and reconnect-grace settings for game connections.
+
+The server sends ``{"type": "ping"}`` every ``HEARTBEAT_INTERVAL`` seconds and
+expects clients to answer with ``{"type": "pong"}`` (any other frame counts as
+well). A connection that stays silent for ``HEARTBEAT_MISSES`` consecutive
+intervals is treated as dead and closed. A player whose connection drops keeps
+their seat for ``RECONNECT_GRACE`` seconds so they can resume the game.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import os
+
+from fastapi import WebSocket
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT_INTERVAL = float(os.getenv("CONNECT4_HEARTBEAT_INTERVAL", "15"))
+HEARTBEAT_MISSES = int(os.getenv("CONNECT4_HEARTBEAT_MISSES", "2"))
+RECONNECT_GRACE = float(os.getenv("CONNECT4_RECONNECT_GRACE", "30"))
+
+HEARTBEAT_CLOSE_CODE = 4000
+CLOSE_TIMEOUT = 1.0
+
+
+def heartbeat_timeout() -> float | None:
+    """Seconds of silence after which a connection is considered dead."""
+
+    if HEARTBEAT_INTERVAL <= 0:
+        return None
+    return HEARTBEAT_INTERVAL * (HEARTBEAT_MISSES + 1)
+
+
+async def send_heartbeats(websocket: WebSocket) -> None:
+    """Ping ``websocket`` until the send fails or the task is cancelled."""
+
+    if HEARTBEAT_INTERVAL <= 0:
+        return
+    while True:
+        await asyncio.sleep(HEARTBEAT_INTERVAL)
+        try:
+            await websocket.send_json({"type": "ping"})
+        except Exception:  # the receive loop notices the dead socket
+            return
+
+
+async def close_quietly(websocket: WebSocket, code: int, reason: str = "") -> None:
+    """Close a possibly half-open socket without waiting on it indefinitely."""
+
+    with contextlib.suppress(Exception):
+        await asyncio.wait_for(websocket.close(code=code, reason=reason), CLOSE_TIMEOUT)
+
+
+__all__ = [
+    "HEARTBEAT_CLOSE_CODE",
+    "HEARTBEAT_INTERVAL",
+    "HEARTBEAT_MISSES",
+    "RECONNECT_GRACE",
+    "close_quietly",
+    "heartbeat_timeout",
+    "send_heartbeats",
+]
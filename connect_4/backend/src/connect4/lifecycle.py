@@ -0,0 +1,292 @@
+"""Startup restore, shutdown drain and seat release for game sessions.
+
+Startup also loads the learned evaluation weights used by the AI.
+
+On shutdown the registry stops accepting new games, every engine is stopped so
+boards stop changing, connected players are told the server is restarting, and
+all sessions are written to ``SNAPSHOT_PATH`` in a single atomic write before
+the sockets are closed. On startup the snapshot is replayed into the registry
+and each player's seat is held for ``RESTORE_GRACE`` seconds so they can
+reconnect to the game they were playing. Matched sessions are likewise held
+for their players only until a timeout, then dropped if nobody joined.
+
+Snapshots are only taken when ``CONNECT4_SNAPSHOT_PATH`` or
+``CONNECT4_DATA_DIR`` is set.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Mapping
+
+from fastapi import FastAPI
+
+from .datamodel import COLOR_NAMES, Color, ColumnFullError, YELLOW
+from .engine import broadcast_session_state
+from .evaluation import load_default_evaluator
+from .sessions import (
+    DifficultyLevel,
+    GameMode,
+    SessionAlreadyExistsError,
+    SessionRegistryEntry,
+    close_registry,
+    discard_session,
+    open_registry,
+    restore_session,
+    snapshot_sessions,
+)
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+RESTART_CLOSE_CODE = 1012
+RESTORE_GRACE = float(os.getenv("CONNECT4_RESTORE_GRACE", "120"))
+
+_COLORS_BY_NAME = {name: color for color, name in enumerate(COLOR_NAMES)}
+
+
+def _default_snapshot_path() -> Path | None:
+    explicit = os.getenv("CONNECT4_SNAPSHOT_PATH")
+    if explicit:
+        return Path(explicit)
+    data_dir = os.getenv("CONNECT4_DATA_DIR")
+    if data_dir:
+        return Path(data_dir) / "sessions.snapshot.json"
+    return None
+
+
+SNAPSHOT_PATH: Path | None = _default_snapshot_path()
+
+_release_tasks: set[asyncio.Task[None]] = set()
+
+
+async def release_seat(
+    game_id: str, entry: SessionRegistryEntry, player_id: str, token: int
+) -> None:
+    """Free a held seat, tell the others and drop the session once empty."""
+
+    session = entry.session
+    if not await session.release(player_id, token):
+        return  # the player reconnected in the meantime
+
+    leave_payload = {
+        "type": "player_left",
+        "gameId": game_id,
+        "playerId": player_id,
+    }
+    await session.broadcast(leave_payload, sender_id=player_id, include_sender=False)
+    if entry.engine is not None:
+        await broadcast_session_state(game_id, session, entry.engine.game)
+    await _close_if_empty(game_id, entry)
+
+
+async def expire_reservation(game_id: str, entry: SessionRegistryEntry) -> None:
+    """Stop holding a reserved session for players who never joined.
+
+    The session is dropped unless somebody is still seated in it.
+    """
+
+    await entry.session.expire_reservation()
+    await _close_if_empty(game_id, entry)
+
+
+async def _close_if_empty(game_id: str, entry: SessionRegistryEntry) -> None:
+    if await discard_session(game_id, entry.session):
+        await entry.session.spectators.close(1000, "Game closed")
+        if entry.engine is not None:
+            await entry.engine.stop()
+
+
+def _track(task: asyncio.Task[None]) -> None:
+    # Keep a reference until done so drain can cancel pending timers.
+    _release_tasks.add(task)
+    task.add_done_callback(_release_tasks.discard)
+
+
+def schedule_seat_release(
+    delay: float,
+    game_id: str,
+    entry: SessionRegistryEntry,
+    player_id: str,
+    token: int,
+) -> None:
+    """Release the seat after ``delay`` seconds unless the player returns."""
+
+    async def release_later() -> None:
+        await asyncio.sleep(delay)
+        await release_seat(game_id, entry, player_id, token)
+
+    _track(asyncio.create_task(release_later()))
+
+
+def schedule_reservation_expiry(
+    delay: float, game_id: str, entry: SessionRegistryEntry
+) -> None:
+    """Expire the session's reservation after ``delay`` seconds."""
+
+    async def expire_later() -> None:
+        await asyncio.sleep(delay)
+        await expire_reservation(game_id, entry)
+
+    _track(asyncio.create_task(expire_later()))
+
+
+def capture_entry(
+    game_id: str, entry: SessionRegistryEntry, seats: Mapping[str, Color]
+) -> Dict[str, Any]:
+    """Serialisable record of one session and the colors its players hold."""
+
+    state = entry.board_state
+    return {
+        "gameId": game_id,
+        "mode": entry.mode.value,
+        "difficulty": entry.difficulty.value,
+        "startingColor": COLOR_NAMES[state.starting_color],
+        "moves": state.move_string(),
+        "reservedFor": sorted(entry.session.reserved_for),
+        "seats": {player_id: COLOR_NAMES[color] for player_id, color in seats.items()},
+    }
+
+
+def write_snapshot(path: Path, records: list[Dict[str, Any]]) -> None:
+    """Write every record at once, replacing the previous file atomically."""
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(
+        json.dumps({"version": SNAPSHOT_VERSION, "sessions": records}),
+        encoding="utf-8",
+    )
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path: Path) -> list[Dict[str, Any]]:
+    data = json.loads(path.read_text(encoding="utf-8"))
+    if data.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version {data.get('version')!r}")
+    return data["sessions"]
+
+
+async def drain(path: Path | None = SNAPSHOT_PATH) -> int:
+    """Stop new games, snapshot the registry and disconnect every player.
+
+    Returns the number of sessions written to the snapshot.
+    """
+
+    close_registry()
+    entries = await snapshot_sessions()
+    await asyncio.gather(
+        *(entry.engine.stop() for _, entry in entries if entry.engine is not None)
+    )
+
+    records = []
+    for game_id, entry in entries:
+        seats = await entry.session.players_with_colors()
+        records.append(capture_entry(game_id, entry, seats))
+
+    if path is not None:
+        await asyncio.to_thread(write_snapshot, path, records)
+        logger.info("Snapshotted %d sessions to %s", len(records), path)
+
+    await asyncio.gather(
+        *(
+            entry.session.broadcast(
+                {
+                    "type": "server_restart",
+                    "gameId": game_id,
+                    "resumable": path is not None,
+                },
+                include_sender=True,
+            )
+            for game_id, entry in entries
+        )
+    )
+    await asyncio.gather(
+        *(
+            entry.session.close_all(RESTART_CLOSE_CODE, "Server restarting")
+            for _, entry in entries
+        )
+    )
+    for task in list(_release_tasks):
+        task.cancel()
+    return len(records)
+
+
+async def restore(path: Path | None = SNAPSHOT_PATH) -> int:
+    """Re-register the sessions from ``path`` and hold their seats.
+
+    The snapshot is removed once loaded so a later crash cannot resurrect
+    games that have since finished. Returns the number of restored sessions.
+    """
+
+    if path is None or not path.exists():
+        return 0
+    try:
+        records = await asyncio.to_thread(read_snapshot, path)
+    except (OSError, ValueError) as exc:
+        logger.warning("Ignoring unreadable session snapshot %s: %s", path, exc)
+        return 0
+
+    restored = 0
+    for record in records:
+        game_id = record["gameId"]
+        try:
+            entry = await restore_session(
+                game_id,
+                GameMode(record["mode"]),
+                DifficultyLevel(record["difficulty"]),
+                starting_color=_COLORS_BY_NAME.get(record["startingColor"], YELLOW),
+                moves=record["moves"],
+                reserved_for=record.get("reservedFor", ()),
+            )
+        except SessionAlreadyExistsError:
+            continue
+        except (KeyError, ValueError, ColumnFullError) as exc:
+            logger.warning("Skipping snapshot of game %s: %s", game_id, exc)
+            continue
+        for player_id, color_name in record.get("seats", {}).items():
+            color = _COLORS_BY_NAME.get(color_name)
+            if color is None:
+                continue
+            token = await entry.session.hold_seat(player_id, color)
+            schedule_seat_release(RESTORE_GRACE, game_id, entry, player_id, token)
+        if entry.session.reserved_for:
+            schedule_reservation_expiry(RESTORE_GRACE, game_id, entry)
+        restored += 1
+
+    path.unlink(missing_ok=True)
+    logger.info("Restored %d sessions from %s", restored, path)
+    return restored
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    load_default_evaluator()
+    open_registry()
+    await restore(SNAPSHOT_PATH)
+    try:
+        yield
+    finally:
+        await drain(SNAPSHOT_PATH)
+
+
+__all__ = [
+    "RESTART_CLOSE_CODE",
+    "RESTORE_GRACE",
+    "SNAPSHOT_PATH",
+    "capture_entry",
+    "drain",
+    "expire_reservation",
+    "lifespan",
+    "read_snapshot",
+    "release_seat",
+    "restore",
+    "schedule_reservation_expiry",
+    "schedule_seat_release",
+    "write_snapshot",
+]
@@ -0,0 +1,158 @@
+"""FIFO matchmaking queue that pairs players into multiplayer sessions."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict
+from uuid import uuid4
+
+from .lifecycle import schedule_reservation_expiry
+from .sessions import GameMode, create_session
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKET = "default"
+RATING_BAND = 200
+# Seconds a matched session waits for both players before it is dropped.
+MATCH_JOIN_TIMEOUT = float(os.getenv("CONNECT4_MATCH_JOIN_TIMEOUT", "60"))
+
+
+class AlreadyQueuedError(Exception):
+    """Raised when a player is already waiting for a match."""
+
+    def __init__(self, player_id: str) -> None:
+        super().__init__(f"Player {player_id!r} is already queued")
+        self.player_id = player_id
+
+
+@dataclass(slots=True)
+class Match:
+    """A pairing produced by the queue."""
+
+    game_id: str
+    player_id: str
+    opponent_id: str
+
+
+@dataclass(slots=True)
+class Ticket:
+    """A player's place in a matchmaking bucket."""
+
+    player_id: str
+    bucket: str
+    position: int = 0
+    future: asyncio.Future[Match] = field(
+        default_factory=lambda: asyncio.get_running_loop().create_future()
+    )
+
+
+def rating_bucket(rating: int) -> str:
+    """Map a rating onto a bucket of ``RATING_BAND`` points."""
+
+    return f"rating:{rating // RATING_BAND}"
+
+
+class MatchmakingQueue:
+    """Pairs waiting players first-in, first-out within each bucket.
+
+    Buckets are ordered dicts keyed by player id, so enqueueing, pairing the
+    oldest waiter and cancelling are all O(1). Pairing creates the session with
+    both seats reserved and resolves both tickets in the same critical section,
+    so neither player can be matched twice or lose their seat to a stranger.
+    The session waits ``MATCH_JOIN_TIMEOUT`` seconds for both players to join,
+    even if one of them leaves in the meantime. If the session cannot be
+    created, both tickets fail with the error instead.
+    """
+
+    def __init__(self) -> None:
+        self._buckets: Dict[str, OrderedDict[str, Ticket]] = {}
+        self._queued: Dict[str, Ticket] = {}
+        self._lock = asyncio.Lock()
+
+    async def enqueue(self, player_id: str, bucket: str = DEFAULT_BUCKET) -> Ticket:
+        async with self._lock:
+            if player_id in self._queued:
+                raise AlreadyQueuedError(player_id)
+
+            ticket = Ticket(player_id=player_id, bucket=bucket)
+            waiting = self._buckets.get(bucket)
+            if not waiting:
+                self._buckets[bucket] = OrderedDict({player_id: ticket})
+                self._queued[player_id] = ticket
+                ticket.position = 1
+                return ticket
+
+            _, opponent = waiting.popitem(last=False)
+            del self._queued[opponent.player_id]
+            if not waiting:
+                del self._buckets[bucket]
+
+            game_id = uuid4().hex
+            try:
+                entry = await create_session(
+                    game_id,
+                    GameMode.MULTIPLAYER,
+                    reserved_for=(opponent.player_id, player_id),
+                )
+            except Exception as exc:
+                # Both players are out of the queue by now, so fail both
+                # tickets rather than leave the opponent waiting forever.
+                logger.warning(
+                    "Could not create game for %s and %s: %s",
+                    opponent.player_id,
+                    player_id,
+                    exc,
+                )
+                opponent.future.set_exception(exc)
+                ticket.future.set_exception(exc)
+                return ticket
+            schedule_reservation_expiry(MATCH_JOIN_TIMEOUT, game_id, entry)
+            opponent.future.set_result(
+                Match(game_id, opponent.player_id, player_id)
+            )
+            ticket.future.set_result(Match(game_id, player_id, opponent.player_id))
+            logger.debug(
+                "Matched %s with %s in game %s (bucket %s)",
+                opponent.player_id,
+                player_id,
+                game_id,
+                bucket,
+            )
+            return ticket
+
+    async def cancel(self, ticket: Ticket) -> None:
+        async with self._lock:
+            if self._queued.get(ticket.player_id) is not ticket:
+                return
+            del self._queued[ticket.player_id]
+            waiting = self._buckets.get(ticket.bucket)
+            if waiting is not None:
+                waiting.pop(ticket.player_id, None)
+                if not waiting:
+                    del self._buckets[ticket.bucket]
+            if not ticket.future.done():
+                ticket.future.cancel()
+
+    def waiting(self) -> Dict[str, int]:
+        """Return the number of queued players per bucket."""
+
+        return {bucket: len(tickets) for bucket, tickets in self._buckets.items()}
+
+
+matchmaker = MatchmakingQueue()
+
+
+__all__ = [
+    "AlreadyQueuedError",
+    "DEFAULT_BUCKET",
+    "MATCH_JOIN_TIMEOUT",
+    "Match",
+    "MatchmakingQueue",
+    "Ticket",
+    "matchmaker",
+    "rating_bucket",
+]
@@ -0,0 +1,333 @@
+"""In-process metrics registry rendered in the Prometheus text format."""
+
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterator, Sequence, TypeVar
+
+LabelValues = tuple[str, ...]
+
+DEFAULT_BUCKETS: tuple[float, ...] = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="{_escape(value)}"' for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str]) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> list[str]:  # pragma: no cover - abstract
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+
+    kind = "counter"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        if not self.labelnames:
+            self._values[()] = 0.0
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Gauge(Counter):
+    """Value that can go up and down."""
+
+    kind = "gauge"
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    """Distribution of observations over fixed upper-bound buckets."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        *,
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, ())
+        self.buckets = tuple(sorted(buckets))
+        # One slot per bucket plus the implicit +Inf bucket.
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def sum(self) -> float:
+        return self._sum
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+            count = self._count
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip((*self.buckets, float("inf")), counts):
+            cumulative += bucket_count
+            lines.append(
+                f'{self.name}_bucket{{le="{_format_value(bound)}"}} {cumulative}'
+            )
+        lines.append(f"{self.name}_sum {_format_value(total)}")
+        lines.append(f"{self.name}_count {count}")
+        return lines
+
+
+MetricT = TypeVar("MetricT", bound=_Metric)
+
+
+class MetricsRegistry:
+    """Collection of named metrics rendered together for scraping."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+
+    def counter(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        *,
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, buckets=buckets))
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def _register(self, metric: MetricT) -> MetricT:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name!r} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+
+REGISTRY = MetricsRegistry()
+
+AI_MOVE_SECONDS = REGISTRY.histogram(
+    "connect4_ai_move_seconds",
+    "Wall time spent choosing an AI move.",
+)
+AI_NODES_SEARCHED = REGISTRY.counter(
+    "connect4_ai_nodes_searched_total",
+    "Positions visited by the AI search.",
+)
+AI_MOVES = REGISTRY.counter(
+    "connect4_ai_moves_total",
+    "AI moves calculated.",
+)
+AI_SEARCH_BUDGET_EXHAUSTED = REGISTRY.counter(
+    "connect4_ai_search_budget_exhausted_total",
+    "AI searches cut short by their difficulty's node or time budget.",
+)
+BROADCAST_SECONDS = REGISTRY.histogram(
+    "connect4_broadcast_seconds",
+    "Wall time spent fanning a message out to a session's websockets.",
+)
+BROADCAST_MESSAGES = REGISTRY.counter(
+    "connect4_broadcast_messages_total",
+    "Websocket messages sent by session broadcasts.",
+)
+BROADCAST_ERRORS = REGISTRY.counter(
+    "connect4_broadcast_errors_total",
+    "Websocket sends that failed during a broadcast.",
+)
+ACTIVE_SESSIONS = REGISTRY.gauge(
+    "connect4_active_sessions",
+    "Sessions currently held in the registry.",
+    ("mode",),
+)
+SESSIONS_CREATED = REGISTRY.counter(
+    "connect4_sessions_created_total",
+    "Sessions registered since startup.",
+    ("mode",),
+)
+CONNECTED_PLAYERS = REGISTRY.gauge(
+    "connect4_connected_players",
+    "Websocket players currently attached to a session.",
+)
+HEARTBEAT_EVICTIONS = REGISTRY.counter(
+    "connect4_heartbeat_evictions_total",
+    "Websocket connections closed after missing heartbeats.",
+)
+RECONNECTS = REGISTRY.counter(
+    "connect4_reconnects_total",
+    "Players who resumed a held seat within the reconnect grace window.",
+)
+WS_FRAMES_DROPPED = REGISTRY.counter(
+    "connect4_ws_frames_dropped_total",
+    "Incoming websocket frames discarded before reaching the game.",
+    ("reason",),
+)
+WS_POLICY_CLOSES = REGISTRY.counter(
+    "connect4_ws_policy_closes_total",
+    "Websocket connections closed for exceeding frame size or rate limits.",
+    ("reason",),
+)
+SPECTATORS = REGISTRY.gauge(
+    "connect4_spectators",
+    "Websocket spectators currently watching a game.",
+)
+SPECTATORS_DROPPED = REGISTRY.counter(
+    "connect4_spectators_dropped_total",
+    "Spectators disconnected for falling too far behind the broadcast queue.",
+)
+SPECTATOR_MESSAGES = REGISTRY.counter(
+    "connect4_spectator_messages_total",
+    "Messages written to spectator websockets.",
+)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+__all__ = [
+    "ACTIVE_SESSIONS",
+    "AI_MOVES",
+    "AI_MOVE_SECONDS",
+    "AI_NODES_SEARCHED",
+    "AI_SEARCH_BUDGET_EXHAUSTED",
+    "BROADCAST_ERRORS",
+    "BROADCAST_MESSAGES",
+    "BROADCAST_SECONDS",
+    "CONNECTED_PLAYERS",
+    "Counter",
+    "Gauge",
+    "HEARTBEAT_EVICTIONS",
+    "Histogram",
+    "MetricsRegistry",
+    "PROMETHEUS_CONTENT_TYPE",
+    "RECONNECTS",
+    "REGISTRY",
+    "SESSIONS_CREATED",
+    "SPECTATORS",
+    "SPECTATORS_DROPPED",
+    "SPECTATOR_MESSAGES",
+    "WS_FRAMES_DROPPED",
+    "WS_POLICY_CLOSES",
+]
@@ -0,0 +1,125 @@
+"""Per-connection limits on incoming websocket frames.
+
+Every game socket gets a token bucket refilled at ``MESSAGE_RATE`` frames per
+second with room for ``MESSAGE_BURST`` frames. Frames arriving with the bucket
+empty are dropped without being parsed; a client that keeps flooding after
+``MAX_DROPPED_FRAMES`` consecutive drops is disconnected. Frames larger than
+``MAX_FRAME_BYTES`` close the connection straight away.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict
+
+MESSAGE_RATE = float(os.getenv("CONNECT4_WS_MESSAGE_RATE", "20"))
+MESSAGE_BURST = int(os.getenv("CONNECT4_WS_MESSAGE_BURST", "40"))
+MAX_FRAME_BYTES = int(os.getenv("CONNECT4_WS_MAX_FRAME_BYTES", "4096"))
+MAX_DROPPED_FRAMES = int(os.getenv("CONNECT4_WS_MAX_DROPPED_FRAMES", "200"))
+
+TOO_BIG_CLOSE_CODE = 1009
+POLICY_CLOSE_CODE = 1008
+
+# Matches the exact frame the frontend sends for a move, so the hot path skips
+# the generic JSON decoder.
+_MOVE_FRAME = re.compile(rb'\{\s*"type"\s*:\s*"move"\s*,\s*"column"\s*:\s*(-?\d{1,3})\s*\}')
+
+
+class InvalidFrameError(ValueError):
+    """Raised when a frame is not a JSON object."""
+
+
+@dataclass(slots=True)
+class TokenBucket:
+    """Classic token bucket; ``rate`` tokens per second up to ``capacity``."""
+
+    rate: float
+    capacity: float
+    tokens: float = field(init=False)
+    updated: float = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def try_acquire(self, now: float | None = None) -> bool:
+        if now is None:
+            now = time.monotonic()
+        elapsed = now - self.updated
+        self.updated = now
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        if self.tokens < 1.0:
+            return False
+        self.tokens -= 1.0
+        return True
+
+
+@dataclass(slots=True)
+class MoveFrame:
+    """A plain ``{"type": "move", "column": n}`` frame."""
+
+    column: int
+
+
+@dataclass(slots=True)
+class FrameLimiter:
+    """Decides whether each incoming frame is accepted, dropped or fatal."""
+
+    bucket: TokenBucket = field(
+        default_factory=lambda: TokenBucket(MESSAGE_RATE, MESSAGE_BURST)
+    )
+    max_frame_bytes: int = field(default_factory=lambda: MAX_FRAME_BYTES)
+    max_dropped: int = field(default_factory=lambda: MAX_DROPPED_FRAMES)
+    dropped_in_row: int = 0
+
+    def too_big(self, frame: bytes) -> bool:
+        return len(frame) > self.max_frame_bytes
+
+    def admit(self) -> bool:
+        """Spend a token for the next frame; ``False`` means drop it."""
+
+        if self.bucket.rate <= 0 or self.bucket.try_acquire():
+            self.dropped_in_row = 0
+            return True
+        self.dropped_in_row += 1
+        return False
+
+    @property
+    def exhausted(self) -> bool:
+        """Whether the client kept flooding long enough to be disconnected."""
+
+        return self.dropped_in_row >= self.max_dropped
+
+
+def parse_frame(frame: bytes) -> MoveFrame | Dict[str, Any]:
+    """Decode a frame, taking a fast path for plain move messages."""
+
+    match = _MOVE_FRAME.fullmatch(frame)
+    if match is not None:
+        return MoveFrame(int(match.group(1)))
+    try:
+        message = json.loads(frame)
+    except ValueError as exc:
+        raise InvalidFrameError("Frames must be JSON objects") from exc
+    if not isinstance(message, dict):
+        raise InvalidFrameError("Frames must be JSON objects")
+    return message
+
+
+__all__ = [
+    "FrameLimiter",
+    "InvalidFrameError",
+    "MAX_DROPPED_FRAMES",
+    "MAX_FRAME_BYTES",
+    "MESSAGE_BURST",
+    "MESSAGE_RATE",
+    "MoveFrame",
+    "POLICY_CLOSE_CODE",
+    "TOO_BIG_CLOSE_CODE",
+    "TokenBucket",
+    "parse_frame",
+]
@@ -2,33 +2,74 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
 from typing import Any, Dict, List
 from uuid import uuid4
 
-from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi import (
+    APIRouter,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    WebSocket,
+    WebSocketDisconnect,
+)
 from pydantic import BaseModel, ConfigDict, Field
 
-from .datamodel import COLOR_NAMES, ColumnFullError, IllegalMoveError
-from .game import Connect4Game, TurnOutcome, calculate_next_move
+from .datamodel import COLOR_NAMES, other_color
+from . import heartbeat, ratelimit, spectators
+from .engine import (
+    EngineStoppedError,
+    broadcast_session_state,
+    build_session_state_payload,
+    ensure_engine,
+    session_engine,
+)
+from .lifecycle import RESTART_CLOSE_CODE, release_seat, schedule_seat_release
+from .matchmaking import (
+    DEFAULT_BUCKET,
+    AlreadyQueuedError,
+    matchmaker,
+    rating_bucket,
+)
+from .metrics import (
+    HEARTBEAT_EVICTIONS,
+    PROMETHEUS_CONTENT_TYPE,
+    RECONNECTS,
+    REGISTRY,
+    WS_FRAMES_DROPPED,
+    WS_POLICY_CLOSES,
+)
+from .ratelimit import FrameLimiter, InvalidFrameError, MoveFrame, parse_frame
+from .search_trace import (
+    TRACE_ENABLED,
+    captured_search_traces,
+    disable_search_trace,
+    enable_search_trace,
+)
 from .sessions import (
     DEFAULT_DIFFICULTY,
     DifficultyLevel,
     GameMode,
+    Occupancy,
+    RegistryClosedError,
     SessionAlreadyExistsError,
     SessionFullError,
     SessionModeConflictError,
     create_session,
-    discard_session,
     get_session,
-    reset_session,
-    snapshot_sessions,
+    list_session_summaries,
 )
-from .sessions import GameSession, SessionRegistryEntry
+from .sessions import SessionRegistryEntry
+from .spectators import SpectatorLimitError
 
 logger = logging.getLogger(__name__)
 
-ENGINE_PLAYER_ID = "__engine__"
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
 
 router = APIRouter()
 
@@ -68,6 +109,25 @@ class GameDetailsResponse(BaseModel):
     ai_depth: int
 
 
+class MoveRecord(BaseModel):
+    """A single move from a game's history."""
+
+    turn_index: int
+    column: int
+    color: str
+
+
+class MoveDeltaResponse(BaseModel):
+    """Moves played after a given turn index."""
+
+    game_id: str
+    version: int
+    since: int
+    move_count: int
+    current_turn: str
+    moves: list[MoveRecord]
+
+
 class RematchRequest(BaseModel):
     """Request body for rematch operations."""
 
@@ -81,6 +141,13 @@ async def healthcheck() -> Dict[str, str]:
     return {"status": "ok"}
 
 
+@router.get("/metrics", tags=["system"], response_class=Response)
+async def metrics() -> Response:
+    """Expose in-process metrics in the Prometheus text format."""
+
+    return Response(content=REGISTRY.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
 @router.post(
     "/games",
     response_model=CreateGameResponse,
@@ -96,6 +163,8 @@ async def register_game(payload: CreateGameRequest) -> CreateGameResponse:
         entry = await create_session(game_id, payload.mode, difficulty)
     except SessionAlreadyExistsError as exc:
         raise HTTPException(status_code=409, detail=str(exc)) from exc
+    except RegistryClosedError as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
     return CreateGameResponse(
         game_id=game_id,
         mode=entry.mode,
@@ -105,42 +174,116 @@ async def register_game(payload: CreateGameRequest) -> CreateGameResponse:
 
 
 @router.get("/games", response_model=list[GameDetailsResponse], tags=["games"])
-async def list_games() -> list[GameDetailsResponse]:
-    snapshot = await snapshot_sessions()
-
-    response: list[GameDetailsResponse] = []
-    for game_id, entry in snapshot:
-        players = await entry.session.player_ids()
-        response.append(
-            GameDetailsResponse(
-                game_id=game_id,
-                mode=entry.mode,
-                players=players,
-                capacity=entry.session.capacity,
-                difficulty=entry.difficulty,
-                ai_depth=entry.ai_depth,
-            )
+async def list_games(
+    response: Response,
+    mode: GameMode | None = None,
+    occupancy: Occupancy | None = None,
+    cursor: str | None = None,
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+) -> list[GameDetailsResponse]:
+    """List sessions one page at a time, oldest first.
+
+    When more results remain, the ``X-Next-Cursor`` response header carries the
+    value to pass as ``cursor`` to fetch the following page.
+    """
+
+    after: int | None = None
+    if cursor is not None:
+        try:
+            after = int(cursor)
+        except ValueError as exc:
+            raise HTTPException(
+                status_code=400, detail=f"Invalid cursor {cursor!r}"
+            ) from exc
+
+    page, next_cursor = list_session_summaries(
+        limit=limit, cursor=after, mode=mode, occupancy=occupancy
+    )
+    if next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = str(next_cursor)
+
+    return [
+        GameDetailsResponse(
+            game_id=summary.game_id,
+            mode=summary.mode,
+            players=list(summary.players),
+            capacity=summary.capacity,
+            difficulty=summary.difficulty,
+            ai_depth=summary.ai_depth,
         )
-    return response
+        for summary in page
+    ]
 
 
 @router.get(
     "/games/{game_id}/board_state",
-    # response_model=GameDetailsResponse,
     tags=["games"],
 )
-async def get_board_state(game_id: str) -> List[List[str]]:
-    # GameDetailsResponse:
-    try:
-        entry = await get_session(game_id, create_if_missing=False)
-    except KeyError as exc:
-        raise HTTPException(
-            status_code=404, detail=f"Game {game_id!r} not found"
-        ) from exc
+async def get_board_state(
+    game_id: str, request: Request, response: Response
+) -> List[List[str]]:
+    """Return the board grid, or 304 when ``If-None-Match`` is still current."""
+
+    entry = await _get_existing_session(game_id)
+    etag = _board_etag(entry)
+    if _etag_matches(request, etag):
+        return _not_modified(etag)
 
+    _set_etag(response, etag)
     return entry.board_state.board_schetch()
 
 
+@router.get(
+    "/games/{game_id}/moves",
+    response_model=MoveDeltaResponse,
+    tags=["games"],
+)
+async def get_moves(
+    game_id: str,
+    request: Request,
+    response: Response,
+    since: int = Query(default=0, ge=0),
+) -> MoveDeltaResponse:
+    """Return only the moves played after turn index ``since``.
+
+    Turn indices match the ``turnIndex`` field of websocket move messages. A
+    ``since`` beyond the current move count means the client's history is stale
+    (for instance after a rematch) and yields 409 so it can resync from zero.
+    """
+
+    entry = await _get_existing_session(game_id)
+    etag = _board_etag(entry, since)
+    if _etag_matches(request, etag):
+        return _not_modified(etag)
+
+    state = entry.board_state
+    if since > state.move_count:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Game {game_id!r} has only {state.move_count} moves",
+        )
+
+    color = state.starting_color
+    if since % 2:
+        color = other_color(color)
+    moves: list[MoveRecord] = []
+    for turn_index, column in enumerate(state.moves(since), start=since + 1):
+        moves.append(
+            MoveRecord(turn_index=turn_index, column=column, color=COLOR_NAMES[color])
+        )
+        color = other_color(color)
+
+    _set_etag(response, etag)
+    return MoveDeltaResponse(
+        game_id=game_id,
+        version=state.version,
+        since=since,
+        move_count=state.move_count,
+        current_turn=COLOR_NAMES[state.to_play],
+        moves=moves,
+    )
+
+
 @router.get(
     "/games/{game_id}",
     response_model=GameDetailsResponse,
@@ -153,6 +296,8 @@ async def get_game(game_id: str) -> GameDetailsResponse:
         raise HTTPException(
             status_code=404, detail=f"Game {game_id!r} not found"
         ) from exc
+    except EngineStoppedError as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
 
     players = await entry.session.player_ids()
     return GameDetailsResponse(
@@ -165,6 +310,36 @@ async def get_game(game_id: str) -> GameDetailsResponse:
     )
 
 
+@router.post("/games/{game_id}/search_trace", status_code=204, tags=["debug"])
+async def start_tracing(game_id: str) -> Response:
+    """Capture AI search trees for this game (needs ``CONNECT4_SEARCH_TRACE=1``)."""
+
+    _require_tracing()
+    await _get_existing_session(game_id)
+    enable_search_trace(game_id)
+    return Response(status_code=204)
+
+
+@router.get("/games/{game_id}/search_trace", tags=["debug"])
+async def get_search_traces(game_id: str) -> list[Dict[str, Any]]:
+    """Return the most recent search trees captured for this game."""
+
+    _require_tracing()
+    traces = captured_search_traces(game_id)
+    if traces is None:
+        raise HTTPException(
+            status_code=404, detail=f"Game {game_id!r} is not being traced"
+        )
+    return traces
+
+
+@router.delete("/games/{game_id}/search_trace", status_code=204, tags=["debug"])
+async def stop_tracing(game_id: str) -> Response:
+    _require_tracing()
+    disable_search_trace(game_id)
+    return Response(status_code=204)
+
+
 @router.post(
     "/games/{game_id}/rematch",
     response_model=GameDetailsResponse,
@@ -173,29 +348,18 @@ async def get_game(game_id: str) -> GameDetailsResponse:
 async def request_rematch(
     game_id: str, payload: RematchRequest | None = None
 ) -> GameDetailsResponse:
+    entry = await _get_existing_session(game_id)
+    # Only websocket handlers start engines; they stop them when the last
+    # player leaves, which nothing would do for a task started here.
+    engine = session_engine(game_id, entry)
     try:
-        entry = await reset_session(game_id)
+        await engine.rematch(payload.player_id if payload else None)
     except KeyError as exc:
         raise HTTPException(
             status_code=404, detail=f"Game {game_id!r} not found"
         ) from exc
 
-    game = Connect4Game(mode=entry.mode, state=entry.board_state)
-    session = entry.session
-    initiator = payload.player_id if payload else None
-
-    rematch_payload: Dict[str, Any] = {
-        "type": "rematch",
-        "gameId": game_id,
-        "startingColor": COLOR_NAMES[game.state.to_play],
-    }
-    if initiator:
-        rematch_payload["initiatedBy"] = initiator
-
-    await session.broadcast(rematch_payload, sender_id=None, include_sender=True)
-    await _broadcast_session_state(game_id, session, game)
-
-    players = await session.player_ids()
+    players = await entry.session.player_ids()
     return GameDetailsResponse(
         game_id=game_id,
         mode=entry.mode,
@@ -206,6 +370,135 @@ async def request_rematch(
     )
 
 
+@router.get("/matchmaking", tags=["matchmaking"])
+async def matchmaking_status() -> Dict[str, Dict[str, int]]:
+    """Report how many players are waiting in each matchmaking bucket."""
+
+    return {"waiting": matchmaker.waiting()}
+
+
+@router.websocket("/matchmaking/{player_id}")
+async def matchmaking_endpoint(websocket: WebSocket, player_id: str) -> None:
+    """Queue for a multiplayer opponent and report the game once paired.
+
+    Optional ``bucket`` (free-form label, e.g. a difficulty) or ``rating``
+    (grouped into bands) query parameters restrict who the player is paired
+    with. The socket receives ``queued`` and then ``match_found``, after which
+    the client joins ``/ws/{gameId}/{playerId}``. Send ``{"type": "cancel"}``
+    or disconnect to leave the queue.
+    """
+
+    bucket = websocket.query_params.get("bucket") or DEFAULT_BUCKET
+    rating_param = websocket.query_params.get("rating")
+    if rating_param is not None:
+        try:
+            bucket = rating_bucket(int(rating_param))
+        except ValueError:
+            await websocket.close(code=1008, reason="Invalid rating")
+            return
+
+    await websocket.accept()
+    try:
+        ticket = await matchmaker.enqueue(player_id, bucket)
+    except AlreadyQueuedError as exc:
+        await websocket.close(code=1008, reason=str(exc))
+        return
+
+    try:
+        if not ticket.future.done():
+            await websocket.send_json(
+                {"type": "queued", "bucket": bucket, "position": ticket.position}
+            )
+        while not ticket.future.done():
+            receive = asyncio.ensure_future(websocket.receive_json())
+            done, _ = await asyncio.wait(
+                {ticket.future, receive}, return_when=asyncio.FIRST_COMPLETED
+            )
+            if receive not in done:
+                receive.cancel()
+                break
+            if receive.result().get("type") == "cancel":
+                await matchmaker.cancel(ticket)
+                if not ticket.future.cancelled():
+                    # Paired before the cancel was handled; report the match.
+                    break
+                await websocket.send_json({"type": "cancelled"})
+                await websocket.close()
+                return
+
+        if ticket.future.cancelled():
+            await websocket.close()
+            return
+        error = ticket.future.exception()
+        if isinstance(error, RegistryClosedError):
+            await websocket.close(code=RESTART_CLOSE_CODE, reason="Server restarting")
+            return
+        if error is not None:
+            await websocket.close(code=1011, reason="Could not create game")
+            return
+        match = ticket.future.result()
+        await websocket.send_json(
+            {
+                "type": "match_found",
+                "gameId": match.game_id,
+                "playerId": match.player_id,
+                "opponentId": match.opponent_id,
+            }
+        )
+        await websocket.close()
+    except WebSocketDisconnect:
+        await matchmaker.cancel(ticket)
+
+
+@router.websocket("/ws/{game_id}")
+async def spectator_endpoint(websocket: WebSocket, game_id: str) -> None:
+    """Watch a game read-only: a full snapshot, then every broadcast."""
+
+    try:
+        entry = await get_session(game_id, create_if_missing=False)
+    except KeyError:
+        await websocket.close(code=1008, reason="Game not found")
+        return
+    except RegistryClosedError:
+        await websocket.close(code=RESTART_CLOSE_CODE, reason="Server restarting")
+        return
+
+    hub = entry.session.spectators
+    if len(hub) >= spectators.MAX_SPECTATORS:
+        await websocket.close(
+            code=spectators.SLOW_SPECTATOR_CLOSE_CODE, reason="Too many spectators"
+        )
+        return
+
+    await websocket.accept()
+    try:
+        # No await between taking the snapshot and subscribing, and publishing
+        # queues synchronously, so every later move arrives exactly once.
+        hub.subscribe(websocket, _spectator_snapshot(game_id, entry))
+    except SpectatorLimitError:
+        await heartbeat.close_quietly(
+            websocket, spectators.SLOW_SPECTATOR_CLOSE_CODE, "Too many spectators"
+        )
+        return
+
+    limiter = FrameLimiter()
+    try:
+        # Spectators have nothing to say; frames are only read to notice the
+        # disconnect and to cut off clients that flood the socket anyway.
+        while True:
+            frame = await _receive_frame(websocket)
+            if limiter.too_big(frame) or (not limiter.admit() and limiter.exhausted):
+                WS_POLICY_CLOSES.inc(reason="spectator")
+                await heartbeat.close_quietly(
+                    websocket, ratelimit.POLICY_CLOSE_CODE, "Spectators are read-only"
+                )
+                break
+    except WebSocketDisconnect:
+        logger.debug("Spectator left %s", game_id)
+    finally:
+        hub.unsubscribe(websocket)
+
+
 @router.websocket("/ws/{game_id}/{player_id}")
 async def websocket_endpoint(
     websocket: WebSocket, game_id: str, player_id: str
@@ -224,49 +517,133 @@ async def websocket_endpoint(
     except SessionModeConflictError as exc:
         await websocket.close(code=1008, reason=str(exc))
         return
+    except RegistryClosedError:
+        await websocket.close(code=RESTART_CLOSE_CODE, reason="Server restarting")
+        return
 
-    game = Connect4Game(mode=entry.mode, state=entry.board_state)
     session = entry.session
     try:
-        player_color = await session.connect(player_id, websocket)
+        seat = await session.connect(player_id, websocket)
     except SessionFullError:
         await websocket.close(code=1008, reason="Session is full")
         return
 
-    await _broadcast_session_state(game_id, session, game)
-
-    join_payload = {
-        "type": "player_joined",
-        "gameId": game_id,
-        "playerId": player_id,
-        "color": COLOR_NAMES[player_color],
-    }
-    await session.broadcast(join_payload, sender_id=player_id, include_sender=True)
+    engine = ensure_engine(game_id, entry)
+    if seat.resumed:
+        # Only the returning player needs the session state; everyone else
+        # just learns they are back.
+        RECONNECTS.inc()
+        state_payload = await build_session_state_payload(game_id, session, engine.game)
+        state_payload.update(
+            resumed=True,
+            moveCount=engine.game.state.move_count,
+            version=engine.game.state.version,
+        )
+        await websocket.send_json(state_payload)
+        await session.broadcast(
+            {"type": "player_returned", "gameId": game_id, "playerId": player_id},
+            sender_id=player_id,
+        )
+    else:
+        await broadcast_session_state(game_id, session, engine.game)
+        join_payload = {
+            "type": "player_joined",
+            "gameId": game_id,
+            "playerId": player_id,
+            "color": COLOR_NAMES[seat.color],
+        }
+        await session.broadcast(
+            join_payload, sender_id=player_id, include_sender=True
+        )
+    engine.schedule_ai_turn()
 
+    pinger = asyncio.create_task(heartbeat.send_heartbeats(websocket))
+    limiter = FrameLimiter()
     try:
         while True:
-            incoming = await websocket.receive_json()
-            include_sender = True
+            try:
+                frame = await asyncio.wait_for(
+                    _receive_frame(websocket), heartbeat.heartbeat_timeout()
+                )
+            except TimeoutError:
+                HEARTBEAT_EVICTIONS.inc()
+                logger.info(
+                    "Player %s missed heartbeats in %s; evicting", player_id, game_id
+                )
+                await heartbeat.close_quietly(
+                    websocket, heartbeat.HEARTBEAT_CLOSE_CODE, "Heartbeat timeout"
+                )
+                break
 
-            if "column" in incoming:
-                enriched = await _handle_player_move(
-                    game_id,
+            if limiter.too_big(frame):
+                WS_FRAMES_DROPPED.inc(reason="size")
+                WS_POLICY_CLOSES.inc(reason="size")
+                logger.info(
+                    "Player %s sent a %d byte frame in %s; closing",
                     player_id,
-                    incoming,
-                    websocket,
-                    game,
-                    session,
+                    len(frame),
+                    game_id,
                 )
-                if enriched is None:
-                    continue
-                payload = enriched
-            else:
-                payload = {**incoming, "gameId": game_id, "playerId": player_id}
+                await heartbeat.close_quietly(
+                    websocket, ratelimit.TOO_BIG_CLOSE_CODE, "Frame too large"
+                )
+                break
+
+            if not limiter.admit():
+                WS_FRAMES_DROPPED.inc(reason="rate")
+                if limiter.exhausted:
+                    WS_POLICY_CLOSES.inc(reason="rate")
+                    logger.info(
+                        "Player %s kept flooding %s; closing", player_id, game_id
+                    )
+                    await heartbeat.close_quietly(
+                        websocket, ratelimit.POLICY_CLOSE_CODE, "Rate limit exceeded"
+                    )
+                    break
+                if limiter.dropped_in_row == 1:
+                    await _send_error(
+                        websocket, game_id, player_id, "Rate limit exceeded"
+                    )
+                continue
+
+            try:
+                incoming = parse_frame(frame)
+            except InvalidFrameError as exc:
+                WS_FRAMES_DROPPED.inc(reason="invalid")
+                await _send_error(websocket, game_id, player_id, str(exc))
+                continue
+
+            if isinstance(incoming, MoveFrame):
+                engine.submit_move(player_id, incoming.column)
+                continue
+
+            message_type = incoming.get("type")
+            if message_type == "pong":
+                continue
+            if message_type == "ping":
+                await websocket.send_json({"type": "pong"})
+                continue
 
-            await session.broadcast(
-                payload, sender_id=player_id, include_sender=include_sender
-            )
-            await _maybe_trigger_ai_turn(game_id, game, entry, session)
+            if "column" in incoming:
+                column = incoming.get("column")
+                if not isinstance(column, int):
+                    await _send_error(
+                        websocket,
+                        game_id,
+                        player_id,
+                        "column must be provided as an integer",
+                    )
+                    continue
+                extra = {
+                    key: value
+                    for key, value in incoming.items()
+                    if key not in {"column", "gameId", "playerId"}
+                }
+                engine.submit_move(player_id, column, extra)
+                continue
+
+            payload = {**incoming, "gameId": game_id, "playerId": player_id}
+            await session.broadcast(payload, sender_id=player_id, include_sender=True)
     except WebSocketDisconnect:
         logger.info("Player %s disconnected from %s", player_id, game_id)
     except Exception:  # pragma: no cover - defensive safeguard
@@ -275,208 +652,107 @@ async def websocket_endpoint(
         )
         await websocket.close(code=1011)
     finally:
-        await session.disconnect(player_id)
-        leave_payload = {
-            "type": "player_left",
-            "gameId": game_id,
-            "playerId": player_id,
-        }
-        await session.broadcast(
-            leave_payload, sender_id=player_id, include_sender=False
-        )
-        await _broadcast_session_state(game_id, session, game)
-        await discard_session(game_id, session)
+        pinger.cancel()
+        token = await session.detach(player_id, websocket)
+        if token is not None:
+            grace = heartbeat.RECONNECT_GRACE
+            if grace > 0:
+                await session.broadcast(
+                    {
+                        "type": "player_away",
+                        "gameId": game_id,
+                        "playerId": player_id,
+                        "graceSeconds": grace,
+                    },
+                    sender_id=player_id,
+                )
+                schedule_seat_release(grace, game_id, entry, player_id, token)
+            else:
+                await release_seat(game_id, entry, player_id, token)
 
 
 __all__ = ["router"]
 
 
-async def _handle_player_move(
-    game_id: str,
-    player_id: str,
-    message: Dict[str, Any],
-    websocket: WebSocket,
-    game: Connect4Game,
-    session: GameSession,
-) -> Dict[str, Any] | None:
-    column = message.get("column")
-    if not isinstance(column, int):
-        await websocket.send_json(
-            {
-                "type": "error",
-                "gameId": game_id,
-                "playerId": player_id,
-                "detail": "column must be provided as an integer",
-            }
-        )
-        return None
+async def _receive_frame(websocket: WebSocket) -> bytes:
+    """Return the next raw frame so it can be sized before it is decoded."""
 
-    player_color = await session.color_for(player_id)
-    if player_color is not None and player_color != game.state.to_play:
-        await websocket.send_json(
-            {
-                "type": "error",
-                "gameId": game_id,
-                "playerId": player_id,
-                "detail": "Not your turn",
-            }
-        )
-        return None
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", 1000), message.get("reason"))
+    text = message.get("text")
+    if text is not None:
+        return text.encode()
+    return message.get("bytes") or b""
 
-    try:
-        outcome = game.play_turn(column)
-    except (IllegalMoveError, ColumnFullError) as exc:
-        await websocket.send_json(
-            {
-                "type": "error",
-                "gameId": game_id,
-                "playerId": player_id,
-                "detail": str(exc),
-            }
-        )
-        return None
 
-    extra = {
-        key: value
-        for key, value in message.items()
-        if key not in {"column", "gameId", "playerId"}
+def _spectator_snapshot(game_id: str, entry: SessionRegistryEntry) -> Dict[str, Any]:
+    state = entry.board_state
+    players, colors = entry.session.seats_now()
+    return {
+        "type": "spectator_snapshot",
+        "gameId": game_id,
+        "mode": entry.mode.value,
+        "players": players,
+        "colors": {pid: COLOR_NAMES[color] for pid, color in colors.items()},
+        "startingColor": COLOR_NAMES[state.starting_color],
+        "currentTurn": COLOR_NAMES[state.to_play],
+        "moves": state.move_string(),
+        "moveCount": state.move_count,
+        "version": state.version,
+        "board": state.board_schetch(),
     }
-    message_type = extra.pop("type", "move")
-
-    return _build_move_payload(
-        game_id=game_id,
-        player_id=player_id,
-        message_type=message_type,
-        outcome=outcome,
-        turn_index=game.state.move_count,
-        extra=extra,
-    )
 
 
-async def _maybe_trigger_ai_turn(
-    game_id: str,
-    game: Connect4Game,
-    entry: SessionRegistryEntry,
-    session: GameSession,
+async def _send_error(
+    websocket: WebSocket, game_id: str, player_id: str, detail: str
 ) -> None:
-    if entry.mode is not GameMode.SOLO:
-        return
-    if game.is_over():
-        return
-    if game.ai_color is None or game.state.to_play != game.ai_color:
-        return
-
-    playable = list(game.state.playable_columns())
-    if not playable:
-        return
-
-    logger.debug(
-        "AI evaluating turn: game=%s to_play=%s depth=%d playable=%s",
-        game_id,
-        COLOR_NAMES[game.state.to_play],
-        entry.ai_depth,
-        playable,
+    await websocket.send_json(
+        {
+            "type": "error",
+            "gameId": game_id,
+            "playerId": player_id,
+            "detail": detail,
+        }
     )
 
-    try:
-        preferred = calculate_next_move(game.state, depth=entry.ai_depth)
-    except ColumnFullError:
-        preferred = None
-
-    if preferred in playable:
-        playable.remove(preferred)
-        playable.insert(0, preferred)
-    elif preferred is not None:
-        logger.warning(
-            "AI suggested non-playable column %s in game %s", preferred, game_id
-        )
-    else:
-        logger.debug("AI move selection raised ColumnFullError; using fallback")
-
-    outcome: TurnOutcome | None = None
-    chosen_column: int | None = None
-    for column in playable:
-        try:
-            outcome = game.play_turn(column)
-        except ColumnFullError:
-            logger.warning(
-                "AI caught column %s as full in game %s; retrying", column, game_id
-            )
-            continue
-        else:
-            chosen_column = column
-            logger.debug(
-                "AI played column %d in game %s (winner=%s draw=%s)",
-                column,
-                game_id,
-                COLOR_NAMES[outcome.result.winner]
-                if outcome.result.winner is not None
-                else None,
-                outcome.result.draw,
-            )
-            break
-
-    if outcome is None or chosen_column is None:
-        return
 
-    payload = _build_move_payload(
-        game_id=game_id,
-        player_id=ENGINE_PLAYER_ID,
-        message_type="ai_move",
-        outcome=outcome,
-        turn_index=game.state.move_count,
-    )
+async def _get_existing_session(game_id: str) -> SessionRegistryEntry:
+    try:
+        return await get_session(game_id, create_if_missing=False)
+    except KeyError as exc:
+        raise HTTPException(
+            status_code=404, detail=f"Game {game_id!r} not found"
+        ) from exc
 
-    await session.broadcast(payload, sender_id=None, include_sender=True)
 
+def _require_tracing() -> None:
+    if not TRACE_ENABLED:
+        raise HTTPException(status_code=404, detail="Search tracing is disabled")
 
-def _build_move_payload(
-    *,
-    game_id: str,
-    player_id: str,
-    message_type: str,
-    outcome: "TurnOutcome",
-    turn_index: int | None = None,
-    extra: Dict[str, Any] | None = None,
-) -> Dict[str, Any]:
-    payload: Dict[str, Any] = {
-        "type": message_type,
-        "gameId": game_id,
-        "playerId": player_id,
-        "column": outcome.result.column,
-        "color": outcome.player,
-        "colorName": outcome.player_name,
-        "turnIndex": turn_index if turn_index is not None else outcome.turn_index,
-        "bit": outcome.result.bit,
-        "winner": outcome.result.winner,
-        "draw": outcome.result.draw,
-    }
 
-    if outcome.result.winner is not None:
-        payload["winnerName"] = COLOR_NAMES[outcome.result.winner]
+def _board_etag(entry: SessionRegistryEntry, *qualifiers: int) -> str:
+    # The summary sequence distinguishes a recreated game that reuses an id;
+    # ``qualifiers`` separate responses that differ for the same board.
+    sequence = entry.summary.sequence if entry.summary is not None else 0
+    parts = (sequence, entry.board_state.version, *qualifiers)
+    return 'W/"{}"'.format("-".join(str(part) for part in parts))
 
-    if extra:
-        payload.update(extra)
 
-    return payload
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = {candidate.strip() for candidate in header.split(",")}
+    return "*" in candidates or etag in candidates
 
 
-async def _broadcast_session_state(
-    game_id: str, session: GameSession, game: Connect4Game
-) -> None:
-    payload = await _build_session_state_payload(game_id, session, game)
-    await session.broadcast(payload, sender_id=None, include_sender=True)
+def _set_etag(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
 
 
-async def _build_session_state_payload(
-    game_id: str, session: GameSession, game: Connect4Game
-) -> Dict[str, Any]:
-    players = await session.player_ids()
-    player_colors = await session.players_with_colors()
-    return {
-        "type": "session_state",
-        "gameId": game_id,
-        "players": players,
-        "colors": {pid: COLOR_NAMES[color] for pid, color in player_colors.items()},
-        "currentTurn": COLOR_NAMES[game.state.to_play],
-    }
+def _not_modified(etag: str) -> Response:
+    response = Response(status_code=304)
+    _set_etag(response, etag)
+    return response
@@ -0,0 +1,135 @@
+"""Opt-in structured tracing of the AI search tree for selected games.
+
+Tracing is switched on process-wide at import time through the
+``CONNECT4_SEARCH_TRACE`` environment variable. When it is off, no trace object
+is ever created and the search only pays for an ``is None`` check per node.
+When it is on, traces are still only captured for games explicitly selected
+with :func:`enable_search_trace`, so a single match can be inspected without
+flooding the global logs.
+"""
+
+from __future__ import annotations
+
+import os
+from collections import deque
+from typing import Any, Deque, Dict, Final
+
+TRACE_ENABLED: Final[bool] = os.getenv("CONNECT4_SEARCH_TRACE", "0").lower() in {
+    "1",
+    "true",
+    "yes",
+}
+
+DEFAULT_MAX_NODES = 50_000
+MAX_TRACES_PER_GAME = 5
+
+TraceNode = Dict[str, Any]
+
+
+class SearchTrace:
+    """Tree of nodes visited by a single move search."""
+
+    __slots__ = ("game_id", "root", "max_nodes", "node_count", "truncated", "_stack")
+
+    def __init__(self, game_id: str, *, max_nodes: int = DEFAULT_MAX_NODES) -> None:
+        self.game_id = game_id
+        self.root: TraceNode = {"children": []}
+        self.max_nodes = max_nodes
+        self.node_count = 0
+        self.truncated = False
+        # ``None`` entries stand in for nodes dropped once ``max_nodes`` is hit,
+        # keeping enter/exit calls balanced.
+        self._stack: list[TraceNode | None] = [self.root]
+
+    def begin(self, **info: Any) -> None:
+        self.root.update(info)
+
+    def enter(self, column: int, depth: int) -> None:
+        parent = self._stack[-1]
+        if parent is None or self.node_count >= self.max_nodes:
+            self.truncated = True
+            self._stack.append(None)
+            return
+        node: TraceNode = {"column": column, "depth": depth, "children": []}
+        parent["children"].append(node)
+        self.node_count += 1
+        self._stack.append(node)
+
+    def exit(self, score: float, alpha: float, beta: float) -> None:
+        node = self._stack.pop()
+        if node is None:
+            return
+        node["score"] = score
+        node["alpha"] = alpha
+        node["beta"] = beta
+        if beta <= alpha:
+            node["pruned"] = True
+
+    def cut_off(self) -> None:
+        """Close the innermost node when the search stops before scoring it.
+
+        Called in place of :meth:`exit` as the budget exception unwinds, so
+        the stack stays balanced and unfinished nodes are marked as such.
+        """
+        node = self._stack.pop()
+        if node is not None:
+            node["cutOff"] = True
+
+    def finish(self, **info: Any) -> None:
+        self.root.update(info)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "gameId": self.game_id,
+            "nodeCount": self.node_count,
+            "truncated": self.truncated,
+            "tree": self.root,
+        }
+
+
+_traced_games: set[str] = set()
+_captured: Dict[str, Deque[SearchTrace]] = {}
+
+
+def enable_search_trace(game_id: str) -> None:
+    """Start capturing search traces for ``game_id``."""
+
+    if not TRACE_ENABLED:
+        raise RuntimeError("Search tracing is disabled (set CONNECT4_SEARCH_TRACE=1)")
+    _traced_games.add(game_id)
+    _captured.setdefault(game_id, deque(maxlen=MAX_TRACES_PER_GAME))
+
+
+def disable_search_trace(game_id: str) -> None:
+    """Stop capturing for ``game_id`` and drop its stored traces."""
+
+    _traced_games.discard(game_id)
+    _captured.pop(game_id, None)
+
+
+def start_search_trace(game_id: str) -> SearchTrace | None:
+    """Return a fresh trace for ``game_id`` when it is selected, else ``None``."""
+
+    if not TRACE_ENABLED or game_id not in _traced_games:
+        return None
+    trace = SearchTrace(game_id)
+    _captured[game_id].append(trace)
+    return trace
+
+
+def captured_search_traces(game_id: str) -> list[Dict[str, Any]] | None:
+    """Return the most recent traces for ``game_id``, or ``None`` if not traced."""
+
+    if game_id not in _traced_games:
+        return None
+    return [trace.to_dict() for trace in _captured.get(game_id, ())]
+
+
+__all__ = [
+    "SearchTrace",
+    "TRACE_ENABLED",
+    "captured_search_traces",
+    "disable_search_trace",
+    "enable_search_trace",
+    "start_search_trace",
+]
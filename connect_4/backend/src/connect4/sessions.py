@@ -3,14 +3,30 @@
 from __future__ import annotations
 
 import asyncio
+import itertools
 import logging
+from bisect import bisect_right
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any, Dict, Mapping
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Mapping
 
 from fastapi import WebSocket
 
-from src.connect4.datamodel import BitboardState, Color, YELLOW, other_color
+from .datamodel import BitboardState, Color, YELLOW, other_color
+
+from .metrics import (
+    ACTIVE_SESSIONS,
+    BROADCAST_ERRORS,
+    BROADCAST_MESSAGES,
+    BROADCAST_SECONDS,
+    CONNECTED_PLAYERS,
+    SESSIONS_CREATED,
+)
+from .search_trace import disable_search_trace
+from .spectators import SpectatorHub
+
+if TYPE_CHECKING:
+    from .engine import SessionEngine
 
 logger = logging.getLogger(__name__)
 
@@ -31,16 +47,54 @@ class DifficultyLevel(str, Enum):
     EXPERT = "expert"
 
 
+@dataclass(frozen=True, slots=True)
+class DifficultyPreset:
+    """Search limits for one difficulty level.
+
+    The search deepens iteratively up to ``max_depth`` and keeps the result of
+    the last depth it finished within ``node_budget`` positions and
+    ``time_budget`` seconds. ``eval_noise`` perturbs the score of positions
+    cut off by the depth limit, so weaker presets miss quiet threats while
+    still taking wins and blocking immediate losses.
+    """
+
+    max_depth: int
+    node_budget: int
+    time_budget: float
+    eval_noise: float = 0.0
+
+
+DIFFICULTY_PRESETS: Dict[DifficultyLevel, DifficultyPreset] = {
+    DifficultyLevel.CASUAL: DifficultyPreset(
+        max_depth=3, node_budget=1_000, time_budget=0.05, eval_noise=0.6
+    ),
+    DifficultyLevel.STANDARD: DifficultyPreset(
+        max_depth=5, node_budget=10_000, time_budget=0.15, eval_noise=0.25
+    ),
+    DifficultyLevel.CHALLENGER: DifficultyPreset(
+        max_depth=7, node_budget=100_000, time_budget=0.5, eval_noise=0.05
+    ),
+    DifficultyLevel.EXPERT: DifficultyPreset(
+        max_depth=9, node_budget=250_000, time_budget=1.5
+    ),
+}
+
+# Kept for API compatibility: the depth each preset searches to at most.
 DIFFICULTY_DEPTH: Dict[DifficultyLevel, int] = {
-    DifficultyLevel.CASUAL: 3,
-    DifficultyLevel.STANDARD: 5,
-    DifficultyLevel.CHALLENGER: 7,
-    DifficultyLevel.EXPERT: 9,
+    level: preset.max_depth for level, preset in DIFFICULTY_PRESETS.items()
 }
 
 DEFAULT_DIFFICULTY = DifficultyLevel.STANDARD
 
 
+class Occupancy(str, Enum):
+    """Seat availability filters for session listings."""
+
+    EMPTY = "empty"
+    OPEN = "open"
+    FULL = "full"
+
+
 def _default_ai_depth() -> int:
     return DIFFICULTY_DEPTH[DEFAULT_DIFFICULTY]
 
@@ -73,6 +127,13 @@ class SessionModeConflictError(Exception):
         self.requested = requested
 
 
+class RegistryClosedError(Exception):
+    """Raised when creating a session while the server is shutting down."""
+
+    def __init__(self) -> None:
+        super().__init__("Server is shutting down; no new games can start")
+
+
 class SessionAlreadyExistsError(Exception):
     """Raised when attempting to explicitly create an already registered session."""
 
@@ -81,6 +142,45 @@ class SessionAlreadyExistsError(Exception):
         self.game_id = game_id
 
 
+@dataclass(slots=True)
+class SessionSummary:
+    """Lightweight listing view of a session, kept current on connect/disconnect.
+
+    Listing endpoints read these without touching per-session locks.
+    """
+
+    game_id: str
+    sequence: int
+    mode: GameMode
+    difficulty: DifficultyLevel
+    ai_depth: int
+    capacity: int
+    players: tuple[str, ...] = ()
+    seats_taken: int = 0
+    reserved: bool = False
+
+    def matches(
+        self, mode: GameMode | None = None, occupancy: Occupancy | None = None
+    ) -> bool:
+        if mode is not None and self.mode is not mode:
+            return False
+        if occupancy is Occupancy.EMPTY:
+            return not self.players
+        if occupancy is Occupancy.OPEN:
+            return not self.reserved and self.seats_taken < self.capacity
+        if occupancy is Occupancy.FULL:
+            return self.seats_taken >= self.capacity
+        return True
+
+
+@dataclass(slots=True)
+class Seat:
+    """Seat granted to a connecting player."""
+
+    color: Color
+    resumed: bool = False
+
+
 @dataclass(slots=True)
 class SessionRegistryEntry:
     """Stores metadata for active sessions."""
@@ -91,6 +191,12 @@ class SessionRegistryEntry:
     difficulty: DifficultyLevel = DEFAULT_DIFFICULTY
     ai_depth: int = field(default_factory=_default_ai_depth)
     starting_color: Color = YELLOW
+    summary: SessionSummary | None = None
+    engine: "SessionEngine | None" = None
+
+    @property
+    def preset(self) -> DifficultyPreset:
+        return DIFFICULTY_PRESETS[self.difficulty]
 
 
 class GameSession:
@@ -102,31 +208,52 @@ class GameSession:
         *,
         capacity: int | None = None,
         starting_color: Color = YELLOW,
+        reserved_for: Iterable[str] = (),
     ) -> None:
         self.mode = mode
         self._capacity = capacity or (1 if mode is GameMode.SOLO else 2)
+        self._reserved = frozenset(reserved_for)
+        # Reserved players who have not connected yet; the session is not
+        # empty while any are expected, so it waits for them to arrive.
+        self._expected = set(self._reserved)
+        self._summary: SessionSummary | None = None
         self._players: Dict[str, WebSocket] = {}
         self._player_colors: Dict[str, Color] = {}
+        # Players whose connection dropped but whose seat is still held,
+        # mapped to the token that may release it.
+        self._away: Dict[str, int] = {}
+        self._away_tokens = itertools.count(1)
         self._color_slots: Dict[Color, str | None] = {
             starting_color: None,
             other_color(starting_color): None,
         }
         self._lock = asyncio.Lock()
+        # Read-only watchers, held apart from players and never counted
+        # against ``capacity``.
+        self.spectators = SpectatorHub()
 
     @property
     def capacity(self) -> int:
         return self._capacity
 
-    async def connect(self, player_id: str, websocket: WebSocket) -> Color:
+    @property
+    def reserved_for(self) -> frozenset[str]:
+        """Players the seats are held for; empty when anyone may join."""
+        return self._reserved
+
+    async def connect(self, player_id: str, websocket: WebSocket) -> Seat:
         close_previous: WebSocket | None = None
         assigned_color: Color | None = None
         async with self._lock:
+            if self._reserved and player_id not in self._reserved:
+                raise SessionFullError()
             existing = self._players.get(player_id)
-            if existing is None and len(self._players) >= self._capacity:
+            seated = player_id in self._player_colors
+            if not seated and len(self._player_colors) >= self._capacity:
                 raise SessionFullError()
             if existing is not None and existing is not websocket:
                 close_previous = existing
-            if player_id in self._player_colors:
+            if seated:
                 assigned_color = self._player_colors[player_id]
             else:
                 for color, occupant in self._color_slots.items():
@@ -137,24 +264,97 @@ class GameSession:
                 if assigned_color is None:
                     raise SessionFullError()
                 self._player_colors[player_id] = assigned_color
+            resumed = self._away.pop(player_id, None) is not None
+            self._expected.discard(player_id)
+            if existing is None:
+                CONNECTED_PLAYERS.inc()
             self._players[player_id] = websocket
+            self._publish_players()
             logger.debug("Player %s joined session", player_id)
 
         if close_previous is not None:
             await close_previous.close(code=1012)
 
         await websocket.accept()
-        return assigned_color if assigned_color is not None else YELLOW
+        return Seat(
+            color=assigned_color if assigned_color is not None else YELLOW,
+            resumed=resumed,
+        )
+
+    async def hold_seat(self, player_id: str, color: Color) -> int:
+        """Seat an absent player, as :meth:`detach` would after a drop.
+
+        Used when restoring a snapshot; returns the token for :meth:`release`.
+        """
+        async with self._lock:
+            self._color_slots[color] = player_id
+            self._player_colors[player_id] = color
+            token = next(self._away_tokens)
+            self._away[player_id] = token
+            self._publish_players()
+            return token
+
+    async def expire_reservation(self) -> None:
+        """Stop waiting for reserved players who never connected.
+
+        Their seats stay reserved; the session just no longer counts them
+        when deciding whether it is empty.
+        """
+        async with self._lock:
+            self._expected.clear()
+
+    async def close_all(self, code: int, reason: str = "") -> None:
+        """Close every player and spectator socket.
+
+        Player handlers then detach as usual.
+        """
+        async with self._lock:
+            websockets = list(self._players.values())
+        await self.spectators.close(code, reason)
+        results = await asyncio.gather(
+            *(websocket.close(code=code, reason=reason) for websocket in websockets),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                logger.debug("Closing websocket failed: %s", result)
 
     async def disconnect(self, player_id: str) -> None:
         async with self._lock:
             if player_id in self._players:
                 self._players.pop(player_id)
+                CONNECTED_PLAYERS.dec()
                 logger.debug("Player %s left session", player_id)
-            if player_id in self._player_colors:
-                color = self._player_colors.pop(player_id)
-                if self._color_slots.get(color) == player_id:
-                    self._color_slots[color] = None
+            self._away.pop(player_id, None)
+            self._free_seat(player_id)
+            self._publish_players()
+
+    async def detach(self, player_id: str, websocket: WebSocket) -> int | None:
+        """Drop ``websocket`` but keep its player's seat for a later resume.
+
+        Returns a token for :meth:`release`, or ``None`` when the socket had
+        already been replaced by a newer connection from the same player.
+        """
+        async with self._lock:
+            if self._players.get(player_id) is not websocket:
+                return None
+            self._players.pop(player_id)
+            CONNECTED_PLAYERS.dec()
+            self._publish_players()
+            token = next(self._away_tokens)
+            self._away[player_id] = token
+            return token
+
+    async def release(self, player_id: str, token: int) -> bool:
+        """Free a detached player's seat unless they came back since ``token``."""
+        async with self._lock:
+            if self._away.get(player_id) != token:
+                return False
+            del self._away[player_id]
+            self._free_seat(player_id)
+            self._publish_players()
+            logger.debug("Player %s left session", player_id)
+            return True
 
     async def send_to(self, player_id: str, message: Mapping[str, Any]) -> None:
         async with self._lock:
@@ -172,6 +372,9 @@ class GameSession:
         sender_id: str | None = None,
         include_sender: bool = False,
     ) -> None:
+        # Published before the first await so spectators see messages in the
+        # order the board changed, and without ever waiting on them.
+        self.spectators.publish(message)
         async with self._lock:
             recipients = [
                 websocket
@@ -183,14 +386,17 @@ class GameSession:
 
         payload = dict(message)
         coros = tuple(recipient.send_json(payload) for recipient in recipients)
-        results = await asyncio.gather(*coros, return_exceptions=True)
+        with BROADCAST_SECONDS.time():
+            results = await asyncio.gather(*coros, return_exceptions=True)
+        BROADCAST_MESSAGES.inc(len(recipients))
         for result in results:
             if isinstance(result, Exception):
+                BROADCAST_ERRORS.inc()
                 logger.warning("WebSocket broadcast error: %s", result)
 
     async def is_empty(self) -> bool:
         async with self._lock:
-            return not self._players
+            return not (self._players or self._player_colors or self._expected)
 
     async def player_ids(self) -> list[str]:
         async with self._lock:
@@ -204,34 +410,151 @@ class GameSession:
         async with self._lock:
             return dict(self._player_colors)
 
+    def seats_now(self) -> tuple[list[str], Dict[str, Color]]:
+        """Connected players and seat colors without awaiting the lock.
+
+        Seats only change under the lock with no await in between, so this is
+        a consistent view; spectator snapshots need it to avoid yielding.
+        """
+        return list(self._players), dict(self._player_colors)
+
+    def _free_seat(self, player_id: str) -> None:
+        # Caller holds ``self._lock``.
+        color = self._player_colors.pop(player_id, None)
+        if color is not None and self._color_slots.get(color) == player_id:
+            self._color_slots[color] = None
+
+    def _publish_players(self) -> None:
+        # Caller holds ``self._lock``. Swapping in a fresh tuple means lock-free
+        # readers never observe a partially updated player list.
+        if self._summary is not None:
+            self._summary.players = tuple(self._players)
+            self._summary.seats_taken = len(self._player_colors)
+
 
 sessions: Dict[str, SessionRegistryEntry] = {}
 sessions_lock = asyncio.Lock()
 
+# Listing index ordered by creation sequence; pagination cursors are sequence
+# numbers, so a page lookup is a bisect rather than a scan from the start.
+_summary_index: Dict[int, SessionSummary] = {}
+_summary_order: list[int] = []
+_summary_sequence = itertools.count(1)
+
+# Cleared while draining for shutdown so no new games start mid-snapshot.
+_accepting_sessions = True
+
+
+def open_registry() -> None:
+    global _accepting_sessions
+    _accepting_sessions = True
+
+
+def close_registry() -> None:
+    """Refuse new sessions; existing ones keep working."""
+    global _accepting_sessions
+    _accepting_sessions = False
+
+
+def _new_entry(
+    game_id: str,
+    mode: GameMode,
+    difficulty: DifficultyLevel | None,
+    reserved_for: Iterable[str] = (),
+    *,
+    starting_color: Color | None = None,
+    board_state: BitboardState | None = None,
+) -> SessionRegistryEntry:
+    # Caller holds ``sessions_lock``.
+    if not _accepting_sessions:
+        raise RegistryClosedError()
+    chosen_difficulty = difficulty or DEFAULT_DIFFICULTY
+    if starting_color is None:
+        starting_color = (
+            _cycle_starting_color() if mode is GameMode.MULTIPLAYER else YELLOW
+        )
+    ai_depth = DIFFICULTY_DEPTH[chosen_difficulty]
+    session = GameSession(
+        mode, starting_color=starting_color, reserved_for=reserved_for
+    )
+    summary = SessionSummary(
+        game_id=game_id,
+        sequence=next(_summary_sequence),
+        mode=mode,
+        difficulty=chosen_difficulty,
+        ai_depth=ai_depth,
+        capacity=session.capacity,
+        reserved=bool(session.reserved_for),
+    )
+    session._summary = summary
+    entry = SessionRegistryEntry(
+        mode=mode,
+        session=session,
+        board_state=board_state or BitboardState(to_play=starting_color),
+        difficulty=chosen_difficulty,
+        ai_depth=ai_depth,
+        starting_color=starting_color,
+        summary=summary,
+    )
+    sessions[game_id] = entry
+    SESSIONS_CREATED.inc(mode=mode.value)
+    ACTIVE_SESSIONS.inc(mode=mode.value)
+    _summary_index[summary.sequence] = summary
+    _summary_order.append(summary.sequence)
+    return entry
+
+
+def _drop_entry(game_id: str) -> None:
+    # Caller holds ``sessions_lock``.
+    entry = sessions.pop(game_id)
+    ACTIVE_SESSIONS.dec(mode=entry.mode.value)
+    # Traces are keyed by game id; drop them with the game they describe.
+    disable_search_trace(game_id)
+    if entry.summary is None:
+        return
+    sequence = entry.summary.sequence
+    _summary_index.pop(sequence, None)
+    position = bisect_right(_summary_order, sequence) - 1
+    if position >= 0 and _summary_order[position] == sequence:
+        del _summary_order[position]
+
 
 async def create_session(
     game_id: str,
     mode: GameMode,
     difficulty: DifficultyLevel | None = None,
+    *,
+    reserved_for: Iterable[str] = (),
 ) -> SessionRegistryEntry:
+    """Register a new session, optionally holding its seats for given players."""
     async with sessions_lock:
         if game_id in sessions:
             raise SessionAlreadyExistsError(game_id)
-        chosen_difficulty = difficulty or DEFAULT_DIFFICULTY
-        starting_color = (
-            _cycle_starting_color() if mode is GameMode.MULTIPLAYER else YELLOW
-        )
-        board_state = BitboardState(to_play=starting_color)
-        entry = SessionRegistryEntry(
-            mode=mode,
-            session=GameSession(mode, starting_color=starting_color),
-            board_state=board_state,
-            difficulty=chosen_difficulty,
-            ai_depth=DIFFICULTY_DEPTH[chosen_difficulty],
+        return _new_entry(game_id, mode, difficulty, reserved_for)
+
+
+async def restore_session(
+    game_id: str,
+    mode: GameMode,
+    difficulty: DifficultyLevel,
+    *,
+    starting_color: Color,
+    moves: str,
+    reserved_for: Iterable[str] = (),
+) -> SessionRegistryEntry:
+    """Re-register a session from a snapshot, replaying its moves."""
+    board_state = BitboardState.from_moves(moves, starting_color=starting_color)
+    async with sessions_lock:
+        if game_id in sessions:
+            raise SessionAlreadyExistsError(game_id)
+        return _new_entry(
+            game_id,
+            mode,
+            difficulty,
+            reserved_for,
             starting_color=starting_color,
+            board_state=board_state,
         )
-        sessions[game_id] = entry
-        return entry
 
 
 async def get_session(
@@ -246,21 +569,7 @@ async def get_session(
         if entry is None:
             if not create_if_missing:
                 raise KeyError(game_id)
-            new_mode = mode or GameMode.MULTIPLAYER
-            chosen_difficulty = difficulty or DEFAULT_DIFFICULTY
-            starting_color = (
-                _cycle_starting_color() if new_mode is GameMode.MULTIPLAYER else YELLOW
-            )
-            board_state = BitboardState(to_play=starting_color)
-            entry = SessionRegistryEntry(
-                mode=new_mode,
-                session=GameSession(new_mode, starting_color=starting_color),
-                board_state=board_state,
-                difficulty=chosen_difficulty,
-                ai_depth=DIFFICULTY_DEPTH[chosen_difficulty],
-                starting_color=starting_color,
-            )
-            sessions[game_id] = entry
+            entry = _new_entry(game_id, mode or GameMode.MULTIPLAYER, difficulty)
         elif mode is not None and entry.mode is not mode:
             raise SessionModeConflictError(game_id, entry.mode, mode)
         elif (
@@ -277,12 +586,18 @@ async def get_session(
         return entry
 
 
-async def discard_session(game_id: str, session: GameSession) -> None:
+async def discard_session(game_id: str, session: GameSession) -> bool:
+    """Remove the session if it is still registered and empty.
+
+    Returns ``True`` when the entry was removed.
+    """
     async with sessions_lock:
         entry = sessions.get(game_id)
         if entry and entry.session is session and await session.is_empty():
-            sessions.pop(game_id)
+            _drop_entry(game_id)
             logger.debug("Removed empty session for game %s", game_id)
+            return True
+        return False
 
 
 async def reset_session(game_id: str) -> SessionRegistryEntry:
@@ -296,13 +611,7 @@ async def reset_session(game_id: str) -> SessionRegistryEntry:
         else:
             starting_color = YELLOW
 
-        state = entry.board_state
-        state._boards[0] = 0
-        state._boards[1] = 0
-        state.mask = 0
-        state.move_count = 0
-        state._last_result = None
-        state.to_play = starting_color
+        entry.board_state.reset(starting_color)
 
         entry.starting_color = starting_color
         return entry
@@ -313,19 +622,57 @@ async def snapshot_sessions() -> list[tuple[str, SessionRegistryEntry]]:
         return list(sessions.items())
 
 
+def list_session_summaries(
+    *,
+    limit: int,
+    cursor: int | None = None,
+    mode: GameMode | None = None,
+    occupancy: Occupancy | None = None,
+) -> tuple[list[SessionSummary], int | None]:
+    """Return one page of session summaries and the cursor for the next page.
+
+    Runs synchronously without awaiting, so it needs neither the registry lock
+    nor any per-session lock. ``cursor`` is the ``sequence`` of the last summary
+    from the previous page; the returned cursor is ``None`` on the last page.
+    """
+
+    start = bisect_right(_summary_order, cursor) if cursor is not None else 0
+    page: list[SessionSummary] = []
+    # Index from ``start`` rather than islice, which would step over every
+    # earlier entry and make deep pages cost O(offset).
+    for index in range(start, len(_summary_order)):
+        summary = _summary_index[_summary_order[index]]
+        if not summary.matches(mode, occupancy):
+            continue
+        if len(page) == limit:
+            return page, page[-1].sequence
+        page.append(summary)
+    return page, None
+
+
 __all__ = [
     "GameMode",
     "DifficultyLevel",
     "GameSession",
+    "Occupancy",
+    "RegistryClosedError",
     "SessionAlreadyExistsError",
     "SessionFullError",
     "SessionModeConflictError",
+    "Seat",
     "SessionRegistryEntry",
+    "SessionSummary",
     "DIFFICULTY_DEPTH",
+    "DIFFICULTY_PRESETS",
+    "DifficultyPreset",
     "DEFAULT_DIFFICULTY",
+    "close_registry",
     "create_session",
     "discard_session",
     "get_session",
+    "list_session_summaries",
+    "open_registry",
     "reset_session",
+    "restore_session",
     "snapshot_sessions",
 ]
@@ -0,0 +1,148 @@
+"""Read-only spectator fan-out for a single game.
+
+Session broadcasts are published to the game's :class:`SpectatorHub` without
+awaiting anything, so players never wait on spectators. Publishing serialises
+each message once and hands the text straight to every spectator's bounded
+queue; a writer task per spectator drains that queue into its socket. Since
+the hand-off is synchronous, a spectator subscribed between two publishes gets
+exactly the messages published after its snapshot. A
+spectator whose queue is full is too slow to keep up and is disconnected
+(close code 1013) instead of buffering without limit; it can reconnect for a
+fresh snapshot.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+from typing import Any, Mapping
+
+from fastapi import WebSocket
+
+from .metrics import SPECTATOR_MESSAGES, SPECTATORS, SPECTATORS_DROPPED
+
+logger = logging.getLogger(__name__)
+
+MAX_SPECTATORS = int(os.getenv("CONNECT4_MAX_SPECTATORS", "500"))
+SPECTATOR_QUEUE_SIZE = int(os.getenv("CONNECT4_SPECTATOR_QUEUE_SIZE", "64"))
+
+SLOW_SPECTATOR_CLOSE_CODE = 1013
+
+
+class SpectatorLimitError(Exception):
+    """Raised when a game already has ``MAX_SPECTATORS`` watching."""
+
+
+class Spectator:
+    """One watching socket and the messages waiting to be written to it."""
+
+    __slots__ = ("websocket", "queue", "task")
+
+    def __init__(self, websocket: WebSocket, queue_size: int) -> None:
+        self.websocket = websocket
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize=queue_size)
+        self.task: asyncio.Task[None] | None = None
+
+    async def _write(self) -> None:
+        while True:
+            text = await self.queue.get()
+            await self.websocket.send_text(text)
+            SPECTATOR_MESSAGES.inc()
+
+
+class SpectatorHub:
+    """Spectators of one game and the publishing side of their queues."""
+
+    def __init__(self) -> None:
+        self._spectators: dict[WebSocket, Spectator] = {}
+
+    def __len__(self) -> int:
+        return len(self._spectators)
+
+    def publish(self, message: Mapping[str, Any]) -> None:
+        """Queue ``message`` for every spectator; never blocks."""
+
+        if not self._spectators:
+            return
+        text = json.dumps(dict(message))
+        for spectator in list(self._spectators.values()):
+            try:
+                spectator.queue.put_nowait(text)
+            except asyncio.QueueFull:
+                self._drop(spectator)
+
+    def subscribe(self, websocket: WebSocket, snapshot: Mapping[str, Any]) -> Spectator:
+        """Register an accepted socket, delivering ``snapshot`` before any delta.
+
+        Runs without awaiting, so no broadcast can slip in between the snapshot
+        being taken and the subscription taking effect.
+        """
+
+        if len(self._spectators) >= MAX_SPECTATORS:
+            raise SpectatorLimitError()
+        spectator = Spectator(websocket, SPECTATOR_QUEUE_SIZE)
+        spectator.queue.put_nowait(json.dumps(snapshot))
+        spectator.task = asyncio.create_task(spectator._write())
+        spectator.task.add_done_callback(
+            lambda task: self._writer_done(spectator, task)
+        )
+        self._spectators[websocket] = spectator
+        SPECTATORS.inc()
+        return spectator
+
+    def unsubscribe(self, websocket: WebSocket) -> None:
+        spectator = self._spectators.pop(websocket, None)
+        if spectator is None:
+            return
+        SPECTATORS.dec()
+        if spectator.task is not None:
+            spectator.task.cancel()
+
+    async def close(self, code: int = 1000, reason: str = "") -> None:
+        """Disconnect every spectator."""
+
+        spectators = list(self._spectators.values())
+        for spectator in spectators:
+            self.unsubscribe(spectator.websocket)
+        await asyncio.gather(
+            *(
+                spectator.websocket.close(code=code, reason=reason)
+                for spectator in spectators
+            ),
+            return_exceptions=True,
+        )
+
+    def _drop(self, spectator: Spectator) -> None:
+        SPECTATORS_DROPPED.inc()
+        logger.info(
+            "Dropping a spectator %d messages behind", SPECTATOR_QUEUE_SIZE
+        )
+        self.unsubscribe(spectator.websocket)
+        task = asyncio.create_task(
+            spectator.websocket.close(
+                code=SLOW_SPECTATOR_CLOSE_CODE, reason="Spectator too slow"
+            )
+        )
+        task.add_done_callback(_ignore_result)
+
+    def _writer_done(self, spectator: Spectator, task: asyncio.Task[None]) -> None:
+        # A failed send means the socket is gone; forget the spectator.
+        if not task.cancelled() and task.exception() is not None:
+            self.unsubscribe(spectator.websocket)
+
+
+def _ignore_result(task: asyncio.Task[Any]) -> None:
+    if not task.cancelled():
+        task.exception()
+
+
+__all__ = [
+    "MAX_SPECTATORS",
+    "SLOW_SPECTATOR_CLOSE_CODE",
+    "SPECTATOR_QUEUE_SIZE",
+    "Spectator",
+    "SpectatorHub",
+    "SpectatorLimitError",
+]
@@ -0,0 +1,193 @@
+"""Learn evaluation weights from self-play.
+
+Each generation plays ``--games`` games in which both sides search with the
+current weights (generation zero has none yet and relies on search and noise
+alone), records the pattern features of every position and labels them
+with the final result from yellow's point of view, discounted by the number of
+plies left. A NumPy gradient descent then fits
+``SCORE_SCALE * tanh(features @ weights)`` to those labels and the next
+generation plays with the new weights. Run it offline, on CPU::
+
+    python -m connect4.training --generations 3 --games 200
+
+The result overwrites the bundled ``eval_weights.npz`` unless ``--output`` says
+otherwise; restart the server to pick it up.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import random
+from pathlib import Path
+from typing import Sequence
+
+import numpy as np
+
+from .datamodel import YELLOW, BitboardState
+from .evaluation import (
+    DEFAULT_WEIGHTS_PATH,
+    FEATURE_NAMES,
+    SCORE_SCALE,
+    LinearEvaluator,
+    pattern_features,
+)
+from .game import calculate_next_move
+from .sessions import DifficultyPreset
+
+logger = logging.getLogger(__name__)
+
+SELF_PLAY_PRESET = DifficultyPreset(
+    max_depth=3, node_budget=5_000, time_budget=1.0, eval_noise=0.05
+)
+
+
+def self_play_game(
+    evaluator: LinearEvaluator | None,
+    rng: random.Random,
+    *,
+    preset: DifficultyPreset = SELF_PLAY_PRESET,
+    opening_plies: int = 4,
+    exploration: float = 0.1,
+) -> tuple[list[tuple[int, ...]], int]:
+    """Play one game; return the features of each position and the result.
+
+    The result is ``1`` for a yellow win, ``-1`` for red and ``0`` for a draw.
+    """
+
+    state = BitboardState()
+    positions: list[tuple[int, ...]] = []
+    while True:
+        last = state.last_result
+        if last is not None and (last.winner is not None or last.draw):
+            break
+        columns = list(state.playable_columns())
+        if state.move_count < opening_plies or rng.random() < exploration:
+            column = rng.choice(columns)
+        else:
+            column = calculate_next_move(
+                state.copy(), preset=preset, rng=rng, evaluator=evaluator
+            )
+        state.drop(column)
+        positions.append(pattern_features(state))
+
+    winner = state.last_result.winner if state.last_result else None
+    if winner is None:
+        return positions, 0
+    return positions, 1 if winner == YELLOW else -1
+
+
+def collect(
+    evaluator: LinearEvaluator | None,
+    games: int,
+    rng: random.Random,
+    *,
+    discount: float,
+) -> tuple[np.ndarray, np.ndarray]:
+    features: list[tuple[int, ...]] = []
+    targets: list[float] = []
+    for _ in range(games):
+        positions, result = self_play_game(evaluator, rng)
+        remaining = len(positions)
+        for index, position in enumerate(positions[:-1]):
+            # The final position is decided; the search scores it exactly.
+            features.append(position)
+            targets.append(result * SCORE_SCALE * discount ** (remaining - index - 1))
+    return np.asarray(features, dtype=np.float64), np.asarray(targets)
+
+
+def fit(
+    features: np.ndarray,
+    targets: np.ndarray,
+    *,
+    initial: np.ndarray | None = None,
+    epochs: int = 2_000,
+    learning_rate: float = 0.05,
+    l2: float = 1e-4,
+) -> np.ndarray:
+    """Least-squares fit of ``SCORE_SCALE * tanh(features @ w)`` to ``targets``."""
+
+    # Scale columns to unit spread so one learning rate suits every feature.
+    spread = features.std(axis=0)
+    spread[spread == 0] = 1.0
+    scaled = features / spread
+    weights = (
+        np.zeros(features.shape[1]) if initial is None else initial * spread
+    )
+    count = len(targets)
+    for _ in range(epochs):
+        activation = np.tanh(scaled @ weights)
+        error = SCORE_SCALE * activation - targets
+        gradient = scaled.T @ (error * SCORE_SCALE * (1 - activation**2)) / count
+        weights -= learning_rate * (gradient + l2 * weights)
+    return weights / spread
+
+
+def train(
+    *,
+    generations: int,
+    games: int,
+    seed: int,
+    discount: float,
+    epochs: int,
+    learning_rate: float,
+) -> LinearEvaluator:
+    rng = random.Random(seed)
+    evaluator: LinearEvaluator | None = None
+    features = np.empty((0, len(FEATURE_NAMES)))
+    targets = np.empty(0)
+    for generation in range(generations):
+        new_features, new_targets = collect(evaluator, games, rng, discount=discount)
+        features = np.concatenate([features, new_features])
+        targets = np.concatenate([targets, new_targets])
+        weights = fit(
+            features,
+            targets,
+            initial=None if evaluator is None else evaluator.weights,
+            epochs=epochs,
+            learning_rate=learning_rate,
+        )
+        evaluator = LinearEvaluator(weights)
+        error = np.mean((evaluator.evaluate_batch(features) - targets) ** 2)
+        logger.info(
+            "generation %d: %d positions, mse %.4f, weights %s",
+            generation,
+            len(targets),
+            error,
+            {name: round(float(w), 4) for name, w in zip(FEATURE_NAMES, weights)},
+        )
+    if evaluator is None:
+        raise ValueError("Training needs at least one generation.")
+    return evaluator
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--generations", type=int, default=3)
+    parser.add_argument("--games", type=int, default=200, help="Games per generation.")
+    parser.add_argument("--discount", type=float, default=0.95)
+    parser.add_argument("--epochs", type=int, default=2_000)
+    parser.add_argument("--learning-rate", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=DEFAULT_WEIGHTS_PATH)
+    args = parser.parse_args(argv)
+    if args.generations < 1:
+        parser.error("--generations must be at least 1")
+    if args.games < 1:
+        parser.error("--games must be at least 1")
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    evaluator = train(
+        generations=args.generations,
+        games=args.games,
+        seed=args.seed,
+        discount=args.discount,
+        epochs=args.epochs,
+        learning_rate=args.learning_rate,
+    )
+    evaluator.save(args.output)
+    logger.info("Saved weights to %s", args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import random
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+import pytest
+
+from connect4.datamodel import BOARD_HEIGHT, BOARD_WIDTH, BitboardState, RED, YELLOW
+from connect4.evaluation import (
+    FEATURE_NAMES,
+    LinearEvaluator,
+    active_evaluator,
+    install_evaluator,
+    load_default_evaluator,
+    pattern_features,
+)
+from connect4.game import calculate_next_move
+from connect4.sessions import DIFFICULTY_PRESETS, DifficultyLevel
+
+
+@pytest.fixture(autouse=True)
+def _restore_active_evaluator() -> Iterator[None]:
+    previous = active_evaluator()
+    yield
+    install_evaluator(previous)
+
+
+def _cells(state: BitboardState, color: int) -> set[tuple[int, int]]:
+    board = state.board(color)
+    return {
+        (column, row)
+        for column in range(BOARD_WIDTH)
+        for row in range(BOARD_HEIGHT)
+        if board >> (column * (BOARD_HEIGHT + 1) + row) & 1
+    }
+
+
+def _reference_windows(own: set, other: set) -> tuple[int, int, int]:
+    counts = [0, 0, 0, 0, 0]
+    for column in range(BOARD_WIDTH):
+        for row in range(BOARD_HEIGHT):
+            for dc, dr in ((1, 0), (0, 1), (1, 1), (1, -1)):
+                window = [(column + k * dc, row + k * dr) for k in range(4)]
+                if not all(
+                    0 <= c < BOARD_WIDTH and 0 <= r < BOARD_HEIGHT for c, r in window
+                ):
+                    continue
+                if any(cell in other for cell in window):
+                    continue
+                counts[sum(cell in own for cell in window)] += 1
+    return counts[1], counts[2], counts[3]
+
+
+def test_window_features_match_cell_by_cell_count() -> None:
+    rng = random.Random(7)
+    for _ in range(50):
+        state = BitboardState()
+        for _ in range(rng.randint(0, 20)):
+            result = state.drop(rng.choice(list(state.playable_columns())))
+            if result.winner is not None:
+                state.undo_last_move()
+                break
+
+        yellow, red = _cells(state, YELLOW), _cells(state, RED)
+        expected = [
+            a - b
+            for a, b in zip(
+                _reference_windows(yellow, red), _reference_windows(red, yellow)
+            )
+        ]
+        assert list(pattern_features(state)[:3]) == expected
+
+
+def test_threat_features_count_empty_winning_cells() -> None:
+    # Yellow: open-ended three in the bottom row. Red: three stacked in the
+    # last column, threatening its fourth row.
+    state = BitboardState.from_moves("273747")
+    features = dict(zip(FEATURE_NAMES, pattern_features(state)))
+
+    assert features["odd_threats"] == 2
+    assert features["even_threats"] == -1
+    assert features["playable_threats"] == 1
+
+
+def test_weights_round_trip(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    evaluator = LinearEvaluator(np.arange(len(FEATURE_NAMES), dtype=float) / 10)
+    path = tmp_path / "weights.npz"
+    evaluator.save(path)
+
+    monkeypatch.setenv("CONNECT4_EVAL_WEIGHTS", str(path))
+    loaded = load_default_evaluator()
+
+    assert loaded is not None
+    np.testing.assert_allclose(loaded.weights, evaluator.weights)
+    state = BitboardState.from_moves("4455")
+    assert loaded(state) == pytest.approx(evaluator(state))
+    features = np.array([pattern_features(state)], dtype=float)
+    assert loaded.evaluate_batch(features)[0] == pytest.approx(loaded(state))
+
+
+def test_bundled_weights_load_and_steer_presets() -> None:
+    evaluator = load_default_evaluator()
+    assert evaluator is not None
+
+    # Red must block yellow's three in the bottom row.
+    state = BitboardState.from_moves("17273")
+    assert state.to_play == RED
+    move = calculate_next_move(
+        state,
+        preset=DIFFICULTY_PRESETS[DifficultyLevel.CHALLENGER],
+        rng=random.Random(0),
+    )
+    assert move == 3
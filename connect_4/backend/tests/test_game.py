@@ -1,19 +1,43 @@
 from __future__ import annotations
 
+import asyncio
+import random
+import time
+
 import pytest
 
 from connect4.datamodel import (
     BOARD_CAPACITY,
     BOARD_WIDTH,
     COLUMN_TOP_MASK,
+    STANDARD,
     BitboardState,
+    BoardGeometry,
     ColumnFullError,
+    IllegalMoveError,
     RED,
     YELLOW,
     has_connect_four,
 )
-from connect4.game import Connect4Game, TurnRole, calculate_next_move
-from connect4.sessions import GameMode
+from connect4.engine import EngineStoppedError, SessionEngine
+from connect4.game import (
+    Connect4Game,
+    SearchBudgetExceeded,
+    SearchStats,
+    TurnRole,
+    calculate_next_move,
+    minimax_move,
+)
+from connect4.metrics import AI_NODES_SEARCHED, AI_SEARCH_BUDGET_EXHAUSTED
+from connect4.search_trace import SearchTrace, start_search_trace
+from connect4.sessions import (
+    DIFFICULTY_PRESETS,
+    DifficultyLevel,
+    DifficultyPreset,
+    GameMode,
+    GameSession,
+    SessionRegistryEntry,
+)
 
 
 def test_connect4_game_tracks_turns_and_roles() -> None:
@@ -113,3 +137,233 @@ def test_calculate_next_move_raises_when_board_full() -> None:
 
     with pytest.raises(ColumnFullError):
         calculate_next_move(state)
+
+
+def test_bitboard_state_tracks_history_and_version() -> None:
+    state = BitboardState()
+
+    state.drop(3)
+    state.drop(4)
+    assert state.moves() == bytes([3, 4])
+    assert state.moves(1) == bytes([4])
+    assert state.version == 2
+
+    state.undo_last_move()
+    assert state.moves() == bytes([3])
+    assert state.version == 3
+
+
+def test_calculate_next_move_records_search_trace() -> None:
+    state = BitboardState()
+    state.drop(3)
+    trace = SearchTrace("trace-game")
+
+    column = calculate_next_move(state, depth=3, trace=trace)
+
+    tree = trace.to_dict()["tree"]
+    assert tree["bestMove"] == column
+    assert tree["nodes"] == trace.node_count
+    assert [child["column"] for child in tree["children"]] == list(range(BOARD_WIDTH))
+    assert all("score" in child for child in tree["children"])
+
+
+def test_search_trace_truncates_at_node_cap() -> None:
+    state = BitboardState()
+    state.drop(3)
+    trace = SearchTrace("capped", max_nodes=10)
+
+    calculate_next_move(state, depth=4, trace=trace)
+
+    assert trace.node_count == 10
+    assert trace.truncated
+
+
+def test_search_trace_stays_balanced_when_budget_runs_out() -> None:
+    state = BitboardState()
+    state.drop(3)
+    trace = SearchTrace("budget")
+    stats = SearchStats(node_limit=50)
+
+    with pytest.raises(SearchBudgetExceeded):
+        minimax_move(state, 4, stats, trace)
+
+    assert trace._stack == [trace.root]
+
+    def unfinished(node: dict) -> list[dict]:
+        found = [] if "score" in node or "cutOff" in node else [node]
+        for child in node["children"]:
+            found += unfinished(child)
+        return found
+
+    assert not any(unfinished(child) for child in trace.root["children"])
+
+
+def test_untraced_game_gets_no_trace() -> None:
+    assert start_search_trace("not-selected") is None
+
+
+def test_engine_dedupes_ai_triggers() -> None:
+    async def scenario() -> int:
+        state = BitboardState()
+        state.drop(3)  # human (YELLOW) moved; AI (RED) to play
+        entry = SessionRegistryEntry(
+            mode=GameMode.SOLO,
+            session=GameSession(GameMode.SOLO),
+            board_state=state,
+        )
+        engine = SessionEngine("dedupe", entry)
+        engine.schedule_ai_turn()
+        engine.schedule_ai_turn()
+        return engine._inbox.qsize()
+
+    assert asyncio.run(scenario()) == 1
+
+
+def test_stopping_engine_fails_pending_rematches() -> None:
+    async def scenario() -> list[object]:
+        entry = SessionRegistryEntry(
+            mode=GameMode.MULTIPLAYER,
+            session=GameSession(GameMode.MULTIPLAYER),
+            board_state=BitboardState(),
+        )
+        engine = SessionEngine("stopped", entry)
+        blocked = asyncio.Event()
+
+        async def stuck_rematch(command: object) -> None:
+            blocked.set()
+            await asyncio.Event().wait()
+
+        engine._rematch = stuck_rematch  # type: ignore[method-assign]
+        engine.start()
+        in_flight = asyncio.create_task(engine.rematch("a"))
+        await blocked.wait()
+        queued = asyncio.create_task(engine.rematch("b"))
+        await asyncio.sleep(0)
+        await engine.stop()
+        return await asyncio.gather(in_flight, queued, return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, EngineStoppedError) for result in results)
+
+
+def test_bitboard_state_multi_level_undo_and_redo() -> None:
+    state = BitboardState.from_moves("4455")
+    mask = state.mask
+
+    assert state.undo(3) == bytes([3, 4, 4])
+    assert state.moves() == bytes([3])
+    assert state.to_play == RED
+
+    state.redo(2)
+    assert state.moves() == bytes([3, 3, 4])
+    state.redo()
+    assert state.mask == mask
+    assert state.move_string() == "4455"
+
+    state.undo()
+    state.drop(0)
+    with pytest.raises(RuntimeError):
+        state.redo()
+
+
+def test_bitboard_state_last_result_survives_undo() -> None:
+    state = BitboardState.from_moves("1212121")
+    assert state.last_result is not None and state.last_result.winner == YELLOW
+
+    state.undo()
+    last = state.last_result
+    assert last is not None
+    assert last.column == 1
+    assert last.winner is None
+
+
+def test_bitboard_state_reconstructs_any_ply() -> None:
+    state = BitboardState.from_moves("44352", starting_color=RED)
+
+    ply = state.at_ply(3)
+    assert ply.moves() == bytes([3, 3, 2])
+    replayed = BitboardState.from_moves("443", starting_color=RED)
+    assert (ply.board(RED), ply.board(YELLOW), ply.to_play) == (
+        replayed.board(RED),
+        replayed.board(YELLOW),
+        replayed.to_play,
+    )
+    assert ply.starting_color == RED
+    assert state.at_ply(0).mask == 0
+
+
+@pytest.mark.parametrize("level", list(DifficultyLevel))
+def test_every_preset_takes_an_immediate_win(level: DifficultyLevel) -> None:
+    state = BitboardState.from_moves("2131416")
+    assert state.to_play == RED
+
+    move = calculate_next_move(
+        state, preset=DIFFICULTY_PRESETS[level], rng=random.Random(1)
+    )
+
+    assert move == 0
+
+
+def test_preset_search_stops_at_node_budget() -> None:
+    state = BitboardState.from_moves("4453")
+    preset = DifficultyPreset(max_depth=9, node_budget=500, time_budget=10.0)
+    exhausted = AI_SEARCH_BUDGET_EXHAUSTED.value()
+    nodes = AI_NODES_SEARCHED.value()
+    trace = SearchTrace("budget")
+
+    move = calculate_next_move(state, preset=preset, trace=trace)
+
+    assert move in state.playable_columns()
+    assert AI_SEARCH_BUDGET_EXHAUSTED.value() == exhausted + 1
+    assert AI_NODES_SEARCHED.value() - nodes <= 500
+    assert trace.root["completedDepth"] < 9
+
+
+def test_preset_search_stops_at_time_budget() -> None:
+    state = BitboardState.from_moves("4453")
+    preset = DifficultyPreset(max_depth=12, node_budget=10**9, time_budget=0.05)
+
+    started = time.perf_counter()
+    calculate_next_move(state, preset=preset)
+
+    assert time.perf_counter() - started < 0.5
+
+
+def test_board_geometry_is_shared_per_size() -> None:
+    plus = BoardGeometry.of(9, 7)
+
+    assert BoardGeometry.of(9, 7) is plus
+    assert BoardGeometry.of(7, 6) is STANDARD
+    assert plus.capacity == 63
+    with pytest.raises(ValueError):
+        BoardGeometry.of(10, 7)
+
+
+def test_wider_board_detects_wins_without_wrapping() -> None:
+    plus = BoardGeometry.of(9, 7)
+    # Yellow fills columns 6-9 of the bottom row while red stacks on column 1.
+    state = BitboardState.from_moves("6171819", geometry=plus)
+
+    assert state.last_result is not None
+    assert state.last_result.winner == YELLOW
+    assert has_connect_four(state.board(YELLOW), plus)
+
+    # A full 7-high column closes; nothing spills into the next column.
+    column = BitboardState.from_moves("1111111", geometry=plus)
+    assert column.last_result is not None and column.last_result.winner is None
+    assert not column.is_column_playable(0)
+    assert column.is_column_playable(8)
+    with pytest.raises(IllegalMoveError):
+        column.drop(9)
+
+
+def test_search_runs_on_other_geometries() -> None:
+    eight = BoardGeometry.of(8, 7)
+
+    assert calculate_next_move(BitboardState(geometry=eight)) == 4
+
+    state = BitboardState.from_moves("81828", geometry=eight)
+    assert state.to_play == RED
+    assert calculate_next_move(state, depth=3) == 7
+    assert state.copy().geometry is eight
+    assert state.at_ply(2).geometry is eight
@@ -0,0 +1,91 @@
+"""Shutdown drain and startup restore of the session registry."""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+from fastapi import WebSocketDisconnect
+from fastapi.testclient import TestClient
+
+from connect4 import heartbeat, lifecycle
+from connect4.app import app
+
+
+@pytest.fixture(autouse=True)
+def _no_reconnect_grace(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(heartbeat, "RECONNECT_GRACE", 0.0)
+
+
+def test_drain_snapshots_sessions_and_notifies_players(tmp_path: Path) -> None:
+    snapshot = tmp_path / "sessions.json"
+
+    with TestClient(app) as client:
+        with client.websocket_connect("/ws/drain-solo/alice?mode=solo") as websocket:
+            websocket.receive_json()  # session_state
+            websocket.receive_json()  # player_joined
+            websocket.send_json({"type": "move", "column": 3})
+            websocket.receive_json()  # move
+            websocket.receive_json()  # ai_move
+
+            assert client.portal.call(lifecycle.drain, snapshot) >= 1
+
+            notice = websocket.receive_json()
+            assert notice == {
+                "type": "server_restart",
+                "gameId": "drain-solo",
+                "resumable": True,
+            }
+            with pytest.raises(WebSocketDisconnect) as closed:
+                websocket.receive_json()
+            assert closed.value.code == lifecycle.RESTART_CLOSE_CODE
+
+        response = client.post("/games", json={"gameId": "too-late"})
+        assert response.status_code == 503
+
+    records = {
+        record["gameId"]: record
+        for record in json.loads(snapshot.read_text())["sessions"]
+    }
+    assert records["drain-solo"]["mode"] == "solo"
+    assert records["drain-solo"]["moves"][0] == "4"
+    assert len(records["drain-solo"]["moves"]) == 2
+    assert records["drain-solo"]["seats"] == {"alice": "yellow"}
+
+
+def test_restore_replays_snapshot_and_holds_seats(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    snapshot = tmp_path / "sessions.json"
+    lifecycle.write_snapshot(
+        snapshot,
+        [
+            {
+                "gameId": "restored",
+                "mode": "multiplayer",
+                "difficulty": "standard",
+                "startingColor": "red",
+                "moves": "445",
+                "reservedFor": [],
+                "seats": {"alice": "red", "bob": "yellow"},
+            }
+        ],
+    )
+    monkeypatch.setattr(lifecycle, "SNAPSHOT_PATH", snapshot)
+
+    with TestClient(app) as client:
+        assert not snapshot.exists()
+        moves = client.get("/games/restored/moves").json()
+        assert moves["move_count"] == 3
+        assert moves["current_turn"] == "yellow"
+
+        with pytest.raises(WebSocketDisconnect):
+            with client.websocket_connect("/ws/restored/carol"):
+                pass
+
+        with client.websocket_connect("/ws/restored/bob") as websocket:
+            state = websocket.receive_json()
+            assert state["resumed"] is True
+            assert state["moveCount"] == 3
+            assert state["colors"] == {"alice": "red", "bob": "yellow"}
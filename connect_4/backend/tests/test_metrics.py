@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import pytest
+
+from connect4.metrics import MetricsRegistry
+
+
+def test_histogram_renders_cumulative_buckets() -> None:
+    registry = MetricsRegistry()
+    histogram = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+    histogram.observe(3.0)
+
+    rendered = registry.render().splitlines()
+    assert "# TYPE latency_seconds histogram" in rendered
+    assert 'latency_seconds_bucket{le="0.1"} 1' in rendered
+    assert 'latency_seconds_bucket{le="1"} 2' in rendered
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in rendered
+    assert "latency_seconds_count 3" in rendered
+
+
+def test_labelled_gauge_and_counter() -> None:
+    registry = MetricsRegistry()
+    gauge = registry.gauge("sessions", "Sessions.", ("mode",))
+    counter = registry.counter("events_total", "Events.")
+
+    gauge.inc(mode="solo")
+    gauge.inc(mode="solo")
+    gauge.dec(mode="solo")
+    counter.inc(2)
+
+    rendered = registry.render().splitlines()
+    assert 'sessions{mode="solo"} 1' in rendered
+    assert "events_total 2" in rendered
+
+    with pytest.raises(ValueError):
+        counter.inc(-1)
+    with pytest.raises(ValueError):
+        gauge.inc(color="red")
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import pytest
+
+from connect4.ratelimit import (
+    InvalidFrameError,
+    MoveFrame,
+    TokenBucket,
+    parse_frame,
+)
+
+
+def test_token_bucket_refills_over_time() -> None:
+    bucket = TokenBucket(rate=10.0, capacity=2.0)
+    now = bucket.updated
+
+    assert bucket.try_acquire(now)
+    assert bucket.try_acquire(now)
+    assert not bucket.try_acquire(now)
+    assert bucket.try_acquire(now + 0.15)
+    assert not bucket.try_acquire(now + 0.15)
+
+
+def test_parse_frame_fast_path_for_moves() -> None:
+    assert parse_frame(b'{"type":"move","column":3}') == MoveFrame(3)
+    assert parse_frame(b'{"type": "move", "column": 6}') == MoveFrame(6)
+
+
+def test_parse_frame_falls_back_to_json() -> None:
+    assert parse_frame(b'{"column":3,"type":"move"}') == {"column": 3, "type": "move"}
+    assert parse_frame(b'{"type":"move","column":"3"}') == {
+        "type": "move",
+        "column": "3",
+    }
+
+
+@pytest.mark.parametrize("frame", [b"not json", b"[1, 2]", b'"move"'])
+def test_parse_frame_rejects_non_objects(frame: bytes) -> None:
+    with pytest.raises(InvalidFrameError):
+        parse_frame(frame)
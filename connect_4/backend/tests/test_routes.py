@@ -2,13 +2,33 @@
 
 from __future__ import annotations
 
+import time
+from typing import Iterator
+
+import pytest
+from fastapi import WebSocketDisconnect
 from fastapi.testclient import TestClient
 
+from connect4 import heartbeat, matchmaking, ratelimit, search_trace, sessions
 from connect4.app import app
 
 client = TestClient(app)
 
 
+@pytest.fixture(scope="module", autouse=True)
+def _shared_event_loop() -> Iterator[None]:
+    # Session engines are asyncio tasks; keeping one portal open runs every
+    # request and websocket on the same loop, as uvicorn would.
+    with client:
+        yield
+
+
+@pytest.fixture(autouse=True)
+def _no_reconnect_grace(monkeypatch: pytest.MonkeyPatch) -> None:
+    # Free seats as soon as a test's socket closes unless a test opts in.
+    monkeypatch.setattr(heartbeat, "RECONNECT_GRACE", 0.0)
+
+
 def test_healthcheck() -> None:
     response = client.get("/health")
     parsed = response.json()
@@ -94,3 +114,442 @@ def test_get_missing_game_returns_404() -> None:
     response = client.get("/games/non-existent")
     assert response.status_code == 404
     assert response.json()["detail"] == "Game 'non-existent' not found"
+
+
+def test_list_games_paginates_with_cursor() -> None:
+    created = [f"page-{index}" for index in range(5)]
+    for game_id in created:
+        client.post("/games", json={"gameId": game_id, "mode": "solo"})
+
+    seen: list[str] = []
+    cursor: str | None = None
+    while True:
+        params: dict[str, str | int] = {"limit": 2, "mode": "solo"}
+        if cursor is not None:
+            params["cursor"] = cursor
+        response = client.get("/games", params=params)
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page) <= 2
+        seen.extend(session["game_id"] for session in page)
+        cursor = response.headers.get("x-next-cursor")
+        if cursor is None:
+            break
+
+    assert [game_id for game_id in seen if game_id in created] == created
+    assert len(seen) == len(set(seen))
+
+
+def test_list_games_rejects_malformed_cursor() -> None:
+    response = client.get("/games", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+
+def test_list_games_filters_by_occupancy() -> None:
+    client.post("/games", json={"gameId": "occupancy", "mode": "multiplayer"})
+
+    def listed(occupancy: str) -> set[str]:
+        response = client.get(
+            "/games", params={"mode": "multiplayer", "occupancy": occupancy}
+        )
+        assert response.status_code == 200
+        return {session["game_id"] for session in response.json()}
+
+    assert "occupancy" in listed("empty")
+    assert "occupancy" not in listed("full")
+
+    with client.websocket_connect("/ws/occupancy/alice"):
+        assert "occupancy" in listed("open")
+        assert "occupancy" not in listed("empty")
+        with client.websocket_connect("/ws/occupancy/bob"):
+            assert "occupancy" in listed("full")
+            assert "occupancy" not in listed("open")
+
+
+def test_board_state_supports_conditional_requests() -> None:
+    client.post("/games", json={"gameId": "etag", "mode": "multiplayer"})
+
+    first = client.get("/games/etag/board_state")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+
+    cached = client.get("/games/etag/board_state", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["etag"] == etag
+
+    with client.websocket_connect("/ws/etag/alice") as websocket:
+        websocket.receive_json()  # session_state
+        websocket.receive_json()  # player_joined
+        websocket.send_json({"type": "move", "column": 3})
+        websocket.receive_json()
+
+        changed = client.get(
+            "/games/etag/board_state", headers={"If-None-Match": etag}
+        )
+        assert changed.status_code == 200
+        assert changed.headers["etag"] != etag
+
+
+def test_moves_returns_delta_since_turn() -> None:
+    client.post("/games", json={"gameId": "delta", "mode": "multiplayer"})
+
+    with client.websocket_connect("/ws/delta/alice") as alice:
+        alice.receive_json()
+        alice.receive_json()
+        with client.websocket_connect("/ws/delta/bob") as bob:
+            bob.receive_json()
+            bob.receive_json()
+            # The first player to join holds the starting color.
+            for column, websocket in ((3, alice), (4, bob), (2, alice)):
+                websocket.send_json({"type": "move", "column": column})
+                while websocket.receive_json()["type"] != "move":
+                    pass
+
+            full = client.get("/games/delta/moves")
+            assert full.status_code == 200
+            payload = full.json()
+            assert payload["move_count"] == 3
+            assert [move["column"] for move in payload["moves"]] == [3, 4, 2]
+            assert [move["turn_index"] for move in payload["moves"]] == [1, 2, 3]
+            colors = [move["color"] for move in payload["moves"]]
+            assert colors[0] == colors[2] != colors[1]
+
+            delta = client.get("/games/delta/moves", params={"since": 2})
+            assert [move["column"] for move in delta.json()["moves"]] == [2]
+
+            # An ETag for one ``since`` must not validate another.
+            revalidated = client.get(
+                "/games/delta/moves",
+                params={"since": 2},
+                headers={"If-None-Match": full.headers["ETag"]},
+            )
+            assert revalidated.status_code == 200
+            assert len(revalidated.json()["moves"]) == 1
+            unchanged = client.get(
+                "/games/delta/moves",
+                params={"since": 2},
+                headers={"If-None-Match": delta.headers["ETag"]},
+            )
+            assert unchanged.status_code == 304
+
+            ahead = client.get("/games/delta/moves", params={"since": 9})
+            assert ahead.status_code == 409
+
+
+def test_metrics_endpoint_exposes_session_gauges() -> None:
+    client.post("/games", json={"gameId": "metrics", "mode": "solo"})
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert "# TYPE connect4_ai_move_seconds histogram" in body
+    assert 'connect4_active_sessions{mode="solo"}' in body
+
+
+def test_solo_move_is_answered_by_engine() -> None:
+    with client.websocket_connect("/ws/solo-engine/human?mode=solo") as websocket:
+        websocket.receive_json()  # session_state
+        websocket.receive_json()  # player_joined
+        websocket.send_json({"type": "move", "column": 3})
+
+        human = websocket.receive_json()
+        assert human["type"] == "move"
+        assert human["turnIndex"] == 1
+
+        ai = websocket.receive_json()
+        assert ai["type"] == "ai_move"
+        assert ai["playerId"] == "__engine__"
+        assert ai["turnIndex"] == 2
+
+        websocket.send_json({"type": "chat", "text": "still listening"})
+        assert websocket.receive_json()["type"] == "chat"
+
+
+def test_out_of_turn_move_is_rejected() -> None:
+    client.post("/games", json={"gameId": "turns", "mode": "multiplayer"})
+
+    with client.websocket_connect("/ws/turns/alice") as alice:
+        alice.receive_json()
+        alice.receive_json()
+        with client.websocket_connect("/ws/turns/bob") as bob:
+            bob.receive_json()
+            bob.receive_json()
+            bob.send_json({"type": "move", "column": 0})
+            error = bob.receive_json()
+            assert error == {
+                "type": "error",
+                "gameId": "turns",
+                "playerId": "bob",
+                "detail": "Not your turn",
+            }
+
+
+def test_rematch_resets_board() -> None:
+    with client.websocket_connect("/ws/rematch/alice?mode=solo") as websocket:
+        websocket.receive_json()
+        websocket.receive_json()
+        websocket.send_json({"type": "move", "column": 0})
+        websocket.receive_json()
+        websocket.receive_json()
+
+        response = client.post("/games/rematch/rematch", json={"playerId": "alice"})
+        assert response.status_code == 200
+        assert client.get("/games/rematch/moves").json()["move_count"] == 0
+
+        rematch = websocket.receive_json()
+        assert rematch["type"] == "rematch"
+        assert rematch["initiatedBy"] == "alice"
+
+
+def test_discarded_game_drops_its_search_traces(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(search_trace, "TRACE_ENABLED", True)
+    client.post("/games", json={"gameId": "traced-drop", "mode": "solo"})
+    search_trace.enable_search_trace("traced-drop")
+
+    with client.websocket_connect("/ws/traced-drop/alice") as websocket:
+        websocket.receive_json()
+
+    assert client.get("/games/traced-drop").status_code == 404
+    assert search_trace.captured_search_traces("traced-drop") is None
+    assert "traced-drop" not in search_trace._captured
+
+
+def test_rematch_without_players_starts_no_engine() -> None:
+    client.post("/games", json={"gameId": "idle-rematch"})
+
+    response = client.post("/games/idle-rematch/rematch")
+    assert response.status_code == 200
+    engine = sessions.sessions["idle-rematch"].engine
+    assert engine is not None and not engine.running
+
+
+def test_matchmaking_pairs_players_into_reserved_game() -> None:
+    with client.websocket_connect("/matchmaking/carol?bucket=mm-test") as carol:
+        assert carol.receive_json() == {
+            "type": "queued",
+            "bucket": "mm-test",
+            "position": 1,
+        }
+        assert client.get("/matchmaking").json()["waiting"]["mm-test"] == 1
+
+        with client.websocket_connect("/matchmaking/dave?bucket=mm-test") as dave:
+            dave_match = dave.receive_json()
+        carol_match = carol.receive_json()
+
+    assert dave_match["type"] == carol_match["type"] == "match_found"
+    assert dave_match["gameId"] == carol_match["gameId"]
+    assert dave_match["opponentId"] == "carol"
+    assert carol_match["opponentId"] == "dave"
+    assert "mm-test" not in client.get("/matchmaking").json()["waiting"]
+
+    game_id = carol_match["gameId"]
+    open_games = client.get(
+        "/games", params={"mode": "multiplayer", "occupancy": "open"}
+    ).json()
+    assert game_id not in {game["game_id"] for game in open_games}
+
+    with pytest.raises(WebSocketDisconnect) as rejected:
+        with client.websocket_connect(f"/ws/{game_id}/mallory"):
+            pass
+    assert rejected.value.reason == "Session is full"
+
+    with client.websocket_connect(f"/ws/{game_id}/carol") as seated:
+        assert seated.receive_json()["players"] == ["carol"]
+
+
+def test_matchmaking_during_shutdown_closes_both_players() -> None:
+    with client.websocket_connect("/matchmaking/hal?bucket=closed-test") as hal:
+        hal.receive_json()
+        sessions.close_registry()
+        try:
+            with client.websocket_connect("/matchmaking/ivy?bucket=closed-test") as ivy:
+                with pytest.raises(WebSocketDisconnect) as ivy_closed:
+                    ivy.receive_json()
+            with pytest.raises(WebSocketDisconnect) as hal_closed:
+                hal.receive_json()
+        finally:
+            sessions.open_registry()
+
+    assert ivy_closed.value.code == hal_closed.value.code == 1012
+    assert "closed-test" not in client.get("/matchmaking").json()["waiting"]
+
+
+def test_matched_game_waits_for_both_players_then_expires(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(matchmaking, "MATCH_JOIN_TIMEOUT", 0.3)
+    with client.websocket_connect("/matchmaking/fran?bucket=expiry-test") as fran:
+        fran.receive_json()
+        with client.websocket_connect("/matchmaking/gus?bucket=expiry-test") as gus:
+            game_id = gus.receive_json()["gameId"]
+        fran.receive_json()
+
+    with client.websocket_connect(f"/ws/{game_id}/fran") as seated:
+        seated.receive_json()
+
+    # Fran left before Gus arrived; the seats are still held for them.
+    with pytest.raises(WebSocketDisconnect) as rejected:
+        with client.websocket_connect(f"/ws/{game_id}/mallory"):
+            pass
+    assert rejected.value.reason == "Session is full"
+
+    time.sleep(0.5)
+    assert client.get(f"/games/{game_id}").status_code == 404
+
+
+def test_matchmaking_cancel_leaves_queue() -> None:
+    with client.websocket_connect("/matchmaking/erin?bucket=cancel-test") as erin:
+        erin.receive_json()
+        erin.send_json({"type": "cancel"})
+        assert erin.receive_json() == {"type": "cancelled"}
+
+    assert "cancel-test" not in client.get("/matchmaking").json()["waiting"]
+
+
+def test_silent_connection_is_evicted(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(heartbeat, "HEARTBEAT_INTERVAL", 0.05)
+    monkeypatch.setattr(heartbeat, "HEARTBEAT_MISSES", 1)
+
+    with client.websocket_connect("/ws/silent/ghost") as websocket:
+        websocket.receive_json()  # session_state
+        websocket.receive_json()  # player_joined
+        assert websocket.receive_json() == {"type": "ping"}
+        with pytest.raises(WebSocketDisconnect) as closed:
+            while True:
+                websocket.receive_json()
+
+    assert closed.value.code == heartbeat.HEARTBEAT_CLOSE_CODE
+    assert client.get("/games/silent").status_code == 404
+
+
+def test_player_resumes_seat_within_grace(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(heartbeat, "RECONNECT_GRACE", 30.0)
+    monkeypatch.setattr(heartbeat, "HEARTBEAT_INTERVAL", 0.1)
+    monkeypatch.setattr(heartbeat, "HEARTBEAT_MISSES", 2)
+    client.post("/games", json={"gameId": "resume", "mode": "multiplayer"})
+
+    def next_event(websocket) -> dict:
+        # Answer heartbeats so only the silent player gets evicted.
+        while True:
+            message = websocket.receive_json()
+            if message["type"] != "ping":
+                return message
+            websocket.send_json({"type": "pong"})
+
+    with client.websocket_connect("/ws/resume/bob") as bob:
+        next_event(bob)
+        bob_color = next_event(bob)["color"]
+        with client.websocket_connect("/ws/resume/alice") as alice:
+            alice.receive_json()
+            alice_color = alice.receive_json()["color"]
+            next_event(bob)
+            next_event(bob)
+
+            # Alice never answers pings, so the server drops her connection.
+            away = next_event(bob)
+            assert away["type"] == "player_away"
+            assert away["playerId"] == "alice"
+
+        with pytest.raises(WebSocketDisconnect) as rejected:
+            with client.websocket_connect("/ws/resume/carol"):
+                pass
+        assert rejected.value.reason == "Session is full"
+
+        with client.websocket_connect("/ws/resume/alice") as alice:
+            state = alice.receive_json()
+            assert state["type"] == "session_state"
+            assert state["resumed"] is True
+            assert state["colors"] == {"alice": alice_color, "bob": bob_color}
+            assert next_event(bob) == {
+                "type": "player_returned",
+                "gameId": "resume",
+                "playerId": "alice",
+            }
+
+
+def test_flooding_client_is_throttled_then_closed(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(ratelimit, "MESSAGE_RATE", 0.001)
+    monkeypatch.setattr(ratelimit, "MESSAGE_BURST", 2)
+    monkeypatch.setattr(ratelimit, "MAX_DROPPED_FRAMES", 3)
+
+    with client.websocket_connect("/ws/flood/spammer?mode=solo") as websocket:
+        websocket.receive_json()  # session_state
+        websocket.receive_json()  # player_joined
+        for _ in range(2):
+            websocket.send_json({"type": "chat", "text": "hi"})
+            assert websocket.receive_json()["type"] == "chat"
+
+        for _ in range(3):
+            websocket.send_json({"type": "chat", "text": "spam"})
+        assert websocket.receive_json()["detail"] == "Rate limit exceeded"
+        with pytest.raises(WebSocketDisconnect) as closed:
+            websocket.receive_json()
+
+    assert closed.value.code == ratelimit.POLICY_CLOSE_CODE
+    metrics = client.get("/metrics").text
+    assert 'connect4_ws_policy_closes_total{reason="rate"}' in metrics
+
+
+def test_oversized_frame_closes_connection(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(ratelimit, "MAX_FRAME_BYTES", 64)
+
+    with client.websocket_connect("/ws/oversized/big?mode=solo") as websocket:
+        websocket.receive_json()
+        websocket.receive_json()
+        websocket.send_json({"type": "chat", "text": "x" * 100})
+        with pytest.raises(WebSocketDisconnect) as closed:
+            websocket.receive_json()
+
+    assert closed.value.code == ratelimit.TOO_BIG_CLOSE_CODE
+
+
+def test_non_object_frame_is_rejected() -> None:
+    with client.websocket_connect("/ws/garbage/sloppy?mode=solo") as websocket:
+        websocket.receive_json()
+        websocket.receive_json()
+        websocket.send_text("[1, 2, 3]")
+        assert websocket.receive_json()["detail"] == "Frames must be JSON objects"
+
+
+def test_spectator_gets_snapshot_then_deltas() -> None:
+    client.post("/games", json={"gameId": "watched", "mode": "multiplayer"})
+
+    with client.websocket_connect("/ws/watched/alice") as alice:
+        alice.receive_json()
+        alice.receive_json()
+        with client.websocket_connect("/ws/watched/bob") as bob:
+            bob.receive_json()
+            bob.receive_json()
+            alice.send_json({"type": "move", "column": 3})
+            while alice.receive_json()["type"] != "move":
+                pass
+
+            with client.websocket_connect("/ws/watched") as spectator:
+                snapshot = spectator.receive_json()
+                assert snapshot["type"] == "spectator_snapshot"
+                assert snapshot["moves"] == "4"
+                assert snapshot["moveCount"] == 1
+                assert sorted(snapshot["players"]) == ["alice", "bob"]
+                assert snapshot["currentTurn"] == snapshot["colors"]["bob"]
+
+                # Watching takes no seat.
+                details = client.get("/games/watched").json()
+                assert sorted(details["players"]) == ["alice", "bob"]
+
+                bob.send_json({"type": "move", "column": 4})
+                delta = spectator.receive_json()
+                assert delta["type"] == "move"
+                assert delta["turnIndex"] == 2
+                assert delta["column"] == 4
+
+
+def test_spectating_missing_game_is_rejected() -> None:
+    with pytest.raises(WebSocketDisconnect) as closed:
+        with client.websocket_connect("/ws/nobody-here"):
+            pass
+    assert closed.value.code == 1008
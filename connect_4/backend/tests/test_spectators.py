@@ -0,0 +1,107 @@
+"""Spectator fan-out and slow-spectator eviction."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import Any
+
+import pytest
+
+from connect4 import spectators
+from connect4.spectators import SpectatorHub, SpectatorLimitError
+
+
+class FakeSocket:
+    def __init__(self, *, stalled: bool = False) -> None:
+        self.sent: list[dict[str, Any]] = []
+        self.closed: int | None = None
+        self._stalled = stalled
+
+    async def send_text(self, text: str) -> None:
+        if self._stalled:
+            await asyncio.Event().wait()
+        self.sent.append(json.loads(text))
+
+    async def close(self, code: int = 1000, reason: str = "") -> None:
+        self.closed = code
+
+
+async def _settle() -> None:
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+def test_snapshot_precedes_deltas_for_every_spectator() -> None:
+    async def scenario() -> list[FakeSocket]:
+        hub = SpectatorHub()
+        sockets = [FakeSocket() for _ in range(50)]
+        for socket in sockets:
+            hub.subscribe(socket, {"type": "spectator_snapshot"})
+        for turn in range(1, 4):
+            hub.publish({"type": "move", "turnIndex": turn})
+        await _settle()
+        await hub.close()
+        return sockets
+
+    for socket in asyncio.run(scenario()):
+        assert [message.get("turnIndex") for message in socket.sent] == [
+            None,
+            1,
+            2,
+            3,
+        ]
+        assert socket.closed == 1000
+
+
+def test_late_spectator_gets_only_moves_after_its_snapshot() -> None:
+    async def scenario() -> FakeSocket:
+        hub = SpectatorHub()
+        hub.subscribe(FakeSocket(), {"type": "spectator_snapshot"})
+        hub.publish({"type": "move", "turnIndex": 1})
+        # Subscribed before anything is written, with move 1 in its snapshot.
+        late = FakeSocket()
+        hub.subscribe(late, {"type": "spectator_snapshot", "moveCount": 1})
+        hub.publish({"type": "move", "turnIndex": 2})
+        await _settle()
+        await hub.close()
+        return late
+
+    late = asyncio.run(scenario())
+    assert [message.get("turnIndex") for message in late.sent] == [None, 2]
+
+
+def test_slow_spectator_is_dropped_without_blocking_others(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(spectators, "SPECTATOR_QUEUE_SIZE", 4)
+
+    async def scenario() -> tuple[SpectatorHub, FakeSocket, FakeSocket]:
+        hub = SpectatorHub()
+        fast, slow = FakeSocket(), FakeSocket(stalled=True)
+        hub.subscribe(fast, {"type": "spectator_snapshot"})
+        hub.subscribe(slow, {"type": "spectator_snapshot"})
+        for turn in range(1, 11):
+            hub.publish({"type": "move", "turnIndex": turn})
+            await _settle()
+        return hub, fast, slow
+
+    hub, fast, slow = asyncio.run(scenario())
+    assert len(hub) == 1
+    assert slow.closed == spectators.SLOW_SPECTATOR_CLOSE_CODE
+    assert fast.closed is None
+    assert [message.get("turnIndex") for message in fast.sent][-1] == 10
+
+
+def test_spectator_limit(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(spectators, "MAX_SPECTATORS", 2)
+
+    async def scenario() -> None:
+        hub = SpectatorHub()
+        hub.subscribe(FakeSocket(), {})
+        hub.subscribe(FakeSocket(), {})
+        with pytest.raises(SpectatorLimitError):
+            hub.subscribe(FakeSocket(), {})
+        await hub.close()
+
+    asyncio.run(scenario())
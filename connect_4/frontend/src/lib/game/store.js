@@ -90,6 +90,8 @@ function resolveBackendBase() {
 }
 
 const BACKEND_BASE_URL = resolveBackendBase();
+// Largest page the backend serves for GET /games.
+const LOBBY_PAGE_SIZE = 1000;
 
 const CONNECTION_STATES = {
     DISCONNECTED: 'disconnected',
@@ -617,6 +619,13 @@ function createGameStore() {
             return;
         }
 
+        if (payload.type === 'ping') {
+            if (socket && socket.readyState === WebSocket.OPEN) {
+                socket.send(JSON.stringify({ type: 'pong' }));
+            }
+            return;
+        }
+
         update((state) => {
             switch (payload.type) {
                 case 'rematch':
@@ -630,6 +639,13 @@ function createGameStore() {
                 case 'move':
                 case 'ai_move':
                     return applyRemoteMove(state, payload);
+                case 'server_restart':
+                    return {
+                        ...state,
+                        error: payload.resumable
+                            ? 'Server restarting – rejoin in a moment to resume.'
+                            : 'Server restarting.',
+                    };
                 case 'error':
                     return {
                         ...state,
@@ -708,12 +724,27 @@ function createGameStore() {
         }));
 
         try {
-            const response = await fetch(`${BACKEND_BASE_URL}/games`);
-            if (!response.ok) {
-                throw new Error(`Failed to load games: ${response.statusText}`);
-            }
             /** @type {Array<{game_id: string, mode: string, players?: string[], capacity?: number}>} */
-            const payload = await response.json();
+            const payload = [];
+            // The listing is paginated; follow X-Next-Cursor until the last page.
+            /** @type {string | null} */
+            let cursor = null;
+            do {
+                const params = new URLSearchParams({
+                    mode: MODES.MULTIPLAYER,
+                    occupancy: 'open',
+                    limit: String(LOBBY_PAGE_SIZE),
+                });
+                if (cursor !== null) {
+                    params.set('cursor', cursor);
+                }
+                const response = await fetch(`${BACKEND_BASE_URL}/games?${params}`);
+                if (!response.ok) {
+                    throw new Error(`Failed to load games: ${response.statusText}`);
+                }
+                payload.push(...(await response.json()));
+                cursor = response.headers.get('X-Next-Cursor');
+            } while (cursor !== null);
             const joinable = payload
                 .filter((game) => game.mode === MODES.MULTIPLAYER)
                 .map((game) => ({
@@ -1,60 +1,242 @@
 #!/usr/bin/env python
-"""Command-line helpers for interacting with the Connect 4 API."""
+"""Command-line helpers and async client for interacting with the Connect 4 API."""
 
 from __future__ import annotations
 
 import argparse
+import asyncio
 import json
-from typing import Any
+from typing import Any, AsyncIterator, Iterable, Sequence
 
 import httpx
 
 DEFAULT_BASE_URL = "http://127.0.0.1:8000"
+DEFAULT_TIMEOUT = 5.0
+DEFAULT_CONCURRENCY = 32
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
 
 
 def _print_json(payload: Any) -> None:
     print(json.dumps(payload, indent=2, sort_keys=True))
 
 
-def _request(method: str, path: str, *, base_url: str, **kwargs: Any) -> httpx.Response:
-    with httpx.Client(base_url=base_url, timeout=5.0) as client:
-        response = client.request(method, path, **kwargs)
+def _format_board(rows: Sequence[Sequence[str]]) -> str:
+    return "\n".join("  ".join(row) for row in rows[-1::-1])
+
+
+def _websocket_url(base_url: str, path: str) -> str:
+    if base_url.startswith("https://"):
+        base_url = "wss://" + base_url[len("https://") :]
+    elif base_url.startswith("http://"):
+        base_url = "ws://" + base_url[len("http://") :]
+    return base_url.rstrip("/") + path
+
+
+class Connect4Client:
+    """Async API client sharing a single keep-alive connection pool.
+
+    Use it as an async context manager so every request issued within the block
+    reuses pooled connections instead of paying a TCP handshake per call::
+
+        async with Connect4Client(base_url) as client:
+            boards = await client.board_states(game_ids)
+    """
+
+    def __init__(
+        self,
+        base_url: str = DEFAULT_BASE_URL,
+        *,
+        timeout: float = DEFAULT_TIMEOUT,
+        concurrency: int = DEFAULT_CONCURRENCY,
+    ) -> None:
+        self.base_url = base_url
+        self.concurrency = max(1, concurrency)
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=self.concurrency,
+                max_keepalive_connections=self.concurrency,
+            ),
+        )
+
+    async def __aenter__(self) -> "Connect4Client":
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    async def _request(self, method: str, path: str, **kwargs: Any) -> httpx.Response:
+        response = await self._client.request(method, path, **kwargs)
         response.raise_for_status()
         return response
 
+    async def health(self) -> dict[str, Any]:
+        response = await self._request("GET", "/health")
+        return response.json()
+
+    async def create_game(
+        self,
+        *,
+        game_id: str | None = None,
+        mode: str | None = None,
+        difficulty: str | None = None,
+    ) -> dict[str, Any]:
+        payload: dict[str, Any] = {}
+        if game_id:
+            payload["gameId"] = game_id
+        if mode:
+            payload["mode"] = mode
+        if difficulty:
+            payload["difficulty"] = difficulty
+        response = await self._request("POST", "/games", json=payload)
+        return response.json()
+
+    async def list_games(
+        self,
+        *,
+        mode: str | None = None,
+        occupancy: str | None = None,
+        page_size: int = 1000,
+    ) -> list[dict[str, Any]]:
+        """Return every listed session, following pagination cursors."""
+
+        params: dict[str, Any] = {"limit": page_size}
+        if mode:
+            params["mode"] = mode
+        if occupancy:
+            params["occupancy"] = occupancy
+
+        games: list[dict[str, Any]] = []
+        while True:
+            response = await self._request("GET", "/games", params=params)
+            games.extend(response.json())
+            cursor = response.headers.get(NEXT_CURSOR_HEADER)
+            if cursor is None:
+                return games
+            params["cursor"] = cursor
+
+    async def get_game(self, game_id: str) -> dict[str, Any]:
+        response = await self._request("GET", f"/games/{game_id}")
+        return response.json()
+
+    async def board_state(self, game_id: str) -> list[list[str]]:
+        response = await self._request("GET", f"/games/{game_id}/board_state")
+        return response.json()
+
+    async def create_games(
+        self,
+        count: int,
+        *,
+        mode: str | None = None,
+        difficulty: str | None = None,
+        prefix: str | None = None,
+    ) -> list[dict[str, Any]]:
+        """Register ``count`` sessions concurrently over the shared pool."""
+
+        game_ids: list[str | None] = [
+            f"{prefix}-{index}" if prefix else None for index in range(count)
+        ]
+        return await self._gather(
+            self.create_game(game_id=game_id, mode=mode, difficulty=difficulty)
+            for game_id in game_ids
+        )
+
+    async def board_states(
+        self, game_ids: Iterable[str]
+    ) -> dict[str, list[list[str]] | None]:
+        """Fetch several boards concurrently; vanished games map to ``None``."""
+
+        ordered = list(game_ids)
+
+        async def fetch(game_id: str) -> list[list[str]] | None:
+            try:
+                return await self.board_state(game_id)
+            except httpx.HTTPStatusError as exc:
+                if exc.response.status_code == 404:
+                    return None
+                raise
+
+        boards = await self._gather(fetch(game_id) for game_id in ordered)
+        return dict(zip(ordered, boards))
+
+    async def watch(
+        self, game_id: str, player_id: str, *, mode: str | None = None
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Join ``game_id`` over websocket and yield every message received."""
+
+        try:
+            import websockets
+        except ImportError as exc:  # pragma: no cover - optional dependency
+            raise RuntimeError(
+                "Watching games requires the 'websockets' package"
+            ) from exc
+
+        url = _websocket_url(self.base_url, f"/ws/{game_id}/{player_id}")
+        if mode:
+            url = f"{url}?mode={mode}"
+        async with websockets.connect(url) as websocket:
+            async for raw in websocket:
+                yield json.loads(raw)
+
+    async def _gather(self, coros: Iterable[Any]) -> list[Any]:
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def bounded(coro: Any) -> Any:
+            async with semaphore:
+                return await coro
+
+        return await asyncio.gather(*(bounded(coro) for coro in coros))
+
+
+async def healthcheck(client: Connect4Client, args: argparse.Namespace) -> None:
+    _print_json(await client.health())
+
 
-def healthcheck(args: argparse.Namespace) -> None:
-    response = _request("GET", "/health", base_url=args.base_url)
-    _print_json(response.json())
+async def create_game(client: Connect4Client, args: argparse.Namespace) -> None:
+    payload = await client.create_game(game_id=args.game_id, mode=args.mode)
+    _print_json(payload)
 
 
-def create_game(args: argparse.Namespace) -> None:
-    payload: dict[str, Any] = {}
-    if args.game_id:
-        payload["gameId"] = args.game_id
-    if args.mode:
-        payload["mode"] = args.mode
-    response = _request("POST", "/games", base_url=args.base_url, json=payload)
-    _print_json(response.json())
+async def list_games(client: Connect4Client, args: argparse.Namespace) -> None:
+    _print_json(await client.list_games(mode=args.mode, occupancy=args.occupancy))
 
 
-def list_games(args: argparse.Namespace) -> None:
-    response = _request("GET", "/games", base_url=args.base_url)
-    _print_json(response.json())
+async def get_game(client: Connect4Client, args: argparse.Namespace) -> None:
+    _print_json(await client.get_game(args.game_id))
 
 
-def get_game(args: argparse.Namespace) -> None:
-    response = _request("GET", f"/games/{args.game_id}", base_url=args.base_url)
-    _print_json(response.json())
+async def print_board(client: Connect4Client, args: argparse.Namespace) -> None:
+    print(_format_board(await client.board_state(args.game_id)))
 
 
-def print_board(args: argparse.Namespace) -> None:
-    response = _request(
-        "GET", f"/games/{args.game_id}/board_state", base_url=args.base_url
+async def bulk_create(client: Connect4Client, args: argparse.Namespace) -> None:
+    created = await client.create_games(
+        args.count,
+        mode=args.mode,
+        difficulty=args.difficulty,
+        prefix=args.prefix,
     )
-    for row in response.json()[-1::-1]:
-        print("  ".join(row))
-    # _print_json(response.json())
+    _print_json(created)
+
+
+async def dump_boards(client: Connect4Client, args: argparse.Namespace) -> None:
+    game_ids = args.game_ids or [game["game_id"] for game in await client.list_games()]
+    boards = await client.board_states(game_ids)
+    if args.json:
+        _print_json(boards)
+        return
+    for game_id, rows in boards.items():
+        print(f"== {game_id}")
+        print(_format_board(rows) if rows is not None else "(not found)")
+
+
+async def watch_game(client: Connect4Client, args: argparse.Namespace) -> None:
+    async for message in client.watch(args.game_id, args.player_id, mode=args.mode):
+        print(json.dumps(message, sort_keys=True), flush=True)
 
 
 def build_parser() -> argparse.ArgumentParser:
@@ -64,6 +246,18 @@ def build_parser() -> argparse.ArgumentParser:
     parser.add_argument(
         "--base-url", default=DEFAULT_BASE_URL, help="Base URL of the API"
     )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=DEFAULT_TIMEOUT,
+        help="Per-request timeout in seconds",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help="Maximum concurrent requests (and pooled connections) for bulk commands",
+    )
 
     subparsers = parser.add_subparsers(dest="command", required=True)
 
@@ -73,6 +267,14 @@ def build_parser() -> argparse.ArgumentParser:
     list_parser = subparsers.add_parser(
         "list", help="List currently active game sessions"
     )
+    list_parser.add_argument(
+        "--mode", choices=["solo", "multiplayer"], help="Only list this game mode"
+    )
+    list_parser.add_argument(
+        "--occupancy",
+        choices=["empty", "open", "full"],
+        help="Only list sessions with this seat availability",
+    )
     list_parser.set_defaults(func=list_games)
 
     create_parser = subparsers.add_parser("create", help="Register a new game session")
@@ -88,18 +290,81 @@ def build_parser() -> argparse.ArgumentParser:
 
     get_parser = subparsers.add_parser("get", help="Inspect a specific game session")
     get_parser.add_argument("game_id", help="Identifier of the session to fetch")
-    # get_parser.set_defaults(func=get_game)
     get_parser.set_defaults(func=print_board)
 
+    info_parser = subparsers.add_parser(
+        "info", help="Print session metadata for a specific game"
+    )
+    info_parser.add_argument("game_id", help="Identifier of the session to fetch")
+    info_parser.set_defaults(func=get_game)
+
+    bulk_parser = subparsers.add_parser(
+        "bulk-create", help="Register many game sessions concurrently"
+    )
+    bulk_parser.add_argument("count", type=int, help="Number of sessions to create")
+    bulk_parser.add_argument(
+        "--mode",
+        choices=["solo", "multiplayer"],
+        help="Game mode (default: multiplayer)",
+    )
+    bulk_parser.add_argument(
+        "--difficulty",
+        choices=["casual", "standard", "challenger", "expert"],
+        help="AI difficulty for solo sessions",
+    )
+    bulk_parser.add_argument(
+        "--prefix",
+        help="Use '<prefix>-<n>' identifiers instead of server-generated ones",
+    )
+    bulk_parser.set_defaults(func=bulk_create)
+
+    dump_parser = subparsers.add_parser(
+        "dump-boards", help="Fetch board states concurrently"
+    )
+    dump_parser.add_argument(
+        "game_ids",
+        nargs="*",
+        help="Sessions to dump (default: every listed session)",
+    )
+    dump_parser.add_argument(
+        "--json", action="store_true", help="Emit raw JSON instead of boards"
+    )
+    dump_parser.set_defaults(func=dump_boards)
+
+    watch_parser = subparsers.add_parser(
+        "watch", help="Join a game over websocket and print its messages"
+    )
+    watch_parser.add_argument("game_id", help="Identifier of the session to watch")
+    watch_parser.add_argument(
+        "--player-id",
+        default="watcher",
+        help="Player identifier used for the connection (occupies a seat)",
+    )
+    watch_parser.add_argument(
+        "--mode",
+        choices=["solo", "multiplayer"],
+        help="Game mode to request when joining",
+    )
+    watch_parser.set_defaults(func=watch_game)
+
     return parser
 
 
+async def _run(args: argparse.Namespace) -> None:
+    async with Connect4Client(
+        args.base_url, timeout=args.timeout, concurrency=args.concurrency
+    ) as client:
+        await args.func(client, args)
+
+
 def main(argv: list[str] | None = None) -> None:
     parser = build_parser()
     args = parser.parse_args(argv)
 
-    handler = getattr(args, "func")
-    handler(args)
+    try:
+        asyncio.run(_run(args))
+    except KeyboardInterrupt:
+        pass
 
 
 if __name__ == "__main__":
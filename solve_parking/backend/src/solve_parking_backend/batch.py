@@ -0,0 +1,162 @@
+"""Solve many puzzles at once, reporting each result as soon as it is ready.
+
+Used by ``POST /api/solve/batch`` and by the command line, which re-verifies
+stored configurations without touching any session::
+
+    python -m solve_parking_backend.batch --all
+    python -m solve_parking_backend.batch 3 7 --states extra.ndjson
+
+Results are NDJSON lines in completion order, not request order.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+from typing import AsyncIterator, Callable, Iterable, Sequence
+
+from .models import BatchSolveResult, PuzzleState, SolveAlgorithm
+from .repository import PuzzleRepository
+from .services import InvalidPuzzleError, validate_state
+from .solver import Solution
+from .workers import (
+    SOLVE_TIME_BUDGET,
+    SOLVE_WORKERS,
+    SolveCancelledError,
+    SolveLimitError,
+    SolverPool,
+    SolveTimeoutError,
+)
+
+# An item to solve: its id in the results and its state, or ``None`` when the
+# id did not resolve to a puzzle.
+BatchItem = tuple[str, PuzzleState | None]
+
+
+def config_items(
+    repository: PuzzleRepository, config_ids: Iterable[int]
+) -> list[BatchItem]:
+    items: list[BatchItem] = []
+    for config_id in config_ids:
+        try:
+            state: PuzzleState | None = repository.get_puzzle(config_id).to_state()
+        except KeyError:
+            state = None
+        items.append((f"config:{config_id}", state))
+    return items
+
+
+def state_items(states: Iterable[PuzzleState]) -> list[BatchItem]:
+    return [(f"state:{index}", state) for index, state in enumerate(states)]
+
+
+async def solve_batch(
+    items: Sequence[BatchItem],
+    pool: SolverPool,
+    algorithm: SolveAlgorithm = SolveAlgorithm.bfs,
+    *,
+    time_budget: float = SOLVE_TIME_BUDGET,
+    on_solution: Callable[[Solution], None] | None = None,
+) -> AsyncIterator[BatchSolveResult]:
+    """Yield one result per item as its search finishes.
+
+    Items wait for :meth:`SolverPool.batch_slot`, which all batches share, so
+    together they never hold more than ``pool.batch`` workers and the rest of
+    the queue stays free for interactive solves. Failures are reported in the
+    item's result instead of ending the batch. Closing the iterator early
+    stops the searches still running.
+    """
+
+    async def solve_one(item_id: str, state: PuzzleState | None) -> BatchSolveResult:
+        if state is None:
+            return BatchSolveResult(id=item_id, error="Puzzle not found.")
+        try:
+            validate_state(state)
+        except InvalidPuzzleError as exc:
+            return BatchSolveResult(id=item_id, error=str(exc))
+        async with pool.batch_slot():
+            started = time.perf_counter()
+            try:
+                solution = await pool.solve(state, algorithm, time_budget=time_budget)
+            except (
+                SolveTimeoutError,
+                SolveLimitError,
+                SolveCancelledError,
+            ) as exc:
+                elapsed_ms = (time.perf_counter() - started) * 1000.0
+                return BatchSolveResult(
+                    id=item_id, elapsed_ms=elapsed_ms, error=str(exc)
+                )
+            elapsed_ms = (time.perf_counter() - started) * 1000.0
+        if on_solution is not None:
+            on_solution(solution)
+        solvable = solution.result.completed
+        return BatchSolveResult(
+            id=item_id,
+            solvable=solvable,
+            moves=solution.moves if solvable else None,
+            nodes=solution.nodes,
+            elapsed_ms=elapsed_ms,
+        )
+
+    tasks = [asyncio.ensure_future(solve_one(*item)) for item in items]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def _read_states(path: Path) -> list[PuzzleState]:
+    """One JSON puzzle state per line; ``-`` reads standard input."""
+
+    lines = sys.stdin if str(path) == "-" else path.read_text().splitlines()
+    return [PuzzleState.model_validate_json(line) for line in lines if line.strip()]
+
+
+async def _run(items: Sequence[BatchItem], args: argparse.Namespace) -> bool:
+    pool = SolverPool(workers=args.workers, queue=0, batch=args.workers)
+    ok = True
+    try:
+        async for result in solve_batch(
+            items, pool, args.algorithm, time_budget=args.time_budget
+        ):
+            ok = ok and result.error is None
+            print(result.model_dump_json(), flush=True)
+    finally:
+        pool.shutdown()
+    return ok
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    data = Path(__file__).resolve().parents[2] / "data"
+    parser.add_argument("config_ids", type=int, nargs="*", help="Stored puzzle ids.")
+    parser.add_argument("--all", action="store_true", help="Every stored puzzle.")
+    parser.add_argument(
+        "--states", type=Path, help="NDJSON file of puzzle states, or - for stdin."
+    )
+    parser.add_argument("--db", type=Path, default=data / "puzzles.sqlite3")
+    parser.add_argument("--algorithm", type=SolveAlgorithm, default=SolveAlgorithm.bfs)
+    parser.add_argument("--workers", type=int, default=SOLVE_WORKERS)
+    parser.add_argument("--time-budget", type=float, default=SOLVE_TIME_BUDGET)
+    args = parser.parse_args(argv)
+
+    repository = PuzzleRepository(args.db)
+    config_ids = list(args.config_ids)
+    if args.all:
+        config_ids += [record.id for record in repository.list_puzzles()]
+    items = config_items(repository, config_ids)
+    if args.states is not None:
+        items += state_items(_read_states(args.states))
+    if not items:
+        parser.error("nothing to solve: pass config ids, --all or --states")
+    return 0 if asyncio.run(_run(items, args)) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""Compare the solver searches on a corpus of hard puzzles.
+
+Every search in :data:`solver.SEARCHES` solves every puzzle; the report lists
+the solution length, the number of states expanded and the best wall time of
+``--repeat`` runs. All searches are optimal, so differing move counts are a
+bug and make the run exit non-zero::
+
+    python -m solve_parking_backend.benchmark
+    python -m solve_parking_backend.benchmark --db data/puzzles.sqlite3 --json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import Sequence
+
+from .bitboard import BoardLayout
+from .models import PuzzleState, SolveAlgorithm
+from .services import state_from_grid
+from .solver import SEARCHES
+
+# Stored "intermediate" and "expert" layouts, the slowest for BFS.
+CORPUS: dict[str, PuzzleState] = {
+    "intermediate13": state_from_grid(
+        ".AABBB/CCCDEF/GGHDEF/I.HJJK/ILL..K/MMNNNK", goal="G"
+    ),
+    "intermediate18": state_from_grid(
+        ".ABBBC/.A...C/.DDEFG/HHIEFG/J.ILLG/J.IKKK", goal="D"
+    ),
+    "intermediate19": state_from_grid(
+        "..ABBB/..A..C/DDE..C/FFE.GK/.HIIGK/.HJJJK", goal="D"
+    ),
+    "expert33": state_from_grid("AABBBD/C.EEFD/C.XXFG/KKJHHG/LLJI../MMMI.."),
+    "expert36": state_from_grid("ABBC../A..CDD/AEEF../..GFHH/..GIIJ/..G..J", goal="E"),
+    "expert37": state_from_grid("BBBGFD/CEEGFD/C.XXF./KKJ.../.IJ.LL/.IMMHH"),
+    "expert38": state_from_grid("A.CCD./ABF.DE/ABFXXE/GGGH.E/..JHII/LLJMM."),
+}
+
+
+def load_corpus(db_path: Path) -> dict[str, PuzzleState]:
+    """Every puzzle stored in a repository database, by name."""
+
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute("SELECT name, payload FROM puzzles ORDER BY id").fetchall()
+    return {name: PuzzleState.model_validate_json(payload) for name, payload in rows}
+
+
+def run(
+    corpus: dict[str, PuzzleState],
+    algorithms: Sequence[SolveAlgorithm],
+    *,
+    repeat: int = 3,
+) -> list[dict[str, object]]:
+    results: list[dict[str, object]] = []
+    for name, state in corpus.items():
+        layout, start = BoardLayout.from_state(state)
+        for algorithm in algorithms:
+            search = SEARCHES[algorithm]
+            best = float("inf")
+            for _ in range(repeat):
+                started = time.perf_counter()
+                outcome = search(layout, start)
+                best = min(best, time.perf_counter() - started)
+            results.append(
+                {
+                    "puzzle": name,
+                    "algorithm": algorithm.value,
+                    "solved": outcome.completed,
+                    "moves": len(outcome.moves),
+                    "nodes": outcome.nodes,
+                    "ms": best * 1000,
+                }
+            )
+    return results
+
+
+def _consistent(results: Sequence[dict[str, object]]) -> bool:
+    lengths: dict[object, set[object]] = {}
+    for result in results:
+        lengths.setdefault(result["puzzle"], set()).add(result["moves"])
+    return all(len(moves) == 1 for moves in lengths.values())
+
+
+def _parse_algorithms(value: str) -> list[SolveAlgorithm]:
+    return [SolveAlgorithm(name.strip()) for name in value.split(",") if name.strip()]
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--algorithms",
+        type=_parse_algorithms,
+        default=list(SEARCHES),
+        help="Comma-separated searches to compare (default: all).",
+    )
+    parser.add_argument(
+        "--db", type=Path, help="Benchmark the puzzles stored in this database."
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="Print JSON results.")
+    args = parser.parse_args(argv)
+
+    corpus = load_corpus(args.db) if args.db else CORPUS
+    results = run(corpus, args.algorithms, repeat=args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'puzzle':<16}{'search':<15}{'moves':>6}{'nodes':>9}{'ms':>9}")
+        for result in results:
+            print(
+                f"{result['puzzle']:<16}{result['algorithm']:<15}"
+                f"{result['moves']:>6}{result['nodes']:>9}{result['ms']:>9.1f}"
+            )
+    if not _consistent(results):
+        print("searches disagree on the optimal move count", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,196 @@
+"""Compact bitboard encoding of puzzle states for the solvers.
+
+A :class:`BoardLayout` holds everything about a puzzle that never changes
+while vehicles slide: the board size, the exit and, for every vehicle, its
+orientation, its lane (row or column) and a precomputed occupancy mask for each
+offset it can take along that lane. A search state is then just the tuple of
+vehicle offsets, in the order of ``PuzzleState.vehicles``; the occupancy of a
+state is the OR of one mask per vehicle. Cell ``(row, col)`` is bit
+``row * size + col``.
+
+States are converted back to :class:`PuzzleState` only for the final path.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator
+
+from .models import Orientation, PuzzleState
+
+Offsets = tuple[int, ...]
+
+
+@dataclass(frozen=True)
+class BoardLayout:
+    """Static part of a puzzle plus per-vehicle lane masks."""
+
+    size: int
+    exit_row: int
+    exit_col: int
+    ids: tuple[str, ...]
+    horizontal: tuple[bool, ...]
+    lanes: tuple[int, ...]
+    lengths: tuple[int, ...]
+    masks: tuple[tuple[int, ...], ...]
+    goal_index: int
+    # Offset at which the goal vehicle's tail sits on the exit, or -1 when the
+    # goal vehicle does not share a row with the exit.
+    goal_offset: int
+
+    @classmethod
+    def from_state(cls, state: PuzzleState) -> tuple["BoardLayout", Offsets]:
+        size = state.size
+        ids: list[str] = []
+        horizontal: list[bool] = []
+        lanes: list[int] = []
+        lengths: list[int] = []
+        masks: list[tuple[int, ...]] = []
+        offsets: list[int] = []
+        goal_index = -1
+        for index, vehicle in enumerate(state.vehicles):
+            is_horizontal = vehicle.orientation is Orientation.horizontal
+            lane = vehicle.row if is_horizontal else vehicle.col
+            step = 1 if is_horizontal else size
+            body = sum(1 << (offset * step) for offset in range(vehicle.length))
+            positions = range(size - vehicle.length + 1)
+            if is_horizontal:
+                starts = [lane * size + offset for offset in positions]
+            else:
+                starts = [offset * size + lane for offset in positions]
+            lane_masks = tuple(body << start for start in starts)
+            ids.append(vehicle.id)
+            horizontal.append(is_horizontal)
+            lanes.append(lane)
+            lengths.append(vehicle.length)
+            masks.append(lane_masks)
+            offsets.append(vehicle.col if is_horizontal else vehicle.row)
+            if vehicle.goal:
+                goal_index = index
+
+        goal_offset = -1
+        if goal_index >= 0 and horizontal[goal_index]:
+            if lanes[goal_index] == state.exit.row:
+                goal_offset = state.exit.col - lengths[goal_index] + 1
+
+        layout = cls(
+            size=size,
+            exit_row=state.exit.row,
+            exit_col=state.exit.col,
+            ids=tuple(ids),
+            horizontal=tuple(horizontal),
+            lanes=tuple(lanes),
+            lengths=tuple(lengths),
+            masks=tuple(masks),
+            goal_index=goal_index,
+            goal_offset=goal_offset,
+        )
+        return layout, tuple(offsets)
+
+    def occupancy(self, offsets: Offsets) -> int:
+        occupied = 0
+        for lane_masks, offset in zip(self.masks, offsets):
+            occupied |= lane_masks[offset]
+        return occupied
+
+    def is_solved(self, offsets: Offsets) -> bool:
+        return offsets[self.goal_index] == self.goal_offset
+
+    def neighbours(self, offsets: Offsets) -> Iterator[tuple[int, int, Offsets]]:
+        """Yield ``(vehicle index, steps, child)`` for every single-vehicle slide.
+
+        A move slides one vehicle any number of free cells along its lane.
+        """
+
+        occupied = self.occupancy(offsets)
+        for index, lane_masks in enumerate(self.masks):
+            offset = offsets[index]
+            blocked = occupied ^ lane_masks[offset]
+            head = offsets[:index]
+            tail = offsets[index + 1 :]
+            position = offset - 1
+            while position >= 0 and not lane_masks[position] & blocked:
+                yield index, position - offset, head + (position,) + tail
+                position -= 1
+            position = offset + 1
+            last = len(lane_masks)
+            while position < last and not lane_masks[position] & blocked:
+                yield index, position - offset, head + (position,) + tail
+                position += 1
+
+    def to_state(self, template: PuzzleState, offsets: Offsets) -> PuzzleState:
+        """``template`` with its vehicles moved to ``offsets``."""
+
+        vehicles = []
+        for index, vehicle in enumerate(template.vehicles):
+            offset = offsets[index]
+            if self.horizontal[index]:
+                update = {"row": self.lanes[index], "col": offset}
+            else:
+                update = {"row": offset, "col": self.lanes[index]}
+            vehicles.append(vehicle.model_copy(update=update))
+        return template.model_copy(update={"vehicles": vehicles})
+
+    def solved_states(
+        self, reference: Offsets, *, step: Callable[[], bool] | None = None
+    ) -> Iterator[Offsets]:
+        """Every solved arrangement reachable as far as lane order allows.
+
+        The goal vehicle sits at the exit and every other vehicle anywhere in
+        its lane without overlaps. Vehicles sharing a lane can never pass one
+        another, so their order in ``reference`` is kept, which also rules out
+        most arrangements that no sequence of moves could produce.
+
+        There can be very many of them on a large board, so ``step`` is called
+        once per placement tried; when it returns true the enumeration ends.
+        """
+
+        if self.goal_offset < 0:
+            return
+        count = len(self.masks)
+        lanes: dict[tuple[bool, int], list[int]] = {}
+        for index in range(count):
+            lane = (self.horizontal[index], self.lanes[index])
+            lanes.setdefault(lane, []).append(index)
+        behind: list[int | None] = [None] * count
+        for members in lanes.values():
+            members.sort(key=lambda index: reference[index])
+            for first, second in zip(members, members[1:]):
+                behind[second] = first
+        # Place vehicles lane by lane, front to back, so order checks only
+        # ever look at an already placed neighbour.
+        order = sorted(
+            range(count),
+            key=lambda index: (
+                self.horizontal[index],
+                self.lanes[index],
+                reference[index],
+            ),
+        )
+        placed = list(reference)
+        halted = False
+
+        def place(position: int, occupied: int) -> Iterator[Offsets]:
+            nonlocal halted
+            if position == count:
+                yield tuple(placed)
+                return
+            index = order[position]
+            if index == self.goal_index:
+                candidates: Iterable[int] = (self.goal_offset,)
+            else:
+                candidates = range(len(self.masks[index]))
+            previous = behind[index]
+            for offset in candidates:
+                if halted or (step is not None and step()):
+                    halted = True
+                    return
+                if previous is not None and offset <= placed[previous]:
+                    continue
+                mask = self.masks[index][offset]
+                if mask & occupied:
+                    continue
+                placed[index] = offset
+                yield from place(position + 1, occupied | mask)
+
+        yield from place(0, 0)
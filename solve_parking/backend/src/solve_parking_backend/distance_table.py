@@ -0,0 +1,313 @@
+"""Precomputed distance-to-goal tables for stored puzzles.
+
+Every state reachable from a puzzle belongs to the same cluster, and a cluster
+is usually only thousands to tens of thousands of states. Building a table
+enumerates the whole cluster once, then runs a breadth-first search backwards
+from every solved state in it; since every slide can be undone, that gives the
+optimal number of moves remaining for each state. Afterwards "how far from the
+exit" is a dictionary lookup.
+
+Tables live as one file per cluster in a ``distances`` directory next to
+``puzzles.sqlite3``, named by a digest of the static layout plus the cluster's
+smallest state, so puzzles sharing a cluster share a file. Each record is the
+state's vehicle offsets, one byte each, followed by one distance byte.
+
+Build tables for every stored puzzle with::
+
+    python -m solve_parking_backend.distance_table
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import struct
+import sys
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Sequence
+
+from .benchmark import load_corpus
+from .bitboard import BoardLayout, Offsets
+from .models import PuzzleState
+from .solver import cache_key
+
+logger = logging.getLogger(__name__)
+
+DISTANCE_TABLE_MAX_STATES = int(
+    os.getenv("SOLVE_PARKING_DISTANCE_TABLE_MAX_STATES", "1000000")
+)
+# Distance byte for states in a cluster that has no solved state.
+UNSOLVABLE = 255
+_MAGIC = b"SPDT"
+_VERSION = 1
+_HEADER = struct.Struct("<4sBBI")
+
+
+class ClusterTooLargeError(RuntimeError):
+    """Raised when a cluster has more states than a table may hold."""
+
+
+def layout_digest(layout: BoardLayout) -> str:
+    """Identify everything about a puzzle that sliding cannot change."""
+
+    static = [
+        layout.size,
+        layout.exit_row,
+        layout.exit_col,
+        layout.ids,
+        layout.horizontal,
+        layout.lanes,
+        layout.lengths,
+        layout.goal_index,
+    ]
+    encoded = json.dumps(static, separators=(",", ":")).encode()
+    return hashlib.sha1(encoded).hexdigest()[:16]
+
+
+@dataclass(frozen=True)
+class DistanceTable:
+    """Optimal moves remaining for every state of one cluster."""
+
+    layout: BoardLayout
+    distances: dict[bytes, int]
+
+    def __contains__(self, offsets: Offsets) -> bool:
+        return bytes(offsets) in self.distances
+
+    def __len__(self) -> int:
+        return len(self.distances)
+
+    def distance(self, offsets: Offsets) -> int | None:
+        """Moves remaining from ``offsets``, or ``None`` if it cannot be solved."""
+
+        distance = self.distances[bytes(offsets)]
+        return None if distance == UNSOLVABLE else distance
+
+    def next_move(self, offsets: Offsets) -> tuple[int, int] | None:
+        """``(vehicle index, steps)`` of a move one closer to the exit.
+
+        ``None`` when ``offsets`` is already solved or cannot be solved.
+        """
+
+        remaining = self.distance(offsets)
+        if not remaining:
+            return None
+        for index, steps, child in self.layout.neighbours(offsets):
+            if self.distances.get(bytes(child)) == remaining - 1:
+                return index, steps
+        raise ValueError("Distance table is inconsistent.")
+
+    @property
+    def filename(self) -> str:
+        return f"{layout_digest(self.layout)}-{min(self.distances).hex()}.bin"
+
+    def dump(self, path: Path) -> None:
+        """Write the table, replacing ``path`` atomically."""
+
+        width = len(self.layout.ids)
+        payload = bytearray(_HEADER.pack(_MAGIC, _VERSION, width, len(self)))
+        for key, distance in self.distances.items():
+            payload += key
+            payload.append(distance)
+        partial = path.with_suffix(".tmp")
+        partial.write_bytes(payload)
+        os.replace(partial, path)
+
+    @classmethod
+    def load(cls, layout: BoardLayout, path: Path) -> "DistanceTable":
+        payload = path.read_bytes()
+        magic, version, width, count = _HEADER.unpack_from(payload)
+        if magic != _MAGIC or version != _VERSION or width != len(layout.ids):
+            msg = f"{path.name} is not a distance table for this layout."
+            raise ValueError(msg)
+        record = width + 1
+        distances = {}
+        for start in range(_HEADER.size, _HEADER.size + count * record, record):
+            distances[payload[start : start + width]] = payload[start + width]
+        return cls(layout=layout, distances=distances)
+
+
+def build_table(
+    state: PuzzleState, *, max_states: int = DISTANCE_TABLE_MAX_STATES
+) -> DistanceTable:
+    """Enumerate the cluster of ``state`` and measure each state's distance."""
+
+    layout, start = BoardLayout.from_state(state)
+    cluster = {start}
+    frontier = [start]
+    while frontier:
+        discovered = []
+        for offsets in frontier:
+            for _, _, child in layout.neighbours(offsets):
+                if child not in cluster:
+                    cluster.add(child)
+                    discovered.append(child)
+        if len(cluster) > max_states:
+            msg = f"Cluster has more than {max_states} states."
+            raise ClusterTooLargeError(msg)
+        frontier = discovered
+
+    if layout.goal_offset < 0:
+        frontier = []
+    else:
+        frontier = [offsets for offsets in cluster if layout.is_solved(offsets)]
+    distances = {bytes(offsets): 0 for offsets in frontier}
+    depth = 0
+    while frontier:
+        depth += 1
+        if depth >= UNSOLVABLE:
+            raise ClusterTooLargeError("Cluster is too deep for a distance table.")
+        discovered = []
+        for offsets in frontier:
+            for _, _, child in layout.neighbours(offsets):
+                key = bytes(child)
+                if key not in distances:
+                    distances[key] = depth
+                    discovered.append(child)
+        frontier = discovered
+
+    for offsets in cluster:
+        distances.setdefault(bytes(offsets), UNSOLVABLE)
+    return DistanceTable(layout=layout, distances=distances)
+
+
+def _build_in_worker(directory: str, state: PuzzleState, max_states: int) -> int:
+    table = DistanceTables(Path(directory), max_states=max_states).build(state)
+    return len(table)
+
+
+class DistanceTables:
+    """Distance tables on disk, loaded on first use and built in the background."""
+
+    def __init__(
+        self, directory: Path, *, max_states: int = DISTANCE_TABLE_MAX_STATES
+    ) -> None:
+        self._directory = directory
+        self._max_states = max_states
+        self._loaded: dict[str, list[DistanceTable]] = {}
+        self._pending: set[str] = set()
+        self._lock = threading.Lock()
+        self._executor: ProcessPoolExecutor | None = None
+
+    def _tables(self, layout: BoardLayout) -> list[DistanceTable]:
+        digest = layout_digest(layout)
+        with self._lock:
+            tables = self._loaded.get(digest)
+        if tables is None:
+            tables = []
+            for path in sorted(self._directory.glob(f"{digest}-*.bin")):
+                try:
+                    tables.append(DistanceTable.load(layout, path))
+                except (OSError, ValueError, struct.error):
+                    logger.warning("Ignoring unreadable distance table %s", path)
+            with self._lock:
+                self._loaded[digest] = tables
+        return tables
+
+    def table_for(self, state: PuzzleState) -> tuple[DistanceTable, Offsets] | None:
+        """The table covering ``state`` and its offsets, if one was built."""
+
+        layout, offsets = BoardLayout.from_state(state)
+        for table in self._tables(layout):
+            if offsets in table:
+                return table, offsets
+        return None
+
+    def moves_remaining(self, state: PuzzleState) -> int | None:
+        """Optimal moves left, or ``None`` when unsolvable or not tabulated."""
+
+        found = self.table_for(state)
+        if found is None:
+            return None
+        table, offsets = found
+        return table.distance(offsets)
+
+    def build(self, state: PuzzleState) -> DistanceTable:
+        """Build and store the table for ``state`` unless one already covers it."""
+
+        found = self.table_for(state)
+        if found is not None:
+            return found[0]
+        table = build_table(state, max_states=self._max_states)
+        self._directory.mkdir(parents=True, exist_ok=True)
+        table.dump(self._directory / table.filename)
+        self._forget(table.layout)
+        return table
+
+    def _forget(self, layout: BoardLayout) -> None:
+        with self._lock:
+            self._loaded.pop(layout_digest(layout), None)
+
+    def schedule(self, state: PuzzleState) -> None:
+        """Build the table for ``state`` in a background process."""
+
+        if self.table_for(state) is not None:
+            return
+        key = cache_key(state)
+        with self._lock:
+            if key in self._pending:
+                return
+            self._pending.add(key)
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=1, mp_context=multiprocessing.get_context("spawn")
+                )
+            executor = self._executor
+        layout, _ = BoardLayout.from_state(state)
+
+        def finished(future: Future[int]) -> None:
+            with self._lock:
+                self._pending.discard(key)
+            if future.cancelled():
+                return
+            error = future.exception()
+            if error is not None:
+                logger.warning("Distance table build failed: %s", error)
+                return
+            logger.info("Built distance table with %d states", future.result())
+            self._forget(layout)
+
+        future = executor.submit(
+            _build_in_worker, str(self._directory), state, self._max_states
+        )
+        future.add_done_callback(finished)
+
+    def shutdown(self, *, wait: bool = False) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    data = Path(__file__).resolve().parents[2] / "data"
+    parser.add_argument("--db", type=Path, default=data / "puzzles.sqlite3")
+    parser.add_argument("--dir", type=Path, default=data / "distances")
+    parser.add_argument("--max-states", type=int, default=DISTANCE_TABLE_MAX_STATES)
+    args = parser.parse_args(argv)
+
+    tables = DistanceTables(args.dir, max_states=args.max_states)
+    failed = False
+    for name, state in load_corpus(args.db).items():
+        try:
+            table = tables.build(state)
+        except ClusterTooLargeError as exc:
+            print(f"{name:<24} skipped: {exc}", file=sys.stderr)
+            failed = True
+            continue
+        _, start = BoardLayout.from_state(state)
+        remaining = table.distance(start)
+        moves = "unsolvable" if remaining is None else f"{remaining} moves"
+        print(f"{name:<24}{len(table):>9} states  {moves}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
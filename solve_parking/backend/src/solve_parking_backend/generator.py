@@ -0,0 +1,260 @@
+"""Generate hard puzzles for the catalogue.
+
+Random vehicle layouts are drawn chunk by chunk from a seed. For each one the
+whole cluster of reachable states is enumerated and measured with a breadth-
+first search backwards from its solved states (see
+:func:`distance_table.build_table`); the state furthest from the exit is the
+hardest puzzle the cluster has to offer. Vehicles are relabelled in reading
+order and ties go to the smallest grid, so a cluster always yields the same
+puzzle and is stored once however often it is sampled.
+
+Chunks run in parallel worker processes and each chunk's puzzles are written
+in one transaction together with a record that the chunk is done, so an
+interrupted run with the same seed and options picks up where it stopped::
+
+    python -m solve_parking_backend.generator --chunks 64 --min-moves 25
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import string
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Sequence
+
+from .distance_table import UNSOLVABLE, ClusterTooLargeError, build_table
+from .models import Orientation, PuzzleState
+from .repository import PuzzleRepository
+from .services import state_from_grid
+
+GOAL_ID = "X"
+VEHICLE_IDS = [letter for letter in string.ascii_uppercase if letter != GOAL_ID]
+# Chance that a vehicle is a three-cell truck rather than a two-cell car.
+TRUCK_RATE = 0.25
+
+
+@dataclass(frozen=True)
+class GeneratorOptions:
+    """What to sample and what to keep."""
+
+    size: int = 6
+    exit_row: int = 2
+    min_vehicles: int = 10
+    max_vehicles: int = 14
+    chunk_size: int = 200
+    min_moves: int = 20
+    max_states: int = 50_000
+
+    def digest(self) -> str:
+        """Identify these options in the record of finished chunks.
+
+        A chunk done under other options sampled or kept different puzzles,
+        so it does not count as done for these.
+        """
+
+        encoded = json.dumps(asdict(self), sort_keys=True).encode()
+        return hashlib.sha1(encoded).hexdigest()[:16]
+
+
+@dataclass(frozen=True)
+class GeneratedPuzzle:
+    name: str
+    moves: int
+    cluster_size: int
+    state: PuzzleState
+
+
+def random_layout(rng: random.Random, options: GeneratorOptions) -> PuzzleState:
+    """Place the goal car in the exit row, then as many vehicles as fit."""
+
+    size = options.size
+    grid = [["."] * size for _ in range(size)]
+    goal_col = rng.randrange(size - 2)
+    grid[options.exit_row][goal_col] = grid[options.exit_row][goal_col + 1] = GOAL_ID
+
+    wanted = rng.randint(options.min_vehicles, options.max_vehicles)
+    placed = 0
+    for _ in range(wanted * 20):
+        if placed == wanted or placed == len(VEHICLE_IDS):
+            break
+        length = 3 if rng.random() < TRUCK_RATE else 2
+        horizontal = rng.random() < 0.5
+        row = rng.randrange(size - (0 if horizontal else length - 1))
+        col = rng.randrange(size - (length - 1 if horizontal else 0))
+        if horizontal and row == options.exit_row:
+            # Another car in the exit row could never get out of the way.
+            continue
+        cells = [
+            (row, col + offset) if horizontal else (row + offset, col)
+            for offset in range(length)
+        ]
+        if any(grid[r][c] != "." for r, c in cells):
+            continue
+        for r, c in cells:
+            grid[r][c] = VEHICLE_IDS[placed]
+        placed += 1
+    return state_from_grid("/".join("".join(line) for line in grid), goal=GOAL_ID)
+
+
+def _render(state: PuzzleState) -> str:
+    """The grid of ``state`` with vehicles relabelled in reading order.
+
+    Two samples of the same board then produce the same puzzle whatever
+    letters they were drawn with.
+    """
+
+    size = state.size
+    grid = [["."] * size for _ in range(size)]
+    for vehicle in state.vehicles:
+        horizontal = vehicle.orientation is Orientation.horizontal
+        for offset in range(vehicle.length):
+            row = vehicle.row if horizontal else vehicle.row + offset
+            col = vehicle.col + offset if horizontal else vehicle.col
+            grid[row][col] = vehicle.id
+    labels = iter(VEHICLE_IDS)
+    relabel = {GOAL_ID: GOAL_ID}
+    for line in grid:
+        for col, letter in enumerate(line):
+            if letter != ".":
+                if letter not in relabel:
+                    relabel[letter] = next(labels)
+                line[col] = relabel[letter]
+    return "/".join("".join(line) for line in grid)
+
+
+def hardest_in_cluster(
+    state: PuzzleState, max_states: int
+) -> tuple[str, int, int] | None:
+    """``(grid of the hardest state, its moves, cluster size)``.
+
+    ``None`` when the cluster cannot be solved.
+    """
+
+    table = build_table(state, max_states=max_states)
+    if UNSOLVABLE in table.distances.values():
+        return None
+    moves = max(table.distances.values())
+    grids = (
+        _render(table.layout.to_state(state, tuple(key)))
+        for key, distance in table.distances.items()
+        if distance == moves
+    )
+    return min(grids), moves, len(table)
+
+
+def _puzzle_name(grid: str, moves: int) -> str:
+    digest = hashlib.sha1(grid.encode()).hexdigest()[:10]
+    return f"Generated {moves:02d} #{digest}"
+
+
+def generate_chunk(
+    seed: int, chunk: int, options: GeneratorOptions
+) -> list[GeneratedPuzzle]:
+    """Sample ``options.chunk_size`` layouts and keep the hard clusters.
+
+    The same seed and chunk always sample the same layouts.
+    """
+
+    rng = random.Random(seed * 1_000_003 + chunk)
+    found: dict[str, GeneratedPuzzle] = {}
+    for _ in range(options.chunk_size):
+        layout_state = random_layout(rng, options)
+        try:
+            hardest = hardest_in_cluster(layout_state, options.max_states)
+        except ClusterTooLargeError:
+            continue
+        if hardest is None:
+            continue
+        grid, moves, cluster_size = hardest
+        if moves < options.min_moves:
+            continue
+        name = _puzzle_name(grid, moves)
+        state = state_from_grid(grid, goal=GOAL_ID)
+        found[name] = GeneratedPuzzle(name, moves, cluster_size, state)
+    return list(found.values())
+
+
+def run(
+    repository: PuzzleRepository,
+    options: GeneratorOptions,
+    *,
+    seed: int,
+    chunks: int,
+    workers: int,
+) -> int:
+    """Generate every chunk not yet recorded for ``seed`` and ``options``.
+
+    Returns the number of puzzles added.
+    """
+
+    digest = options.digest()
+    done = repository.generated_chunks(seed, digest)
+    pending = [chunk for chunk in range(chunks) if chunk not in done]
+    added = 0
+    with ProcessPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {
+            executor.submit(generate_chunk, seed, chunk, options): chunk
+            for chunk in pending
+        }
+        for future in as_completed(futures):
+            chunk = futures[future]
+            puzzles = future.result()
+            inserted = repository.save_generated_chunk(
+                seed,
+                digest,
+                chunk,
+                [(puzzle.name, puzzle.state) for puzzle in puzzles],
+            )
+            added += inserted
+            hardest = max((puzzle.moves for puzzle in puzzles), default=0)
+            print(
+                f"chunk {chunk:>5}: {len(puzzles):>4} hard, {inserted:>4} new, "
+                f"hardest {hardest} moves",
+                flush=True,
+            )
+    return added
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    data = Path(__file__).resolve().parents[2] / "data"
+    defaults = GeneratorOptions()
+    parser.add_argument("--db", type=Path, default=data / "puzzles.sqlite3")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunks", type=int, default=16)
+    parser.add_argument("--chunk-size", type=int, default=defaults.chunk_size)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--size", type=int, default=defaults.size)
+    parser.add_argument("--exit-row", type=int, default=defaults.exit_row)
+    parser.add_argument("--min-vehicles", type=int, default=defaults.min_vehicles)
+    parser.add_argument("--max-vehicles", type=int, default=defaults.max_vehicles)
+    parser.add_argument("--min-moves", type=int, default=defaults.min_moves)
+    parser.add_argument("--max-states", type=int, default=defaults.max_states)
+    args = parser.parse_args(argv)
+
+    options = GeneratorOptions(
+        size=args.size,
+        exit_row=args.exit_row,
+        min_vehicles=args.min_vehicles,
+        max_vehicles=args.max_vehicles,
+        chunk_size=args.chunk_size,
+        min_moves=args.min_moves,
+        max_states=args.max_states,
+    )
+    repository = PuzzleRepository(args.db)
+    added = run(
+        repository, options, seed=args.seed, chunks=args.chunks, workers=args.workers
+    )
+    print(f"added {added} puzzles")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
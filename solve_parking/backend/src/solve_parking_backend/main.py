@@ -23,22 +23,41 @@ from fastapi import (
     status,
 )
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 
 from . import solver
+from .batch import config_items, solve_batch, state_items
+from .distance_table import DistanceTables
 from .models import (
+    BatchSolveRequest,
     CreatePuzzleRequest,
     DeleteConfigResponse,
     ErrorResponse,
     Exit,
+    HintResponse,
+    HintSource,
     MoveRequest,
     MoveResponse,
     PuzzleConfigResponse,
     PuzzleState,
     PuzzleSummary,
+    RemainingResponse,
+    SolveAlgorithm,
+    SolveRequest,
     SolveResponse,
     UpdatePuzzleRequest,
 )
 from .repository import PuzzleRecord, PuzzleRepository
+from .solution_cache import SolutionCache
+from .workers import (
+    HINT_TIME_BUDGET,
+    SOLVE_TIME_BUDGET,
+    SolveCancelledError,
+    SolveLimitError,
+    SolverBusyError,
+    SolveTimeoutError,
+    solver_pool,
+)
 from .services import (
     InvalidMoveError,
     InvalidPuzzleError,
@@ -72,7 +91,10 @@ app = FastAPI(title="Solve Parking API", version="0.1.0")
 
 DATA_DIR = Path(__file__).resolve().parents[2] / "data"
 DB_PATH = DATA_DIR / "puzzles.sqlite3"
+DISTANCES_DIR = DATA_DIR / "distances"
 DEFAULT_PUZZLE_NAME = "Starter Puzzle"
+# Non-standard status (as used by nginx) for requests the client abandoned.
+CLIENT_CLOSED_REQUEST = 499
 
 SESSION_HEADER = "X-Session-ID"
 SESSION_COOKIE = "sp-session-id"
@@ -157,6 +179,24 @@ def _get_repository() -> PuzzleRepository:
     return repo
 
 
+def _get_solution_cache() -> SolutionCache:
+    cache = cast(Optional[SolutionCache], getattr(app.state, "solution_cache", None))
+    if cache is None:
+        cache = SolutionCache(_get_repository())
+        app.state.solution_cache = cache
+    return cache
+
+
+def _get_distance_tables() -> DistanceTables:
+    tables = cast(
+        Optional[DistanceTables], getattr(app.state, "distance_tables", None)
+    )
+    if tables is None:
+        tables = DistanceTables(DISTANCES_DIR)
+        app.state.distance_tables = tables
+    return tables
+
+
 def _record_to_summary(record: PuzzleRecord) -> PuzzleSummary:
     return PuzzleSummary(
         id=record.id,
@@ -291,6 +331,16 @@ def _initialize_state() -> None:
 
     _set_default_state(state, completed=is_solved(state))
 
+    tables = _get_distance_tables()
+    for summary in repo.list_puzzles():
+        tables.schedule(repo.get_puzzle(summary.id).to_state())
+
+
+@app.on_event("shutdown")
+def _shutdown_solvers() -> None:
+    solver_pool.shutdown()
+    _get_distance_tables().shutdown()
+
 
 @app.get("/health", summary="Health check", response_model=dict[str, str])
 def health() -> dict[str, str]:
@@ -368,6 +418,7 @@ async def create_config(request: CreatePuzzleRequest) -> PuzzleConfigResponse:
             status_code=status.HTTP_409_CONFLICT,
             detail="A puzzle with that name already exists.",
         ) from exc
+    _get_distance_tables().schedule(record.to_state())
 
     if record.active:
         state = record.to_state()
@@ -416,6 +467,7 @@ async def update_config(
             status_code=status.HTTP_409_CONFLICT,
             detail="A puzzle with that name already exists.",
         ) from exc
+    _get_distance_tables().schedule(record.to_state())
 
     if record.active:
         state = record.to_state()
@@ -601,20 +653,137 @@ async def move_random() -> MoveResponse:
     return MoveResponse(state=result.state, completed=result.completed)
 
 
+async def _cached_solution(
+    http_request: Request,
+    state: PuzzleState,
+    algorithm: SolveAlgorithm,
+    *,
+    time_budget: float = SOLVE_TIME_BUDGET,
+) -> solver.Solution:
+    """Solution from the cache, or from the solver pool and then cached."""
+
+    cache = _get_solution_cache()
+    try:
+        solution = cache.get(state, algorithm)
+        if solution is None:
+            solution = await solver_pool.solve(
+                state,
+                algorithm,
+                time_budget=time_budget,
+                is_disconnected=http_request.is_disconnected,
+            )
+            cache.put(solution)
+    except SolverBusyError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(exc),
+            headers={"Retry-After": "1"},
+        ) from exc
+    except (SolveTimeoutError, SolveLimitError) as exc:
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=str(exc)
+        ) from exc
+    except SolveCancelledError:
+        logger.info("Solve abandoned after client disconnected")
+        raise HTTPException(
+            status_code=CLIENT_CLOSED_REQUEST, detail="Client disconnected."
+        ) from None
+    return solution
+
+
+@app.get(
+    "/api/remaining",
+    response_model=RemainingResponse,
+    summary="Optimal moves left from the current state",
+)
+async def moves_remaining() -> RemainingResponse:
+    """Look the current state up in the distance tables without searching.
+
+    ``known`` is false until a table covering the state has been built.
+    """
+
+    found = _get_distance_tables().table_for(_state())
+    if found is None:
+        return RemainingResponse(known=False)
+    table, offsets = found
+    remaining = table.distance(offsets)
+    return RemainingResponse(
+        known=True, solvable=remaining is not None, moves_remaining=remaining
+    )
+
+
+@app.get(
+    "/api/hint",
+    response_model=HintResponse,
+    responses={
+        status.HTTP_503_SERVICE_UNAVAILABLE: {"model": ErrorResponse},
+        status.HTTP_504_GATEWAY_TIMEOUT: {"model": ErrorResponse},
+    },
+    summary="Suggest the next move of a fewest-moves solution",
+)
+async def hint(http_request: Request) -> HintResponse:
+    """Return the next optimal move without changing the puzzle.
+
+    A distance table answers in constant time; otherwise a cached solution is
+    used, and failing that an A* search limited to ``HINT_TIME_BUDGET``.
+    """
+
+    state = _state()
+    found = _get_distance_tables().table_for(state)
+    if found is not None:
+        table, offsets = found
+        remaining = table.distance(offsets)
+        move = table.next_move(offsets)
+        return HintResponse(
+            solvable=remaining is not None,
+            vehicle_id=table.layout.ids[move[0]] if move else None,
+            steps=move[1] if move else None,
+            moves_remaining=remaining,
+            source=HintSource.table,
+        )
+
+    solution = await _cached_solution(
+        http_request, state, SolveAlgorithm.astar, time_budget=HINT_TIME_BUDGET
+    )
+    source = HintSource.cache if solution.cached else HintSource.search
+    if not solution.result.completed:
+        return HintResponse(solvable=False, source=source)
+    vehicle_id, steps = solution.steps[0] if solution.steps else (None, None)
+    return HintResponse(
+        solvable=True,
+        vehicle_id=vehicle_id,
+        steps=steps,
+        moves_remaining=solution.moves,
+        source=source,
+    )
+
+
 @app.post(
     "/api/solve",
     response_model=SolveResponse,
-    responses={status.HTTP_400_BAD_REQUEST: {"model": ErrorResponse}},
+    responses={
+        status.HTTP_400_BAD_REQUEST: {"model": ErrorResponse},
+        status.HTTP_503_SERVICE_UNAVAILABLE: {"model": ErrorResponse},
+        status.HTTP_504_GATEWAY_TIMEOUT: {"model": ErrorResponse},
+    },
     summary="Attempt to solve the current puzzle",
 )
-async def solve_puzzle() -> SolveResponse:
-    """Run the solver from the current state and return the resulting puzzle."""
+async def solve_puzzle(
+    http_request: Request, request: SolveRequest | None = None
+) -> SolveResponse:
+    """Run the solver from the current state and return the resulting puzzle.
+
+    The search runs in the solver process pool; 503 means every worker and
+    queue slot is taken, 504 that the search ran out of time or nodes.
+    """
 
+    algorithm = request.algorithm if request is not None else SolveAlgorithm.bfs
     state = _state()
     session_id = _session_id()
     started = time.perf_counter()
-    result, moves, path = solver.solve_it(state)
+    solution = await _cached_solution(http_request, state, algorithm)
     elapsed_ms = (time.perf_counter() - started) * 1000.0
+    result = solution.result
     _set_state(result.state, completed=result.completed)
     await broadcaster.broadcast_state(
         session_id, result.state, completed=result.completed
@@ -622,12 +791,46 @@ async def solve_puzzle() -> SolveResponse:
     return SolveResponse(
         state=result.state,
         completed=result.completed,
-        moves=moves,
-        path=path,
+        moves=solution.moves,
+        path=solution.path,
         elapsed_ms=elapsed_ms,
+        algorithm=algorithm,
+        nodes=solution.nodes,
+        cached=solution.cached,
     )
 
 
+@app.post(
+    "/api/solve/batch",
+    response_class=StreamingResponse,
+    responses={
+        status.HTTP_200_OK: {
+            "content": {"application/x-ndjson": {}},
+            "description": "One BatchSolveResult per line, in completion order.",
+        }
+    },
+    summary="Solve stored puzzles and raw states without touching the session",
+)
+async def solve_batch_endpoint(request: BatchSolveRequest) -> StreamingResponse:
+    """Fan the solves out over the solver pool and stream each result.
+
+    Neither the session state nor the solution cache is read, so every line
+    reflects a fresh search; finished solutions are added to the cache.
+    """
+
+    items = config_items(_get_repository(), request.config_ids)
+    items += state_items(request.states)
+    cache = _get_solution_cache()
+
+    async def lines():
+        async for result in solve_batch(
+            items, solver_pool, request.algorithm, on_solution=cache.put
+        ):
+            yield result.model_dump_json() + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
 @app.post(
     "/api/reset", response_model=PuzzleState, summary="Reset puzzle to starting layout"
 )
@@ -98,6 +98,20 @@ class MoveResponse(BaseModel):
     completed: bool
 
 
+class SolveAlgorithm(str, Enum):
+    """Search used to find the fewest-move solution."""
+
+    bfs = "bfs"
+    astar = "astar"
+    bidirectional = "bidirectional"
+
+
+class SolveRequest(BaseModel):
+    """Optional payload for solving a puzzle."""
+
+    algorithm: SolveAlgorithm = SolveAlgorithm.bfs
+
+
 class SolveResponse(BaseModel):
     """Response payload for solving a puzzle."""
 
@@ -106,6 +120,62 @@ class SolveResponse(BaseModel):
     moves: int
     path: list[PuzzleState] | None = None
     elapsed_ms: float | None = None
+    algorithm: SolveAlgorithm = SolveAlgorithm.bfs
+    nodes: int | None = None
+    cached: bool = False
+
+
+class BatchSolveRequest(BaseModel):
+    """Stored puzzles and/or raw states to solve in one request."""
+
+    config_ids: list[int] = Field(default_factory=list)
+    states: list[PuzzleState] = Field(default_factory=list)
+    algorithm: SolveAlgorithm = SolveAlgorithm.bfs
+
+
+class BatchSolveResult(BaseModel):
+    """One line of a batch solve stream.
+
+    ``id`` is ``config:<id>`` or ``state:<index in the request>``; ``error``
+    is set, and the other fields empty, when the item could not be solved.
+    """
+
+    id: str
+    solvable: bool | None = None
+    moves: int | None = None
+    nodes: int | None = None
+    elapsed_ms: float | None = None
+    error: str | None = None
+
+
+class RemainingResponse(BaseModel):
+    """Optimal moves left from the current state, from a distance table."""
+
+    known: bool
+    solvable: bool | None = None
+    moves_remaining: int | None = None
+
+
+class HintSource(str, Enum):
+    """Where a hint came from."""
+
+    table = "table"
+    cache = "cache"
+    search = "search"
+
+
+class HintResponse(BaseModel):
+    """Next move on a fewest-moves solution from the current state.
+
+    ``vehicle_id`` and ``steps`` are empty when the puzzle is already solved
+    or cannot be solved.
+    """
+
+    solvable: bool
+    vehicle_id: str | None = None
+    steps: int | None = None
+    moves_remaining: int | None = None
+    source: HintSource
 
 
 class ErrorResponse(BaseModel):
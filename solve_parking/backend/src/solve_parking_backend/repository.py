@@ -45,6 +45,19 @@ class PuzzleRecord:
         }
 
 
+@dataclass(frozen=True)
+class SolutionRecord:
+    """Optimal solution stored for a canonical puzzle state."""
+
+    key: str
+    solvable: bool
+    moves: list[tuple[str, int]]
+
+    @property
+    def move_count(self) -> int:
+        return len(self.moves)
+
+
 class PuzzleRepository:
     """SQLite-backed repository for puzzle configurations."""
 
@@ -77,6 +90,37 @@ class PuzzleRepository:
                 ON puzzles (active)
                 """
             )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS solutions (
+                    state_key TEXT PRIMARY KEY,
+                    solvable INTEGER NOT NULL,
+                    move_count INTEGER NOT NULL,
+                    moves TEXT NOT NULL,
+                    created_at TEXT NOT NULL
+                )
+                """
+            )
+            columns = {
+                row["name"]
+                for row in conn.execute("PRAGMA table_info(generator_chunks)")
+            }
+            if columns and "options" not in columns:
+                # Progress recorded before options were part of the key cannot
+                # be trusted; dropping it only means those chunks run again.
+                conn.execute("DROP TABLE generator_chunks")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS generator_chunks (
+                    seed INTEGER NOT NULL,
+                    options TEXT NOT NULL,
+                    chunk INTEGER NOT NULL,
+                    puzzles INTEGER NOT NULL,
+                    created_at TEXT NOT NULL,
+                    PRIMARY KEY (seed, options, chunk)
+                )
+                """
+            )
             conn.commit()
 
     def _connect(self) -> sqlite3.Connection:
@@ -195,6 +239,111 @@ class PuzzleRepository:
             )
             conn.commit()
 
+    def get_solution(self, state_key: str) -> SolutionRecord | None:
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT solvable, moves FROM solutions WHERE state_key = ?",
+                (state_key,),
+            ).fetchone()
+
+        if row is None:
+            return None
+        moves = [(vehicle_id, steps) for vehicle_id, steps in json.loads(row["moves"])]
+        return SolutionRecord(
+            key=state_key, solvable=bool(row["solvable"]), moves=moves
+        )
+
+    def save_solutions(self, records: Iterable[SolutionRecord]) -> None:
+        """Store solutions in one transaction; existing keys are left as they are.
+
+        Solutions are pure functions of the state, so a stored one never goes
+        stale and there is nothing to overwrite.
+        """
+
+        created_at = datetime.now(tz=timezone.utc).isoformat()
+        rows = [
+            (
+                record.key,
+                1 if record.solvable else 0,
+                record.move_count,
+                json.dumps(record.moves, separators=(",", ":")),
+                created_at,
+            )
+            for record in records
+        ]
+        if not rows:
+            return
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                """
+                INSERT OR IGNORE INTO solutions
+                    (state_key, solvable, move_count, moves, created_at)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                rows,
+            )
+            conn.commit()
+
+    def generated_chunks(self, seed: int, options: str) -> set[int]:
+        """Chunks already generated for ``seed`` under the ``options`` digest."""
+
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(
+                "SELECT chunk FROM generator_chunks WHERE seed = ? AND options = ?",
+                (seed, options),
+            ).fetchall()
+        return {row["chunk"] for row in rows}
+
+    def save_generated_chunk(
+        self,
+        seed: int,
+        options: str,
+        chunk: int,
+        puzzles: Iterable[tuple[str, PuzzleState]],
+    ) -> int:
+        """Store a generator chunk's puzzles and mark the chunk done, atomically.
+
+        Puzzles are stored inactive; names already taken are skipped, which is
+        how a puzzle found again by another chunk is deduplicated. Returns the
+        number of puzzles added.
+        """
+
+        created_at = datetime.now(tz=timezone.utc).isoformat()
+        rows = [
+            (
+                name,
+                state.size,
+                state.exit.row,
+                state.exit.col,
+                len(state.vehicles),
+                json.dumps(state.model_dump(mode="json"), separators=(",", ":")),
+                created_at,
+            )
+            for name, state in puzzles
+        ]
+        with self._lock, self._connect() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                """
+                INSERT OR IGNORE INTO puzzles
+                    (name, size, exit_row, exit_col, vehicle_count, active,
+                     payload, created_at)
+                VALUES (?, ?, ?, ?, ?, 0, ?, ?)
+                """,
+                rows,
+            )
+            added = conn.total_changes - before
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO generator_chunks
+                    (seed, options, chunk, puzzles, created_at)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (seed, options, chunk, added, created_at),
+            )
+            conn.commit()
+        return added
+
     def _row_to_record_basic(self, row: sqlite3.Row) -> PuzzleRecord:
         created_at = datetime.fromisoformat(row["created_at"])
         return PuzzleRecord(
@@ -51,6 +51,43 @@ def initial_state(hard: bool = False) -> PuzzleState:
     )
 
 
+def state_from_grid(grid: str, *, goal: str = "X") -> PuzzleState:
+    """Build a square puzzle from rows of vehicle letters separated by ``/``.
+
+    ``.`` marks an empty cell; the exit sits at the right edge of the goal
+    vehicle's row, e.g. ``"AA...B/....CB/XX..CB/....../....../......"``.
+    """
+
+    rows = grid.split("/")
+    size = len(rows)
+    cells: dict[str, list[tuple[int, int]]] = {}
+    for row, line in enumerate(rows):
+        if len(line) != size:
+            raise InvalidPuzzleError("Puzzle grid must be square.")
+        for col, letter in enumerate(line):
+            if letter != ".":
+                cells.setdefault(letter, []).append((row, col))
+
+    vehicles = []
+    for vehicle_id, occupied in cells.items():
+        (row, col), (next_row, _) = occupied[0], occupied[-1]
+        vehicles.append(
+            Vehicle(
+                id=vehicle_id,
+                row=row,
+                col=col,
+                length=len(occupied),
+                orientation=(
+                    Orientation.vertical if next_row != row else Orientation.horizontal
+                ),
+                goal=vehicle_id == goal,
+            )
+        )
+    if goal not in cells:
+        raise InvalidPuzzleError(f"Goal vehicle '{goal}' is not on the grid.")
+    return PuzzleState(
+        size=size, exit={"row": cells[goal][0][0], "col": size - 1}, vehicles=vehicles
+    )
 
 
 def generate_stop_positions(
@@ -0,0 +1,82 @@
+"""Solution cache: an in-memory LRU in front of the repository's table.
+
+Solutions are keyed by :func:`solver.cache_key`. A state's optimal solution
+never changes, so entries are never invalidated, only evicted from memory.
+Storing a solution also stores every suffix of it under the state it starts
+from, since the rest of a shortest path is itself a shortest path; a player
+who follows a solution part way and asks again gets a lookup.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from collections import OrderedDict
+
+from .models import PuzzleState, SolveAlgorithm
+from .repository import PuzzleRepository, SolutionRecord
+from .solver import Solution, cache_key, replay
+
+logger = logging.getLogger(__name__)
+
+SOLUTION_CACHE_SIZE = int(os.getenv("SOLVE_PARKING_SOLUTION_CACHE_SIZE", "1024"))
+
+
+class SolutionCache:
+    """Look solutions up in memory, then in SQLite; store them in both."""
+
+    def __init__(
+        self, repository: PuzzleRepository, size: int = SOLUTION_CACHE_SIZE
+    ) -> None:
+        self._repository = repository
+        self._size = size
+        self._memory: OrderedDict[str, SolutionRecord] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _remember(self, record: SolutionRecord) -> None:
+        self._memory[record.key] = record
+        self._memory.move_to_end(record.key)
+        while len(self._memory) > self._size:
+            self._memory.popitem(last=False)
+
+    def lookup(self, state: PuzzleState) -> SolutionRecord | None:
+        key = cache_key(state)
+        record = self._memory.get(key)
+        if record is not None:
+            self._memory.move_to_end(key)
+        else:
+            record = self._repository.get_solution(key)
+            if record is not None:
+                self._remember(record)
+        if record is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return record
+
+    def get(
+        self, state: PuzzleState, algorithm: SolveAlgorithm = SolveAlgorithm.bfs
+    ) -> Solution | None:
+        record = self.lookup(state)
+        if record is None:
+            return None
+        return replay(
+            state, record.moves, completed=record.solvable, algorithm=algorithm
+        )
+
+    def put(self, solution: Solution) -> None:
+        """Store a finished search; abandoned searches prove nothing."""
+
+        if solution.stopped or solution.exhausted:
+            return
+        if not solution.result.completed:
+            records = [SolutionRecord(cache_key(solution.path[0]), False, [])]
+        else:
+            records = [
+                SolutionRecord(cache_key(state), True, solution.steps[index:])
+                for index, state in enumerate(solution.path)
+            ]
+        for record in records:
+            self._remember(record)
+        self._repository.save_solutions(records)
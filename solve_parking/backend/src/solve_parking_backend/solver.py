@@ -1,20 +1,26 @@
+import heapq
+import json
 import logging
 import random
-from typing import Dict, Tuple
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional, Tuple
 
-from .graph import Graph, Vertex
+from .bitboard import BoardLayout, Offsets
+from .graph import Vertex
 from .services import (
     InvalidMoveError,
     MoveResult,
     _board_from,
     apply_move,
-    generate_all_moves_stops,
-    is_solved,
 )
-from .models import MoveRequest, Orientation, PuzzleState
+from .models import MoveRequest, Orientation, PuzzleState, SolveAlgorithm
 from collections import deque
 
 MAX_ITER = 1000000
+# Searches poll their ``stop`` callback once every this many expansions.
+STOP_CHECK_INTERVAL = 1024
+# Placements :func:`bidirectional` may try while seeding its backward search.
+BIDIRECTIONAL_SEED_LIMIT = 500_000
 
 
 logger = logging.getLogger(__name__)
@@ -69,75 +75,431 @@ def generate_all_moves(state: PuzzleState):
 def canonical_key(state: "PuzzleState") -> Tuple:
     vehicles_key = tuple(
         sorted(
-            (veh.id, veh.orientation, veh.length, veh.row, veh.col)
+            (veh.id, veh.orientation.value, veh.length, veh.row, veh.col, veh.goal)
             for veh in state.vehicles
         )
     )
     return (state.size, state.exit.row, state.exit.col, vehicles_key)
 
 
-def solve_it(state: PuzzleState) -> tuple[MoveResult, int, list[PuzzleState]]:
-    puzzle_gp = Graph()
-    start = Vertex(state)
-    start.distance = 0
-    start.previous = None
-    queue = deque([start])
-    solution = MoveResult(state=state, completed=False)
-    min_moves = 0
-    iterations = 0
-    visited: Dict[Tuple, int] = {canonical_key(state): 0}
+def cache_key(state: PuzzleState) -> str:
+    """``canonical_key`` as a compact string, for storage."""
+
+    return json.dumps(canonical_key(state), separators=(",", ":"))
+
+
+# Compact move: (vehicle index in ``PuzzleState.vehicles``, signed steps).
+Move = Tuple[int, int]
+# The same move addressed by vehicle id, as returned to callers.
+VehicleMove = Tuple[str, int]
+# Visited map entry: the state a key was first reached from and the move taken.
+Parent = Tuple[Optional[Offsets], Optional[Move]]
+
+
+StopCheck = Callable[[], bool]
+
+
+@dataclass
+class SearchResult:
+    """Outcome of a search over compact states."""
+
+    keys: list[Offsets]
+    moves: list[Move]
+    nodes: int
+    completed: bool
+    # Set when the ``stop`` callback ended the search early.
+    stopped: bool = False
+    # Set when the search gave up after ``max_iter`` expansions.
+    exhausted: bool = False
+
+
+def _stopped(nodes: int, stop: StopCheck | None) -> bool:
+    return stop is not None and nodes % STOP_CHECK_INTERVAL == 0 and stop()
+
+
+def _reconstruct(
+    parents: Dict[Offsets, Parent], goal: Offsets
+) -> tuple[list[Offsets], list[Move]]:
+    keys = [goal]
+    moves: list[Move] = []
+    parent, move = parents[goal]
+    while parent is not None:
+        keys.append(parent)
+        moves.append(move)
+        parent, move = parents[parent]
+    keys.reverse()
+    moves.reverse()
+    return keys, moves
+
+
+def breadth_first(
+    layout: BoardLayout,
+    start: Offsets,
+    *,
+    max_iter: int = MAX_ITER,
+    stop: StopCheck | None = None,
+) -> SearchResult:
+    """Fewest-move search keeping only ``key -> (parent key, move)``.
+
+    Each state is stored once, as a tuple of offsets, so memory grows with
+    the number of states reached rather than the number of edges.
+    """
+
+    parents: Dict[Offsets, Parent] = {start: (None, None)}
+    if layout.is_solved(start):
+        return SearchResult([start], [], 0, True)
 
+    queue = deque([start])
+    neighbours = layout.neighbours
+    solved = layout.is_solved
+    nodes = 0
     while queue:
-        iterations += 1
-        if iterations > MAX_ITER:
+        nodes += 1
+        if nodes > max_iter:
+            logger.error("Too many iterations during solve search")
+            return SearchResult([start], [], nodes, False, exhausted=True)
+        if _stopped(nodes, stop):
+            return SearchResult([start], [], nodes, False, stopped=True)
+        key = queue.popleft()
+        for index, steps, child in neighbours(key):
+            if child in parents:
+                continue
+            parents[child] = (key, (index, steps))
+            if solved(child):
+                keys, moves = _reconstruct(parents, child)
+                return SearchResult(keys, moves, nodes, True)
+            queue.append(child)
+
+    return SearchResult([start], [], nodes, False)
+
+
+class BlockingHeuristic:
+    """Admissible lower bound on the moves left from a compact state.
+
+    Unless the goal vehicle is already at the exit it must move at least once,
+    and so must every vehicle standing between it and the exit. If any of
+    those blockers cannot leave the exit row in a single slide, whichever way
+    it goes, some further vehicle has to move out of its way first, adding
+    one more. Each counted move belongs to a different vehicle, so the bound
+    never overestimates; a single slide lowers it by at most one, so it is
+    also consistent and A* never has to reopen a state.
+    """
+
+    def __init__(self, layout: BoardLayout) -> None:
+        self._layout = layout
+        goal = layout.goal_index
+        self._goal = goal
+        row_cells = sum(
+            1 << (layout.exit_row * layout.size + col)
+            for col in range(layout.size)
+        )
+        # Exit-row cells ahead of the goal vehicle, per goal offset.
+        self._ahead = tuple(
+            sum(
+                1 << (layout.exit_row * layout.size + col)
+                for col in range(offset + layout.lengths[goal], layout.exit_col + 1)
+            )
+            for offset in range(len(layout.masks[goal]))
+        )
+        # For every other vehicle and offset that crosses the exit row, the
+        # cells swept by each single slide that would clear the row.
+        self._clearing: list[tuple[int, dict[int, tuple[int, ...]]]] = []
+        for index, lane_masks in enumerate(layout.masks):
+            if index == goal:
+                continue
+            crossing: dict[int, tuple[int, ...]] = {}
+            for offset, mask in enumerate(lane_masks):
+                if not mask & row_cells:
+                    continue
+                clear = [
+                    target
+                    for target, target_mask in enumerate(lane_masks)
+                    if not target_mask & row_cells
+                ]
+                # The nearest clear offset on each side sweeps the fewest cells.
+                targets = [t for t in clear if t < offset][-1:] + [
+                    t for t in clear if t > offset
+                ][:1]
+                sweeps = []
+                for target in targets:
+                    low, high = sorted((offset, target))
+                    sweep = 0
+                    for between in range(low, high + 1):
+                        sweep |= lane_masks[between]
+                    sweeps.append(sweep & ~mask)
+                crossing[offset] = tuple(sweeps)
+            if crossing:
+                self._clearing.append((index, crossing))
+
+    def __call__(self, offsets: Offsets) -> int:
+        layout = self._layout
+        goal_offset = offsets[self._goal]
+        if goal_offset == layout.goal_offset:
+            return 0
+        ahead = self._ahead[goal_offset]
+        masks = layout.masks
+        occupied = layout.occupancy(offsets)
+        bound = 1
+        stuck = 0
+        for index, crossing in self._clearing:
+            offset = offsets[index]
+            sweeps = crossing.get(offset)
+            if sweeps is None or not masks[index][offset] & ahead:
+                continue
+            bound += 1
+            if not stuck and all(sweep & occupied for sweep in sweeps):
+                stuck = 1
+        return bound + stuck
+
+
+def a_star(
+    layout: BoardLayout,
+    start: Offsets,
+    *,
+    max_iter: int = MAX_ITER,
+    stop: StopCheck | None = None,
+) -> SearchResult:
+    """Fewest-move search ordered by moves so far plus :class:`BlockingHeuristic`."""
+
+    heuristic = BlockingHeuristic(layout)
+    parents: Dict[Offsets, Parent] = {start: (None, None)}
+    depth: Dict[Offsets, int] = {start: 0}
+    # Ties on f go to the deeper state, which is usually closer to the goal.
+    frontier: list[tuple[int, int, Offsets]] = [(heuristic(start), 0, start)]
+    neighbours = layout.neighbours
+    solved = layout.is_solved
+    nodes = 0
+    while frontier:
+        _, negative_g, key = heapq.heappop(frontier)
+        g_cost = -negative_g
+        if g_cost > depth[key]:
+            continue  # stale entry, the state was reached more cheaply since
+        if solved(key):
+            keys, moves = _reconstruct(parents, key)
+            return SearchResult(keys, moves, nodes, True)
+        nodes += 1
+        if nodes > max_iter:
             logger.error("Too many iterations during solve search")
-            break
-
-        next_vert = queue.popleft()
-        for mv in generate_all_moves_stops(next_vert.key):
-            puzzle_gp.addEdge(next_vert.key, mv.state)
-            child_key = canonical_key(mv.state)
-            g_cost = next_vert.distance + 1
-            # Depth-aware duplicate pruning
-            best = visited.get(child_key)
-            if best is not None and g_cost >= best:
-                continue  # already seen at equal or lower cost
-            # Record improved visit
-            visited[child_key] = g_cost
-
-            # puzzle_gp.addEdge(next_vert.key, mv.state)
-            puzzle_gp.addEdge(next_vert.key, mv.state)
-            if mv.completed:
-                min_moves = next_vert.distance + 1
-                logger.info("Solved in %s moves", min_moves)
-                goal_vertex = puzzle_gp.getVertex(mv.state)
-                if goal_vertex is not None:
-                    goal_vertex.previous = next_vert
-                    goal_vertex.distance = min_moves
-                    goal_vertex.color = "black"
-                solution = mv
-                queue.clear()
-                break
-
-        if solution.completed:
-            break
-
-        the_vertex = puzzle_gp.getVertex(next_vert.key)
-        if the_vertex is None:
-            continue
-
-        for vertex in the_vertex.getConnections():
-            if vertex.color == "white":
-                vertex.color = "gray"
-                vertex.distance = next_vert.distance + 1
-                vertex.previous = next_vert
-                queue.append(vertex)
-        next_vert.color = "black"
-
-        if solution.completed:
-            break
-
-    print("solution ", is_solved(solution.state))
-    raw_path = puzzle_gp.traverse(solution.state, show_path=True)
-    path: list[PuzzleState] = list(reversed(raw_path)) if raw_path else []
-    return solution, min_moves, path
+            return SearchResult([start], [], nodes, False, exhausted=True)
+        if _stopped(nodes, stop):
+            return SearchResult([start], [], nodes, False, stopped=True)
+        child_cost = g_cost + 1
+        for index, steps, child in neighbours(key):
+            known = depth.get(child)
+            if known is not None and known <= child_cost:
+                continue
+            depth[child] = child_cost
+            parents[child] = (key, (index, steps))
+            heapq.heappush(
+                frontier, (child_cost + heuristic(child), -child_cost, child)
+            )
+
+    return SearchResult([start], [], nodes, False)
+
+
+def _chain_to_goal(
+    toward_goal: Dict[Offsets, Parent], key: Offsets
+) -> tuple[list[Offsets], list[Move]]:
+    keys: list[Offsets] = []
+    moves: list[Move] = []
+    following, move = toward_goal[key]
+    while following is not None:
+        keys.append(following)
+        moves.append(move)
+        following, move = toward_goal[following]
+    return keys, moves
+
+
+def bidirectional(
+    layout: BoardLayout,
+    start: Offsets,
+    *,
+    max_iter: int = MAX_ITER,
+    stop: StopCheck | None = None,
+) -> SearchResult:
+    """Breadth-first from the start and from every solved arrangement at once.
+
+    Both searches advance a whole layer at a time, always the smaller
+    frontier. The first layer that links the two searches is finished and the
+    shortest link taken, so the result is as short as a one-sided BFS finds.
+
+    Every placement tried while listing the solved arrangements counts as a
+    node. Boards with more than ``BIDIRECTIONAL_SEED_LIMIT`` of them are
+    handed to :func:`breadth_first` with whatever budget is left.
+    """
+
+    # ``from_start`` maps a state to the one it was reached from, like
+    # :func:`breadth_first`; ``toward_goal`` maps it to the next state on the
+    # way to a solved arrangement, with the move that gets there.
+    from_start: Dict[Offsets, Parent] = {start: (None, None)}
+    depth_start: Dict[Offsets, int] = {start: 0}
+    toward_goal: Dict[Offsets, Parent] = {}
+    depth_goal: Dict[Offsets, int] = {}
+    nodes = 0
+    stopped = False
+
+    def seed_step() -> bool:
+        nonlocal nodes, stopped
+        nodes += 1
+        stopped = _stopped(nodes, stop)
+        return stopped or nodes > BIDIRECTIONAL_SEED_LIMIT
+
+    for solved in layout.solved_states(start, step=seed_step):
+        toward_goal[solved] = (None, None)
+        depth_goal[solved] = 0
+    if stopped:
+        return SearchResult([start], [], nodes, False, stopped=True)
+    if nodes > BIDIRECTIONAL_SEED_LIMIT:
+        logger.info("Too many solved arrangements, solving with breadth-first")
+        result = breadth_first(layout, start, max_iter=max_iter - nodes, stop=stop)
+        result.nodes += nodes
+        return result
+    if start in toward_goal:
+        return SearchResult([start], [], nodes, True)
+    if not toward_goal:
+        return SearchResult([start], [], nodes, False)
+
+    start_frontier = [start]
+    goal_frontier = list(toward_goal)
+    neighbours = layout.neighbours
+    # (length, state nearer the start, move, state nearer the goal)
+    best: tuple[int, Offsets, Move, Offsets] | None = None
+    while start_frontier and goal_frontier and best is None:
+        forward = len(start_frontier) <= len(goal_frontier)
+        frontier = start_frontier if forward else goal_frontier
+        next_frontier: list[Offsets] = []
+        for key in frontier:
+            nodes += 1
+            if nodes > max_iter:
+                logger.error("Too many iterations during solve search")
+                return SearchResult([start], [], nodes, False, exhausted=True)
+            if _stopped(nodes, stop):
+                return SearchResult([start], [], nodes, False, stopped=True)
+            if forward:
+                reached = depth_start[key] + 1
+                for index, steps, child in neighbours(key):
+                    other = depth_goal.get(child)
+                    if other is not None:
+                        if best is None or reached + other < best[0]:
+                            best = (reached + other, key, (index, steps), child)
+                    if child not in from_start:
+                        from_start[child] = (key, (index, steps))
+                        depth_start[child] = reached
+                        next_frontier.append(child)
+            else:
+                reached = depth_goal[key] + 1
+                for index, steps, child in neighbours(key):
+                    other = depth_start.get(child)
+                    if other is not None:
+                        if best is None or reached + other < best[0]:
+                            best = (reached + other, child, (index, -steps), key)
+                    if child not in toward_goal:
+                        toward_goal[child] = (key, (index, -steps))
+                        depth_goal[child] = reached
+                        next_frontier.append(child)
+        if forward:
+            start_frontier = next_frontier
+        else:
+            goal_frontier = next_frontier
+
+    if best is None:
+        return SearchResult([start], [], nodes, False)
+    _, near_start, link, near_goal = best
+    keys, moves = _reconstruct(from_start, near_start)
+    tail_keys, tail_moves = _chain_to_goal(toward_goal, near_goal)
+    return SearchResult(
+        keys + [near_goal] + tail_keys, moves + [link] + tail_moves, nodes, True
+    )
+
+
+@dataclass
+class Solution:
+    """A solved (or abandoned) search converted back to puzzle states."""
+
+    result: MoveResult
+    moves: int
+    path: list[PuzzleState]
+    nodes: int
+    algorithm: SolveAlgorithm
+    stopped: bool = False
+    exhausted: bool = False
+    # The solution as (vehicle id, signed steps) moves.
+    steps: list[VehicleMove] = field(default_factory=list)
+    cached: bool = False
+
+
+SEARCHES: Dict[SolveAlgorithm, Callable[..., SearchResult]] = {
+    SolveAlgorithm.bfs: breadth_first,
+    SolveAlgorithm.astar: a_star,
+    SolveAlgorithm.bidirectional: bidirectional,
+}
+
+
+def solve(
+    state: PuzzleState,
+    algorithm: SolveAlgorithm = SolveAlgorithm.bfs,
+    *,
+    stop: StopCheck | None = None,
+) -> Solution:
+    """Fewest-move solution of ``state`` using the chosen search.
+
+    The search runs on :class:`BoardLayout` offset tuples; only the states on
+    the solution path are turned back into ``PuzzleState`` objects. ``stop``
+    is polled during the search and abandons it when it returns true.
+    """
+
+    layout, start = BoardLayout.from_state(state)
+    search = SEARCHES[algorithm](layout, start, stop=stop)
+    path = [layout.to_state(state, key) for key in search.keys]
+    if search.completed:
+        logger.info(
+            "Solved in %s moves with %s after %s nodes",
+            len(search.moves),
+            algorithm.value,
+            search.nodes,
+        )
+    return Solution(
+        result=MoveResult(state=path[-1], completed=search.completed),
+        moves=len(search.moves),
+        path=path,
+        nodes=search.nodes,
+        algorithm=algorithm,
+        stopped=search.stopped,
+        exhausted=search.exhausted,
+        steps=[(layout.ids[index], steps) for index, steps in search.moves],
+    )
+
+
+def replay(
+    state: PuzzleState,
+    steps: list[VehicleMove],
+    *,
+    completed: bool,
+    algorithm: SolveAlgorithm = SolveAlgorithm.bfs,
+) -> Solution:
+    """Rebuild a :class:`Solution` from a known move sequence, without searching."""
+
+    layout, key = BoardLayout.from_state(state)
+    indices = {vehicle_id: index for index, vehicle_id in enumerate(layout.ids)}
+    keys = [key]
+    for vehicle_id, count in steps:
+        index = indices[vehicle_id]
+        key = key[:index] + (key[index] + count,) + key[index + 1 :]
+        keys.append(key)
+    path = [layout.to_state(state, key) for key in keys]
+    return Solution(
+        result=MoveResult(state=path[-1], completed=completed),
+        moves=len(steps),
+        path=path,
+        nodes=0,
+        algorithm=algorithm,
+        steps=list(steps),
+        cached=True,
+    )
+
+
+def solve_it(
+    state: PuzzleState, algorithm: SolveAlgorithm = SolveAlgorithm.bfs
+) -> tuple[MoveResult, int, list[PuzzleState]]:
+    solution = solve(state, algorithm)
+    return solution.result, solution.moves, solution.path
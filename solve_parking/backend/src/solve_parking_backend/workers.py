@@ -0,0 +1,188 @@
+"""Process pool that runs solver searches off the event loop.
+
+At most ``SOLVE_WORKERS`` searches run at once and ``SOLVE_QUEUE`` more may
+wait for a worker; beyond that :meth:`SolverPool.solve` refuses immediately
+with :class:`SolverBusyError` so the API can answer 503 instead of piling up
+work. Each admitted solve owns a slot in a shared array of stop flags that its
+worker polls between expansions, which is how a time budget running out or a
+client going away ends a search that is already running in another process.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable
+
+from .models import PuzzleState, SolveAlgorithm
+from .solver import Solution, solve
+
+logger = logging.getLogger(__name__)
+
+SOLVE_WORKERS = int(os.getenv("SOLVE_PARKING_SOLVE_WORKERS", "2"))
+SOLVE_QUEUE = int(os.getenv("SOLVE_PARKING_SOLVE_QUEUE", "8"))
+SOLVE_TIME_BUDGET = float(os.getenv("SOLVE_PARKING_SOLVE_TIME_BUDGET", "10"))
+# Hints fall back to a search only when no table or cached solution applies.
+HINT_TIME_BUDGET = float(os.getenv("SOLVE_PARKING_HINT_TIME_BUDGET", "2"))
+# Batch solves running at once across all batches; the rest of the queue is
+# left to interactive solves.
+BATCH_WORKERS = int(os.getenv("SOLVE_PARKING_BATCH_WORKERS", str(SOLVE_WORKERS)))
+# How often a waiting request checks whether its client disconnected.
+DISCONNECT_POLL_SECONDS = 0.25
+
+
+class SolverBusyError(RuntimeError):
+    """Raised when every worker and queue slot is taken."""
+
+
+class SolveTimeoutError(RuntimeError):
+    """Raised when a search runs past its time budget."""
+
+
+class SolveLimitError(RuntimeError):
+    """Raised when a search gives up after its maximum number of expansions."""
+
+
+class SolveCancelledError(RuntimeError):
+    """Raised when the client went away before the search finished."""
+
+
+# Set in each worker process by ``_init_worker``.
+_stop_flags = None
+
+
+def _init_worker(stop_flags) -> None:
+    global _stop_flags
+    _stop_flags = stop_flags
+
+
+def _solve_in_worker(
+    state: PuzzleState, algorithm: SolveAlgorithm, slot: int, deadline: float
+) -> Solution:
+    flags = _stop_flags
+
+    def stop() -> bool:
+        return bool(flags[slot]) or time.time() > deadline
+
+    return solve(state, algorithm, stop=stop)
+
+
+class SolverPool:
+    """Bounded pool of solver processes with per-request stop flags."""
+
+    def __init__(
+        self,
+        workers: int = SOLVE_WORKERS,
+        queue: int = SOLVE_QUEUE,
+        batch: int = BATCH_WORKERS,
+    ) -> None:
+        self.workers = max(1, workers)
+        self.capacity = self.workers + max(0, queue)
+        self.batch = max(1, min(batch, self.capacity))
+        self._batch_gate: asyncio.Semaphore | None = None
+        self._batch_loop: asyncio.AbstractEventLoop | None = None
+        context = multiprocessing.get_context("spawn")
+        self._context = context
+        self._stop_flags = context.RawArray("b", self.capacity)
+        self._free_slots = list(range(self.capacity))
+        self._executor: ProcessPoolExecutor | None = None
+
+    @property
+    def in_flight(self) -> int:
+        return self.capacity - len(self._free_slots)
+
+    def _ensure_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=self._context,
+                initializer=_init_worker,
+                initargs=(self._stop_flags,),
+            )
+        return self._executor
+
+    @asynccontextmanager
+    async def batch_slot(self) -> AsyncIterator[None]:
+        """Wait for a turn to run background work such as a batch item.
+
+        At most ``batch`` holders at a time across all callers; on entry a
+        worker slot is free, so a :meth:`solve` started before the next
+        ``await`` is admitted rather than refused as busy.
+        """
+
+        loop = asyncio.get_running_loop()
+        if self._batch_gate is None or self._batch_loop is not loop:
+            self._batch_gate = asyncio.Semaphore(self.batch)
+            self._batch_loop = loop
+        async with self._batch_gate:
+            while not self._free_slots:
+                await asyncio.sleep(DISCONNECT_POLL_SECONDS)
+            yield
+
+    async def solve(
+        self,
+        state: PuzzleState,
+        algorithm: SolveAlgorithm,
+        *,
+        time_budget: float = SOLVE_TIME_BUDGET,
+        is_disconnected: Callable[[], Awaitable[bool]] | None = None,
+    ) -> Solution:
+        """Solve in a worker process without blocking the event loop.
+
+        The budget counts from the call, so time spent queued for a worker is
+        included.
+        """
+
+        if not self._free_slots:
+            raise SolverBusyError("All solver workers are busy.")
+        slot = self._free_slots.pop()
+        self._stop_flags[slot] = 0
+        deadline = time.time() + time_budget
+        future = asyncio.wrap_future(
+            self._ensure_executor().submit(
+                _solve_in_worker, state, algorithm, slot, deadline
+            )
+        )
+        try:
+            while True:
+                done, _ = await asyncio.wait({future}, timeout=DISCONNECT_POLL_SECONDS)
+                if done:
+                    break
+                if is_disconnected is not None and await is_disconnected():
+                    self._stop_flags[slot] = 1
+                    raise SolveCancelledError("Client disconnected during solve.")
+            solution = future.result()
+        except asyncio.CancelledError:
+            self._stop_flags[slot] = 1
+            raise
+        finally:
+            if future.done():
+                self._free_slots.append(slot)
+            else:
+                # The worker still holds the slot until it sees its flag.
+                future.add_done_callback(lambda _: self._free_slots.append(slot))
+
+        if solution.stopped:
+            raise SolveTimeoutError(
+                f"Solver gave up after {time_budget:g}s and {solution.nodes} nodes."
+            )
+        if solution.exhausted:
+            raise SolveLimitError(
+                f"Solver gave up after expanding {solution.nodes} nodes."
+            )
+        return solution
+
+    def shutdown(self) -> None:
+        for slot in range(self.capacity):
+            self._stop_flags[slot] = 1
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+solver_pool = SolverPool()
@@ -0,0 +1,24 @@
+"""Shared fixtures for the backend tests."""
+
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+from solve_parking_backend.distance_table import DistanceTables
+from solve_parking_backend.main import app
+from solve_parking_backend.repository import PuzzleRepository
+
+
+@pytest.fixture(autouse=True)
+def _isolated_repository(tmp_path: Path) -> Iterator[PuzzleRepository]:
+    # Keep tests away from the puzzles and solutions in data/.
+    repository = PuzzleRepository(tmp_path / "puzzles.sqlite3")
+    app.state.repository = repository
+    app.state.solution_cache = None
+    app.state.distance_tables = DistanceTables(tmp_path / "distances")
+    yield repository
+    app.state.distance_tables.shutdown(wait=True)
+    app.state.repository = None
+    app.state.solution_cache = None
+    app.state.distance_tables = None
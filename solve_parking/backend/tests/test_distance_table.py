@@ -0,0 +1,90 @@
+"""Tests for the precomputed distance-to-goal tables."""
+
+from fastapi.testclient import TestClient
+
+from solve_parking_backend.benchmark import CORPUS
+from solve_parking_backend.bitboard import BoardLayout
+from solve_parking_backend.distance_table import DistanceTables, build_table
+from solve_parking_backend.main import app
+from solve_parking_backend.services import initial_state, state_from_grid
+from solve_parking_backend.solver import solve
+
+
+def test_table_distances_match_the_solver() -> None:
+    table = build_table(CORPUS["expert36"])
+    layout, start = BoardLayout.from_state(CORPUS["expert36"])
+
+    assert table.distance(start) == 28
+    for _, _, child in layout.neighbours(start):
+        assert abs(table.distance(child) - 28) <= 1
+    solution = solve(CORPUS["expert36"])
+    for remaining, state in enumerate(reversed(solution.path)):
+        _, offsets = BoardLayout.from_state(state)
+        assert table.distance(offsets) == remaining
+
+
+def test_unsolvable_cluster_has_no_distances() -> None:
+    state = state_from_grid("....../....../XX.BB./....../....../......")
+    table = build_table(state)
+    _, start = BoardLayout.from_state(state)
+    assert table.distance(start) is None
+
+
+def test_tables_are_stored_and_reloaded(tmp_path) -> None:
+    tables = DistanceTables(tmp_path)
+    state = CORPUS["intermediate19"]
+    built = tables.build(state)
+
+    files = list(tmp_path.glob("*.bin"))
+    assert [path.name for path in files] == [built.filename]
+    solution = solve(state)
+    reloaded = DistanceTables(tmp_path)
+    assert reloaded.moves_remaining(solution.path[5]) == solution.moves - 5
+    assert reloaded.moves_remaining(initial_state()) is None
+
+
+def test_remaining_endpoint_uses_the_table() -> None:
+    client = TestClient(app)
+    state = client.post("/api/reset").json()
+
+    assert client.get("/api/remaining").json() == {
+        "known": False,
+        "solvable": None,
+        "moves_remaining": None,
+    }
+    app.state.distance_tables.build(initial_state())
+    remaining = client.get("/api/remaining").json()
+    assert remaining["known"] and remaining["solvable"]
+    assert remaining["moves_remaining"] == solve(initial_state()).moves
+    assert client.get("/api/puzzle").json() == state
+
+
+def test_hint_follows_the_table_without_moving() -> None:
+    client = TestClient(app)
+    state = client.post("/api/reset").json()
+    app.state.distance_tables.build(initial_state())
+
+    hint = client.get("/api/hint").json()
+    assert hint["source"] == "table" and hint["solvable"]
+    assert client.get("/api/puzzle").json() == state
+
+    client.post(
+        "/api/move", json={"vehicle_id": hint["vehicle_id"], "steps": hint["steps"]}
+    )
+    after = client.get("/api/hint").json()
+    assert after["moves_remaining"] == hint["moves_remaining"] - 1
+
+
+def test_hint_searches_then_uses_the_cache() -> None:
+    client = TestClient(app)
+    client.put("/api/puzzle", json=CORPUS["expert36"].model_dump(mode="json"))
+
+    searched = client.get("/api/hint").json()
+    cached = client.get("/api/hint").json()
+
+    assert searched["source"] == "search"
+    assert searched["moves_remaining"] == 28
+    assert cached == {**searched, "source": "cache"}
+    assert client.get("/api/puzzle").json() == CORPUS["expert36"].model_dump(
+        mode="json"
+    )
@@ -0,0 +1,54 @@
+"""Tests for the hard-puzzle generator."""
+
+from dataclasses import replace
+
+from solve_parking_backend.generator import (
+    GeneratorOptions,
+    generate_chunk,
+    hardest_in_cluster,
+    run,
+)
+from solve_parking_backend.repository import PuzzleRepository
+from solve_parking_backend.services import state_from_grid
+from solve_parking_backend.solver import solve
+
+OPTIONS = GeneratorOptions(chunk_size=6, min_moves=1, max_states=5_000)
+
+
+def test_hardest_state_is_the_same_for_any_member_of_a_cluster() -> None:
+    start = state_from_grid("AA...B/....CB/XX..CB/....../....../......")
+    grid, moves, cluster_size = hardest_in_cluster(start, 5_000)
+
+    hardest = state_from_grid(grid)
+    assert solve(hardest).moves == moves
+    assert solve(start).moves <= moves
+    assert hardest_in_cluster(hardest, 5_000) == (grid, moves, cluster_size)
+
+
+def test_chunks_are_reproducible() -> None:
+    first = generate_chunk(3, 1, OPTIONS)
+    assert first
+    assert generate_chunk(3, 1, OPTIONS) == first
+    for puzzle in first:
+        assert solve(puzzle.state).moves == puzzle.moves
+
+
+def test_run_resumes_and_deduplicates(tmp_path) -> None:
+    repository = PuzzleRepository(tmp_path / "generated.sqlite3")
+
+    added = run(repository, OPTIONS, seed=3, chunks=2, workers=2)
+    digest = OPTIONS.digest()
+    assert repository.generated_chunks(3, digest) == {0, 1}
+    assert len(repository.list_puzzles()) == added
+    assert not any(record.active for record in repository.list_puzzles())
+
+    assert run(repository, OPTIONS, seed=3, chunks=2, workers=2) == 0
+    expected = added + len(generate_chunk(3, 2, OPTIONS))
+    run(repository, OPTIONS, seed=3, chunks=3, workers=2)
+    assert len(repository.list_puzzles()) <= expected
+    assert repository.generated_chunks(3, digest) == {0, 1, 2}
+
+    # Other options do not resume from chunks done under these.
+    harder = replace(OPTIONS, min_moves=OPTIONS.min_moves + 1)
+    run(repository, harder, seed=3, chunks=1, workers=1)
+    assert repository.generated_chunks(3, harder.digest()) == {0}
@@ -0,0 +1,231 @@
+"""Tests for the Rush Hour solvers."""
+
+from dataclasses import replace
+
+from fastapi.testclient import TestClient
+
+from solve_parking_backend.bitboard import BoardLayout
+from solve_parking_backend.main import app
+from solve_parking_backend.models import (
+    MoveRequest,
+    Orientation,
+    PuzzleState,
+    SolveAlgorithm,
+    Vehicle,
+)
+from solve_parking_backend.repository import PuzzleRepository
+from solve_parking_backend.services import (
+    apply_move,
+    initial_state,
+    state_from_grid,
+)
+from solve_parking_backend.solution_cache import SolutionCache
+from solve_parking_backend.solver import (
+    BIDIRECTIONAL_SEED_LIMIT,
+    STOP_CHECK_INTERVAL,
+    BlockingHeuristic,
+    a_star,
+    bidirectional,
+    breadth_first,
+    solve,
+    solve_it,
+)
+
+
+def _puzzle(*vehicles: tuple[str, int, int, int, str, bool]) -> PuzzleState:
+    return PuzzleState(
+        size=6,
+        exit={"row": 2, "col": 5},
+        vehicles=[
+            Vehicle(
+                id=vid,
+                row=row,
+                col=col,
+                length=length,
+                orientation=(
+                    Orientation.horizontal if orient == "h" else Orientation.vertical
+                ),
+                goal=goal,
+            )
+            for vid, row, col, length, orient, goal in vehicles
+        ],
+    )
+
+
+# Card 36 of the expert set; 28 moves with the fewest-moves metric.
+EXPERT_36 = _puzzle(
+    ("A", 0, 0, 3, "v", False),
+    ("B", 0, 1, 2, "h", False),
+    ("C", 0, 3, 2, "v", False),
+    ("D", 1, 4, 2, "h", False),
+    ("E", 2, 1, 2, "h", True),
+    ("F", 2, 3, 2, "v", False),
+    ("G", 3, 2, 3, "v", False),
+    ("H", 3, 4, 2, "h", False),
+    ("I", 4, 3, 2, "h", False),
+    ("J", 4, 5, 2, "v", False),
+)
+
+
+def _replay(path: list[PuzzleState]) -> PuzzleState:
+    """Check each step of ``path`` is one legal slide and return the end state."""
+
+    current = path[0]
+    for following in path[1:]:
+        moved = [
+            (before, after)
+            for before, after in zip(current.vehicles, following.vehicles)
+            if (before.row, before.col) != (after.row, after.col)
+        ]
+        assert len(moved) == 1
+        before, after = moved[0]
+        steps = (after.col - before.col) + (after.row - before.row)
+        move = MoveRequest(vehicle_id=before.id, steps=steps)
+        current = apply_move(current, move).state
+        assert current == following
+    return current
+
+
+def test_layout_round_trips_state() -> None:
+    state = initial_state()
+    layout, offsets = BoardLayout.from_state(state)
+    assert layout.to_state(state, offsets) == state
+    assert not layout.is_solved(offsets)
+    # Every neighbour keeps the board free of overlaps.
+    for _, _, child in layout.neighbours(offsets):
+        assert layout.occupancy(child).bit_count() == sum(
+            vehicle.length for vehicle in state.vehicles
+        )
+
+
+def test_solve_it_finds_shortest_path() -> None:
+    result, moves, path = solve_it(EXPERT_36)
+
+    assert result.completed
+    assert moves == 28
+    assert len(path) == moves + 1
+    assert path[0] == EXPERT_36
+    assert _replay(path) == result.state
+
+
+def test_solve_it_reports_unsolvable_puzzle() -> None:
+    # A horizontal car in the exit row can never leave it.
+    state = _puzzle(("X", 2, 0, 2, "h", True), ("A", 2, 4, 2, "h", False))
+    result, moves, path = solve_it(state)
+
+    assert not result.completed
+    assert moves == 0
+    assert path == [state]
+
+
+def test_breadth_first_returns_moves_along_path() -> None:
+    layout, start = BoardLayout.from_state(EXPERT_36)
+    search = breadth_first(layout, start)
+
+    assert search.completed
+    assert len(search.moves) == len(search.keys) - 1 == 28
+    for (index, steps), before, after in zip(
+        search.moves, search.keys, search.keys[1:]
+    ):
+        assert after[index] - before[index] == steps
+    assert search.nodes > 0
+
+
+def test_a_star_matches_breadth_first_with_admissible_bound() -> None:
+    layout, start = BoardLayout.from_state(EXPERT_36)
+    optimal = breadth_first(layout, start)
+    search = a_star(layout, start)
+
+    assert search.completed
+    assert len(search.moves) == len(optimal.moves)
+    assert search.nodes <= optimal.nodes
+    heuristic = BlockingHeuristic(layout)
+    for remaining, key in enumerate(reversed(optimal.keys)):
+        assert heuristic(key) <= remaining
+
+
+def test_solve_endpoint_accepts_algorithm() -> None:
+    client = TestClient(app)
+    client.post("/api/reset")
+
+    response = client.post("/api/solve", json={"algorithm": "astar"})
+    assert response.status_code == 200
+    payload = response.json()
+    assert payload["algorithm"] == "astar"
+    assert payload["completed"] is True
+    assert payload["moves"] == len(payload["path"]) - 1
+    assert payload["nodes"] > 0
+
+
+def test_bidirectional_finds_optimal_path() -> None:
+    layout, start = BoardLayout.from_state(EXPERT_36)
+    solved = list(layout.solved_states(start))
+    assert solved and all(layout.is_solved(key) for key in solved)
+
+    search = bidirectional(layout, start)
+    assert search.completed
+    assert len(search.moves) == 28
+    path = [layout.to_state(EXPERT_36, key) for key in search.keys]
+    assert path[0] == EXPERT_36
+    _replay(path)
+
+    solution = solve(EXPERT_36, SolveAlgorithm.bidirectional)
+    assert solution.moves == 28
+    assert solution.nodes == search.nodes
+
+
+def test_bidirectional_seeding_is_bounded_and_stoppable() -> None:
+    # Every solved arrangement of seven free vertical cars on a 12x12 board
+    # is far too many to list for a one-move puzzle.
+    rows = ["ABCDEFG....."] * 2 + ["." * 12] * 9 + [".........XX."]
+    layout, start = BoardLayout.from_state(state_from_grid("/".join(rows)))
+
+    search = bidirectional(layout, start)
+    assert search.completed and len(search.moves) == 1
+    assert search.nodes > BIDIRECTIONAL_SEED_LIMIT
+
+    stopped = bidirectional(layout, start, stop=lambda: True)
+    assert stopped.stopped and not stopped.completed
+    assert stopped.nodes == STOP_CHECK_INTERVAL
+
+
+def test_solution_cache_serves_path_suffixes(tmp_path) -> None:
+    repository = PuzzleRepository(tmp_path / "cache.sqlite3")
+    cache = SolutionCache(repository, size=4)
+    solution = solve(EXPERT_36)
+    cache.put(solution)
+
+    midway = solution.path[10]
+    cached = SolutionCache(repository).get(midway)
+    assert cached is not None and cached.cached
+    assert cached.moves == 18
+    assert cached.path[-1] == solution.result.state
+    _replay(cached.path)
+    # Only the four most recent entries stay in memory.
+    assert len(cache._memory) == 4
+
+
+def test_searches_out_of_nodes_are_flagged_and_not_cached(tmp_path) -> None:
+    layout, start = BoardLayout.from_state(EXPERT_36)
+    for search in (breadth_first, a_star, bidirectional):
+        result = search(layout, start, max_iter=5)
+        assert result.exhausted and not result.completed and not result.stopped
+
+    repository = PuzzleRepository(tmp_path / "cache.sqlite3")
+    cache = SolutionCache(repository)
+    cache.put(replace(solve(EXPERT_36), exhausted=True))
+    assert cache.get(EXPERT_36) is None
+
+
+def test_repeated_solve_is_a_cache_hit() -> None:
+    client = TestClient(app)
+    client.post("/api/reset")
+
+    first = client.post("/api/solve").json()
+    client.post("/api/reset")
+    second = client.post("/api/solve").json()
+
+    assert first["cached"] is False
+    assert second["cached"] is True
+    assert second["moves"] == first["moves"]
+    assert second["path"] == first["path"]
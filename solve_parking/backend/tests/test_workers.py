@@ -0,0 +1,130 @@
+"""Tests for running solves in the worker process pool."""
+
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from solve_parking_backend.batch import solve_batch, state_items
+from solve_parking_backend.benchmark import CORPUS
+from solve_parking_backend.main import app
+from solve_parking_backend.models import BatchSolveResult, SolveAlgorithm
+from solve_parking_backend.workers import (
+    SolveCancelledError,
+    SolverPool,
+    SolveTimeoutError,
+    solver_pool,
+)
+
+
+def test_pool_solves_times_out_and_cancels() -> None:
+    pool = SolverPool(workers=1, queue=1)
+
+    async def scenario() -> None:
+        solution = await pool.solve(CORPUS["expert36"], SolveAlgorithm.bfs)
+        assert solution.moves == 28
+
+        with pytest.raises(SolveTimeoutError):
+            await pool.solve(CORPUS["expert37"], SolveAlgorithm.bfs, time_budget=0)
+
+        async def gone() -> bool:
+            return True
+
+        with pytest.raises(SolveCancelledError):
+            await pool.solve(
+                CORPUS["expert37"], SolveAlgorithm.bfs, is_disconnected=gone
+            )
+        # The worker notices its stop flag and hands the slot back.
+        for _ in range(100):
+            if pool.in_flight == 0:
+                break
+            await asyncio.sleep(0.05)
+        assert pool.in_flight == 0
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        pool.shutdown()
+
+
+def test_batches_share_a_limit_and_wait_for_workers() -> None:
+    pool = SolverPool(workers=2, queue=0, batch=1)
+    items = state_items([CORPUS["expert36"], CORPUS["intermediate19"]])
+
+    async def collect() -> list[BatchSolveResult]:
+        return [result async for result in solve_batch(items, pool)]
+
+    async def scenario() -> None:
+        # An interactive solve holds one worker, and briefly the other too.
+        held = pool._free_slots.pop()
+        busy = pool._free_slots.pop()
+        asyncio.get_running_loop().call_later(0.3, pool._free_slots.append, busy)
+        running = peak = 0
+        solve = pool.solve
+
+        async def counted(*args, **kwargs):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            try:
+                return await solve(*args, **kwargs)
+            finally:
+                running -= 1
+
+        pool.solve = counted
+        first, second = await asyncio.gather(collect(), collect())
+        pool._free_slots.append(held)
+
+        for result in first + second:
+            assert result.error is None and result.solvable
+        assert peak == 1
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        pool.shutdown()
+
+
+def test_solve_endpoint_rejects_when_pool_is_full(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(solver_pool, "_free_slots", [])
+    client = TestClient(app)
+
+    response = client.post("/api/solve")
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+
+
+def test_batch_endpoint_streams_results_without_touching_the_session() -> None:
+    client = TestClient(app)
+    before = client.post("/api/reset").json()
+    stored = client.post(
+        "/api/configs",
+        json={
+            "name": "expert36",
+            "state": CORPUS["expert36"].model_dump(mode="json"),
+            "activate": False,
+        },
+    ).json()
+
+    response = client.post(
+        "/api/solve/batch",
+        json={
+            "config_ids": [stored["id"], 9999],
+            "states": [CORPUS["intermediate19"].model_dump(mode="json")],
+            "algorithm": "astar",
+        },
+    )
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    results = {
+        line["id"]: line
+        for line in map(json.loads, response.text.splitlines())
+    }
+
+    assert results[f"config:{stored['id']}"]["moves"] == 28
+    assert results["state:0"]["solvable"] and results["state:0"]["moves"] == 41
+    assert results["state:0"]["nodes"] > 0
+    assert results["config:9999"]["error"] == "Puzzle not found."
+    assert client.get("/api/puzzle").json() == before